@@ -0,0 +1,130 @@
+"""
+Per-endpoint admission control for the expensive API endpoints.
+
+Each limited endpoint runs at most ``concurrency`` requests at once; up to
+``queue`` more wait for a slot for at most ``queue_timeout`` seconds. A
+request that finds the queue full gets ``429 Too Many Requests`` and one
+that times out waiting gets ``503 Service Unavailable``, both with a
+``Retry-After`` estimated from recent service times. A streamed response
+keeps its slot until the body has been sent.
+
+Limits can be overridden per endpoint in the Flask config:
+
+    app.config["API_ADMISSION"] = {"simulate": {"concurrency": 2, "queue": 8}}
+"""
+
+import math
+import threading
+import time
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import Response, current_app
+
+from api.serialization import json_response
+from services.metrics import metrics
+
+ADMISSION_REQUESTS = metrics.counter(
+    "hospital_kpi_admission_total", "Admission decisions by endpoint and outcome",
+    ("endpoint", "outcome"))
+
+
+class ConcurrencyLimiter:
+    """Bounded concurrency with a bounded, time-limited wait queue"""
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        # Exponentially weighted mean service time, for Retry-After
+        self.service_time = 1.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> Optional[str]:
+        """Take a slot; returns None when admitted, else the rejection reason"""
+        with self._cond:
+            if self.active < self.concurrency:
+                self.active += 1
+                return None
+            if self.waiting >= self.queue:
+                return "queue_full"
+
+            self.waiting += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self.active >= self.concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return "timeout"
+                    self._cond.wait(remaining)
+                self.active += 1
+                return None
+            finally:
+                self.waiting -= 1
+
+    def release(self, elapsed: float):
+        with self._cond:
+            self.active -= 1
+            self.service_time = 0.8 * self.service_time + 0.2 * elapsed
+            self._cond.notify()
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained"""
+        backlog = (self.waiting + 1) / self.concurrency
+        return max(1, math.ceil(backlog * self.service_time))
+
+
+_limiters: Dict[str, ConcurrencyLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter(name: str, defaults: dict) -> ConcurrencyLimiter:
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                settings = {**defaults, **current_app.config.get("API_ADMISSION", {}).get(name, {})}
+                limiter = _limiters[name] = ConcurrencyLimiter(name, **settings)
+    return limiter
+
+
+def admission_control(name: str, concurrency: int = 4, queue: int = 16,
+                      queue_timeout: float = 2.0):
+    """Limit concurrent executions of a view (see module docstring)"""
+    defaults = {"concurrency": concurrency, "queue": queue, "queue_timeout": queue_timeout}
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = _limiter(name, defaults)
+            rejected = limiter.acquire()
+            if rejected is not None:
+                ADMISSION_REQUESTS.inc(endpoint=name, outcome=rejected)
+                status = 429 if rejected == "queue_full" else 503
+                response = json_response({
+                    "success": False,
+                    "message": f"Server busy ({rejected.replace('_', ' ')}), retry later"
+                }, status)
+                response.headers["Retry-After"] = str(limiter.retry_after())
+                return response
+
+            ADMISSION_REQUESTS.inc(endpoint=name, outcome="admitted")
+            started = time.perf_counter()
+            streaming = False
+            try:
+                response = view(*args, **kwargs)
+                if isinstance(response, Response) and response.is_streamed:
+                    # The work happens while the body is sent; hold the slot until then
+                    response.call_on_close(
+                        lambda: limiter.release(time.perf_counter() - started))
+                    streaming = True
+                return response
+            finally:
+                if not streaming:
+                    limiter.release(time.perf_counter() - started)
+        return wrapper
+    return decorator
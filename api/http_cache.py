@@ -0,0 +1,79 @@
+"""
+HTTP conditional request support for the read-only API endpoints.
+
+Validators are derived from the tenant's graph mutation version, so a
+dashboard polling an unchanged graph gets a bare 304 without the view
+function (SPARQL, analytics, JSON encoding) ever running.
+"""
+
+import uuid
+from functools import wraps
+
+from flask import request, make_response
+from werkzeug.http import http_date
+
+from api.tenancy import TENANT_HEADER, reasoner, requested_tenant_id
+from services.metrics import record_cache
+
+# Distinguishes process lifetimes so a restarted server (version back at 0)
+# never validates an ETag issued by a previous one.
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+def current_etag() -> str:
+    """Opaque (unquoted) entity tag for the current tenant's graph version"""
+    return f"{BOOT_ID}-{requested_tenant_id()}-{reasoner.version}"
+
+
+def _cache_control(max_age: int) -> str:
+    if max_age > 0:
+        return f"public, max-age={max_age}, must-revalidate"
+    return "no-cache"
+
+
+def _apply_validators(response, etag: str, last_modified, max_age: int):
+    response.set_etag(etag, weak=True)
+    response.headers["Last-Modified"] = http_date(last_modified)
+    response.headers["Cache-Control"] = _cache_control(max_age)
+    response.vary.add(TENANT_HEADER)
+    return response
+
+
+def _not_modified(etag: str, last_modified) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the graph version"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since:
+        # HTTP dates have second resolution
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional(max_age: int = 0):
+    """
+    Decorate a GET view so it honours If-None-Match / If-Modified-Since.
+
+    ``max_age`` > 0 lets clients reuse the response without revalidating
+    for that many seconds (ontology-derived data that rarely changes);
+    the default forces revalidation on every poll.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Snapshot before running the view so a concurrent update is
+            # never hidden behind a validator for the older version.
+            etag = current_etag()
+            last_modified = reasoner.last_modified
+
+            not_modified = _not_modified(etag, last_modified)
+            record_cache("http_conditional", hit=not_modified)
+            if not_modified:
+                response = make_response("", 304)
+                return _apply_validators(response, etag, last_modified, max_age)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _apply_validators(response, etag, last_modified, max_age)
+            return response
+        return wrapper
+    return decorator
@@ -1,59 +1,177 @@
-from flask import Blueprint, jsonify, request
-from services.reasoning_engine import reasoner
-from services.analytics import analytics
+from flask import Blueprint, Response, current_app, g, request, stream_with_context
+from api.tenancy import reasoner, analytics, current_tenant
+from services.tenants import tenants, UnknownTenant
+from services.rollups import LEVELS as ROLLUP_LEVELS
+from services.budget import BudgetExceeded
 from services.data_generator import data_generator
-from datetime import datetime
+from services.kpi_index import decode_cursor, normalize_timestamp
+from services.metrics import metrics
+from services import sparql
+from api.http_cache import conditional
+from api.admission import admission_control
+from api.serialization import json_response, dumps, Raw, fragments, compress_response, stream_rows, EXPORT_FORMATS
+from collections.abc import Mapping
+from datetime import datetime, timedelta
 import json
+import math
+import time
 
 api_bp = Blueprint('api', __name__)
 
+API_REQUESTS = metrics.counter(
+    "hospital_kpi_api_requests_total", "API requests by endpoint, method and status",
+    ("endpoint", "method", "status"))
+API_LATENCY = metrics.histogram(
+    "hospital_kpi_api_request_duration_seconds", "API request latency by endpoint",
+    ("endpoint",))
+
+@api_bp.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@api_bp.before_request
+def resolve_tenant():
+    try:
+        current_tenant()
+    except UnknownTenant as e:
+        return json_response({
+            "success": False,
+            "message": f"Unknown tenant: {e.args[0]}"
+        }, 404)
+
+@api_bp.after_request
+def record_request_metrics(response):
+    # Registered before compress_response so it runs after it (Flask calls
+    # after_request hooks in reverse) and the latency includes compression
+    endpoint = request.endpoint or "unknown"
+    API_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    started = g.get("request_started")
+    if started is not None:
+        API_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint)
+    return response
+
+api_bp.after_request(compress_response)
+
+MAX_PAGE_SIZE = 1000
+KPI_FILTERS = ("department", "domain", "goal", "status")
+
+def _kpi_query_args():
+    """Parse filter/pagination parameters shared by /api/kpis and /api/graph"""
+    query = {name: request.args.get(name) for name in KPI_FILTERS}
+    query["cursor"] = request.args.get("cursor")
+    if query["cursor"]:
+        decode_cursor(query["cursor"])
+    limit = request.args.get("limit", type=int)
+    if limit is not None and not 0 < limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    query["limit"] = limit
+    # Point in time to read observations at (default: now)
+    query["as_of"] = _time_bound("as_of")
+    return query
+
+def _fragment_key(name):
+    return f"{current_tenant().id}:{name}"
+
+def _fragment(name, build, version=None):
+    """Serialized fragment of the current tenant, cached per graph version"""
+    if version is None:
+        version = reasoner.version
+    return fragments.get(_fragment_key(name), version, build)
+
+# Budget outcome of each tenant's cached causal chains, recorded by the
+# request that built them so cache hits report the same truncation
+_chain_budgets = {}
+
+def _causal_chains(kpis, version):
+    """Cached causal chains of the current tenant plus their budget outcome"""
+    tenant_id = current_tenant().id
+    
+    def build():
+        budget = analytics.new_budget()
+        chains = analytics.generate_causal_chains(kpis, budget)
+        _chain_budgets[tenant_id] = budget.describe()
+        return chains
+    
+    chains = _fragment("causal_chains", build, version)
+    status = _chain_budgets.get(tenant_id, {"partial": False, "truncated": []})
+    if "deadline" in status["truncated"]:
+        # Deadline cuts depend on load; recompute rather than keep serving it
+        fragments.discard(_fragment_key("causal_chains"))
+    return chains, status
+
+def _requested_fields():
+    fields = request.args.get("fields")
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()]
+
+def _project(record, fields):
+    """Keep only ``fields``; dotted names select nested keys (observation.value)"""
+    projected = {}
+    for field in fields:
+        head, _, rest = field.partition(".")
+        if head not in record:
+            continue
+        if rest and isinstance(record[head], Mapping):
+            if rest in record[head]:
+                projected.setdefault(head, {})[rest] = record[head][rest]
+        else:
+            projected[head] = record[head]
+    return projected
+
 @api_bp.route('/api/kpis', methods=['GET'])
+@conditional()
 def get_kpis():
-    """Get all KPIs with their current observations and ontology context"""
+    """Get KPIs with their current observations and ontology context"""
     try:
-        kpis = reasoner.get_all_kpis()
-        
-        # Add additional context from data generator
-        current_data = data_generator.generate_current_kpi_data()
+        query = _kpi_query_args()
+    except ValueError as e:
+        return json_response({
+            "success": False,
+            "error": str(e),
+            "message": "Invalid KPI query"
+        }, 400)
+    
+    try:
+        kpis, next_cursor = reasoner.query_kpis(**query)
         
-        # Enrich KPI data with department information
-        enriched_kpis = []
-        for kpi in kpis:
-            enriched_kpi = kpi.copy()
-            enriched_kpi["department"] = "Emergency Department"  # Simplified for demo
-            enriched_kpi["domain_name"] = "Operational Efficiency"  # Simplified
-            enriched_kpi["goal_name"] = "Enhance Patient Experience"  # Simplified
-            enriched_kpis.append(enriched_kpi)
+        fields = _requested_fields()
+        if fields:
+            kpis = [_project(kpi, fields) for kpi in kpis]
         
-        return jsonify({
+        return json_response({
             "success": True,
-            "data": enriched_kpis,
-            "count": len(enriched_kpis),
-            "timestamp": current_data["timestamp"]
+            "data": kpis,
+            "count": len(kpis),
+            "next_cursor": next_cursor,
+            "as_of": query["as_of"],
+            "timestamp": reasoner.last_modified.isoformat()
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to retrieve KPI data"
-        }), 500
+        }, 500)
 
 @api_bp.route('/api/reasoning', methods=['POST'])
+@admission_control("reasoning")
 def run_reasoning():
     """Run semantic reasoning and return insights"""
+    # Get optional parameters (outside the try so oversized bodies surface as 413)
+    params = request.get_json(silent=True) or {}
     try:
-        # Get optional parameters
-        params = request.get_json() or {}
         focus_area = params.get('focus_area', 'all')
         
         # Get KPI data
+        version = reasoner.version
         kpis = reasoner.get_all_kpis()
         
-        # Calculate correlations
-        correlations = analytics.calculate_correlations(kpis)
-        
-        # Generate causal chains
-        causal_chains = analytics.generate_causal_chains(kpis)
+        # Correlations and causal chains only change with the graph, so
+        # their encoded JSON is reused until the next mutation
+        correlations = _fragment(
+            "correlations", lambda: analytics.calculate_correlations(kpis), version)
+        causal_chains, chain_budget = _causal_chains(kpis, version)
         
         # Generate insights
         insights = reasoner.generate_insights()
@@ -68,83 +186,221 @@ def run_reasoning():
             all_insights = [insight for insight in all_insights 
                           if focus_area.lower() in insight.get('title', '').lower()]
         
-        return jsonify({
+        return json_response({
             "success": True,
-            "data": {
+            "data": Raw(dumps({
                 "correlations": correlations,
                 "causal_chains": causal_chains,
                 "insights": all_insights,
+                "partial": chain_budget["partial"],
+                "truncated": chain_budget["truncated"],
                 "reasoning_timestamp": datetime.now().isoformat()
-            }
+            }))
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to run reasoning engine"
-        }), 500
+        }, 500)
+
+STATUS_COLORS = {
+    "excellent": "#059669",  # green
+    "good": "#0891b2",       # teal
+    "warning": "#f59e0b",    # amber
+    "critical": "#dc2626"    # red
+}
+
+def _build_graph_data(kpis=None):
+    """Network graph decorated with presentation metadata"""
+    graph_data = reasoner.get_network_graph_data(kpis)
+    
+    for node in graph_data["nodes"]:
+        # Add color based on status
+        node["color"] = STATUS_COLORS.get(node["status"], "#64748b")
+        
+        # Add size based on performance deviation
+        performance_ratio = node["value"] / node["target"]
+        if performance_ratio < 0.7 or performance_ratio > 1.3:
+            node["size"] = 25  # Larger for significant deviations
+        else:
+            node["size"] = 15  # Normal size
+    
+    # Add edge weights
+    for edge in graph_data["edges"]:
+        edge["weight"] = 2 if edge["type"] == "dependsOn" else 1
+        edge["color"] = "#2563eb" if edge["type"] == "influences" else "#ea580c"
+    
+    return graph_data
 
 @api_bp.route('/api/graph', methods=['GET'])
+@conditional()
 def get_network_graph():
     """Return network graph data for visualization"""
     try:
-        graph_data = reasoner.get_network_graph_data()
+        query = _kpi_query_args()
+    except ValueError as e:
+        return json_response({
+            "success": False,
+            "error": str(e),
+            "message": "Invalid graph query"
+        }, 400)
+    
+    try:
+        fields = _requested_fields()
+        if not any(query.values()) and not fields:
+            # The full graph is shared by every dashboard: encode it once per version
+            return json_response({
+                "success": True,
+                "data": _fragment("graph", _build_graph_data),
+                "next_cursor": None
+            })
         
-        # Add additional metadata
-        for node in graph_data["nodes"]:
-            node["department"] = "Emergency Department"  # Simplified
-            node["domain_name"] = "Operational Efficiency"  # Simplified
-            node["goal_name"] = "Enhance Patient Experience"  # Simplified
-            
-            # Add color based on status
-            status_colors = {
-                "excellent": "#059669",  # green
-                "good": "#0891b2",       # teal
-                "warning": "#f59e0b",    # amber
-                "critical": "#dc2626"    # red
-            }
-            node["color"] = status_colors.get(node["status"], "#64748b")
-            
-            # Add size based on performance deviation
-            performance_ratio = node["value"] / node["target"]
-            if performance_ratio < 0.7 or performance_ratio > 1.3:
-                node["size"] = 25  # Larger for significant deviations
-            else:
-                node["size"] = 15  # Normal size
-        
-        # Add edge weights
-        for edge in graph_data["edges"]:
-            edge["weight"] = 2 if edge["type"] == "dependsOn" else 1
-            edge["color"] = "#2563eb" if edge["type"] == "influences" else "#ea580c"
-        
-        return jsonify({
+        kpis, next_cursor = reasoner.query_kpis(**query)
+        graph_data = _build_graph_data(kpis)
+        if fields:
+            graph_data["nodes"] = [_project(node, ["id"] + fields) for node in graph_data["nodes"]]
+        
+        return json_response({
             "success": True,
-            "data": graph_data
+            "data": graph_data,
+            "next_cursor": next_cursor
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to generate network graph"
-        }), 500
+        }, 500)
+
+# Cluster node ids are prefixed so they can't collide with KPI URIs
+CLUSTER_PREFIX = "cluster:"
+
+def _cluster_node(cluster, level):
+    """Cluster summary decorated like a graph node, scored from its rollup"""
+    rollup = reasoner.rollups.get(level, cluster["uri"]) if cluster["uri"] else None
+    score = rollup["score"] if rollup else None
+    status = _performance_status(score)
+    return dict(cluster,
+                id=CLUSTER_PREFIX + cluster["cluster"],
+                score=score,
+                performance_status=status,
+                color=STATUS_COLORS.get(status, "#64748b"),
+                size=round(min(15 + 5 * math.sqrt(cluster["kpi_count"]), 80), 1))
+
+def _link_weight(count):
+    return min(1 + int(math.log2(count)), 6)
+
+def _build_cluster_overview(level):
+    overview = reasoner.graph_clusters(level).overview()
+    return {
+        "dimension": level,
+        "kpi_count": len(reasoner.index),
+        "nodes": [_cluster_node(cluster, level) for cluster in overview["nodes"]],
+        "edges": [dict(edge,
+                       source=CLUSTER_PREFIX + edge["source"],
+                       target=CLUSTER_PREFIX + edge["target"],
+                       weight=_link_weight(edge["count"]))
+                  for edge in overview["edges"]]
+    }
+
+def _build_cluster_detail(level, key):
+    clusters = reasoner.graph_clusters(level)
+    detail = clusters.expand(key)
+    kpis = [record for record in map(reasoner.index.get, detail["members"]) if record is not None]
+    graph_data = _build_graph_data(kpis)
+    
+    # Other clusters stay collapsed; member links to them are aggregated
+    graph_data["nodes"].extend(
+        _cluster_node(clusters.clusters[other], level) for other in detail["neighbours"])
+    for link in detail["outgoing"]:
+        graph_data["edges"].append(dict(link, source=link["kpi"],
+                                        target=CLUSTER_PREFIX + link["cluster"],
+                                        weight=_link_weight(link["count"])))
+    for link in detail["incoming"]:
+        graph_data["edges"].append(dict(link, source=CLUSTER_PREFIX + link["cluster"],
+                                        target=link["kpi"],
+                                        weight=_link_weight(link["count"])))
+    
+    graph_data.update(dimension=level, cluster=_cluster_node(clusters.clusters[key], level))
+    return graph_data
+
+def _cluster_level():
+    level = request.args.get('by', 'department')
+    if level not in ROLLUP_LEVELS:
+        raise ValueError(f"Unknown cluster dimension: {level} (department, domain or goal)")
+    return level
+
+@api_bp.route('/api/graph/clusters', methods=['GET'])
+@conditional()
+def get_graph_clusters():
+    """Coarse network: one node per department, domain or goal (``by``)"""
+    try:
+        level = _cluster_level()
+    except ValueError as e:
+        return json_response({"success": False, "message": str(e)}, 400)
+    
+    return json_response({
+        "success": True,
+        "data": _fragment(f"graph_clusters:{level}", lambda: _build_cluster_overview(level))
+    })
+
+@api_bp.route('/api/graph/clusters/<cluster_id>', methods=['GET'])
+@conditional()
+def expand_graph_cluster(cluster_id):
+    """One cluster's KPIs and links, with neighbouring clusters collapsed"""
+    try:
+        level = _cluster_level()
+    except ValueError as e:
+        return json_response({"success": False, "message": str(e)}, 400)
+    if cluster_id not in reasoner.graph_clusters(level).clusters:
+        return json_response({
+            "success": False,
+            "message": f"Cluster {cluster_id} not found"
+        }, 404)
+    
+    return json_response({
+        "success": True,
+        "data": _fragment(f"graph_clusters:{level}:{cluster_id}",
+                          lambda: _build_cluster_detail(level, cluster_id))
+    })
 
 @api_bp.route('/api/simulate', methods=['POST'])
+@admission_control("simulate")
 def run_simulation():
     """Run what-if simulation and return results"""
+    # Parsed outside the try so oversized bodies surface as 413
+    simulation_data = request.get_json()
     try:
-        simulation_data = request.get_json()
-        
         if not simulation_data or 'changes' not in simulation_data:
-            return jsonify({
+            return json_response({
                 "success": False,
                 "message": "Simulation changes are required"
-            }), 400
+            }, 400)
         
         changes = simulation_data['changes']
+        if not isinstance(changes, dict):
+            return json_response({
+                "success": False,
+                "message": "Simulation changes must map KPI URIs to values"
+            }, 400)
+        for kpi_uri, value in changes.items():
+            if (isinstance(value, bool) or not isinstance(value, (int, float))
+                    or not math.isfinite(value)):
+                return json_response({
+                    "success": False,
+                    "message": f"Change for {kpi_uri} must be a finite number"
+                }, 400)
         kpis = reasoner.get_all_kpis()
         
-        # Run simulation
-        simulation_results = analytics.simulate_scenario(changes, kpis)
+        # Run simulation within the analytics work budget
+        try:
+            simulation_results = analytics.simulate_scenario(changes, kpis)
+        except BudgetExceeded as e:
+            return json_response({
+                "success": False,
+                "message": str(e)
+            }, 413)
         
         # Add explanatory text for major impacts
         for uri, impact in simulation_results['impacts'].items():
@@ -156,26 +412,97 @@ def run_simulation():
                     affected_labels = [k['label'] for k in impact['influenced_kpis'][:3]]
                     impact['explanation'] = f"Changing {kpi_label} by {change_percent:.1f}% will affect {len(impact['influenced_kpis'])} related KPIs including {', '.join(affected_labels)}"
         
-        return jsonify({
+        return json_response({
             "success": True,
             "data": simulation_results
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to run simulation"
-        }), 500
+        }, 500)
+
+def _goal_seek_request(data):
+    """(targets, levers, bounds) of a /api/goal-seek body, with KPI URIs expanded"""
+    expand = reasoner._expand_uri
+    targets = data.get('targets')
+    if isinstance(targets, list):
+        # Bare KPI ids aim for each KPI's own target value
+        targets = {kpi: None for kpi in targets}
+    if not isinstance(targets, dict) or not targets:
+        raise ValueError("targets must map KPI ids to values or list KPI ids")
+    resolved = {}
+    for kpi, value in targets.items():
+        uri = expand(kpi)
+        record = reasoner.index.kpis.get(uri)
+        if record is None:
+            raise LookupError(f"KPI {kpi} not found")
+        resolved[uri] = float(value if value is not None else record["target"])
+    
+    levers = data.get('levers')
+    if levers is not None:
+        if not isinstance(levers, list):
+            raise ValueError("levers must be a list of KPI ids")
+        levers = [expand(kpi) for kpi in levers]
+    
+    bounds = {}
+    for kpi, limits in (data.get('bounds') or {}).items():
+        if not isinstance(limits, dict):
+            raise ValueError("bounds must map KPI ids to {\"min\": ..., \"max\": ...}")
+        low, high = limits.get('min'), limits.get('max')
+        bounds[expand(kpi)] = (float(low) if low is not None else None,
+                               float(high) if high is not None else None)
+    return resolved, levers, bounds
+
+@api_bp.route('/api/goal-seek', methods=['POST'])
+@admission_control("simulate")
+def run_goal_seek():
+    """Find the smallest upstream KPI changes that bring target KPIs to given values"""
+    # Parsed outside the try so oversized bodies surface as 413
+    data = request.get_json()
+    try:
+        targets, levers, bounds = _goal_seek_request(data or {})
+    except LookupError as e:
+        return json_response({"success": False, "message": str(e.args[0])}, 404)
+    except (TypeError, ValueError) as e:
+        return json_response({"success": False, "message": str(e)}, 400)
+    
+    try:
+        kpis = reasoner.get_all_kpis()
+        try:
+            result = analytics.goal_seek(targets, kpis, levers=levers, bounds=bounds)
+        except BudgetExceeded as e:
+            return json_response({"success": False, "message": str(e)}, 413)
+        except ValueError as e:
+            return json_response({"success": False, "message": str(e)}, 400)
+        
+        return json_response({
+            "success": True,
+            "data": result
+        })
+    except Exception as e:
+        return json_response({
+            "success": False,
+            "error": str(e),
+            "message": "Failed to run goal seek"
+        }, 500)
 
 @api_bp.route('/api/insights', methods=['GET'])
+@conditional()
 def get_insights():
     """Get real-time insights and recommendations"""
     try:
-        # Get current KPI data
-        kpis = reasoner.get_all_kpis()
+        as_of = _time_bound("as_of")
+    except ValueError as e:
+        return json_response({"success": False, "message": str(e)}, 400)
+    
+    try:
+        # Get current KPI data (or a point-in-time snapshot)
+        kpis = reasoner.get_all_kpis(as_of)
         
         # Generate insights from reasoner
-        insights = reasoner.generate_insights()
+        insights = reasoner.generate_insights(as_of)
         
         # Add predictive insights
         predictive_insights = analytics.generate_predictive_insights(kpis)
@@ -186,63 +513,87 @@ def get_insights():
         severity_order = {"high": 3, "medium": 2, "low": 1}
         all_insights.sort(key=lambda x: severity_order.get(x.get('severity', 'low'), 0), reverse=True)
         
-        # Add timestamp and source
-        for insight in all_insights:
-            insight["timestamp"] = datetime.now().isoformat()
-            insight["source"] = "ontology_reasoning"
+        # Add timestamp and source (on copies: reasoner results are shared
+        # with concurrent requests and must not be mutated)
+        timestamp = datetime.now().isoformat()
+        all_insights = [dict(insight, timestamp=timestamp, source="ontology_reasoning")
+                        for insight in all_insights]
         
-        return jsonify({
+        return json_response({
             "success": True,
             "data": {
                 "insights": all_insights,
                 "count": len(all_insights),
+                "as_of": as_of,
                 "last_updated": datetime.now().isoformat()
             }
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to generate insights"
-        }), 500
+        }, 500)
+
+def _performance_status(score):
+    if score is None:
+        return None
+    if score >= 90:
+        return "excellent"
+    if score >= 75:
+        return "good"
+    if score >= 60:
+        return "warning"
+    return "critical"
+
+def _department(dept_uri):
+    """Department record built from the membership index and its rollup"""
+    rollup = reasoner.rollups.get("department", dept_uri)
+    return {
+        "id": dept_uri.rsplit("#", 1)[-1],
+        "uri": dept_uri,
+        "name": reasoner.index.labels.get(dept_uri, dept_uri.rsplit("#", 1)[-1]),
+        "kpis": reasoner.get_group_kpis("department", dept_uri),
+        "kpi_count": rollup["kpi_count"] if rollup else 0,
+        "status_counts": rollup["status_counts"] if rollup else {},
+        "overall_performance": rollup["score"] if rollup else None,
+        "performance_status": _performance_status(rollup["score"] if rollup else None)
+    }
 
 @api_bp.route('/api/departments', methods=['GET'])
+@conditional()
 def get_departments():
     """Get all departments with their KPIs"""
     try:
-        current_data = data_generator.generate_current_kpi_data()
-        
-        # Add department metadata
-        for dept in current_data["departments"]:
-            dept["id"] = dept["name"].lower().replace(" ", "_")
-            dept["status"] = "operational"
-            dept["staff_count"] = random.randint(20, 200)  # Simulated staff count
-            dept["bed_count"] = random.randint(10, 50) if "emergency" in dept["name"].lower() or "surgery" in dept["name"].lower() else 0
-            
-            # Calculate department overall performance
-            if dept["kpis"]:
-                avg_performance = sum(kpi["performance_ratio"] for kpi in dept["kpis"]) / len(dept["kpis"])
-                dept["overall_performance"] = round(avg_performance, 1)
-                
-                if avg_performance >= 90:
-                    dept["performance_status"] = "excellent"
-                elif avg_performance >= 75:
-                    dept["performance_status"] = "good"
-                elif avg_performance >= 60:
-                    dept["performance_status"] = "warning"
-                else:
-                    dept["performance_status"] = "critical"
-        
-        return jsonify({
+        departments = [_department(uri) for uri in sorted(reasoner.index.by_department)]
+        departments.sort(key=lambda d: d["name"])
+        
+        return json_response({
             "success": True,
-            "data": current_data["departments"]
+            "data": departments
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to retrieve department data"
-        }), 500
+        }, 500)
+
+@api_bp.route('/api/departments/<dept_id>', methods=['GET'])
+@conditional()
+def get_department(dept_id):
+    """Get one department with its KPIs"""
+    dept_uri = reasoner._expand_uri(dept_id)
+    if dept_uri not in reasoner.index.by_department:
+        return json_response({
+            "success": False,
+            "message": f"Department {dept_id} not found"
+        }, 404)
+    
+    return json_response({
+        "success": True,
+        "data": _department(dept_uri)
+    })
 
 @api_bp.route('/api/historical', methods=['GET'])
 def get_historical_data():
@@ -251,49 +602,74 @@ def get_historical_data():
         days = request.args.get('days', 30, type=int)
         historical_data = data_generator.generate_historical_data(days)
         
-        return jsonify({
+        return json_response({
             "success": True,
             "data": historical_data
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to retrieve historical data"
-        }), 500
+        }, 500)
+
+def _goal_risk(score):
+    if score is None or score < 70:
+        return "high"
+    if score < 85:
+        return "medium"
+    return "low"
+
+def _build_strategic_goals():
+    goals = []
+    for rollup in reasoner.rollups.summary("goal"):
+        members = reasoner.rollups.members("goal", rollup["uri"])
+        progress = rollup["score"] if rollup["score"] is not None else 0.0
+        goals.append({
+            **rollup,
+            "progress": progress,
+            "status": "on_track" if progress >= 80 else "needs_attention",
+            "risk_level": _goal_risk(rollup["score"]),
+            "contributing_kpis": [reasoner.index.kpis[uri]["label"] for uri in members]
+        })
+    return goals
 
 @api_bp.route('/api/strategic-goals', methods=['GET'])
+@conditional()
 def get_strategic_goals():
-    """Get strategic goals with progress tracking"""
+    """Get strategic goals with progress rolled up from their contributing KPIs"""
     try:
-        strategic_goals = data_generator.generate_strategic_goals()
-        
-        # Add progress calculation based on contributing KPIs
-        for goal in strategic_goals:
-            contributing_kpis = goal.get("contributing_kpis", [])
-            if contributing_kpis:
-                # Simulate progress based on KPI performance
-                goal["calculated_progress"] = goal["progress"] + random.uniform(-5, 5)
-                goal["calculated_progress"] = max(0, min(100, goal["calculated_progress"]))
-            
-            # Add risk assessment
-            if goal["progress"] < 70:
-                goal["risk_level"] = "high"
-            elif goal["progress"] < 85:
-                goal["risk_level"] = "medium"
-            else:
-                goal["risk_level"] = "low"
-        
-        return jsonify({
+        strategic_goals = _fragment("strategic_goals", _build_strategic_goals)
+        
+        return json_response({
             "success": True,
             "data": strategic_goals
         })
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to retrieve strategic goals"
-        }), 500
+        }, 500)
+
+@api_bp.route('/api/rollups', methods=['GET'])
+@conditional()
+def get_rollups():
+    """Get weighted KPI scores per goal, domain or department"""
+    level = request.args.get('level', 'goal')
+    try:
+        rollups = reasoner.rollups.summary(level)
+    except ValueError as e:
+        return json_response({
+            "success": False,
+            "message": str(e)
+        }, 400)
+    
+    return json_response({
+        "success": True,
+        "level": level,
+        "data": rollups
+    })
 
 @api_bp.route('/api/kpi/<kpi_id>/update', methods=['POST'])
 def update_kpi_value(kpi_id):
@@ -302,10 +678,10 @@ def update_kpi_value(kpi_id):
         update_data = request.get_json()
         
         if not update_data or 'value' not in update_data:
-            return jsonify({
+            return json_response({
                 "success": False,
                 "message": "New value is required"
-            }), 400
+            }, 400)
         
         new_value = float(update_data['value'])
         
@@ -313,28 +689,319 @@ def update_kpi_value(kpi_id):
         success = reasoner.update_kpi_value(f"http://hospital-kpi.org/ontology#{kpi_id}", new_value)
         
         if success:
-            return jsonify({
+            return json_response({
                 "success": True,
                 "message": f"KPI {kpi_id} updated successfully",
                 "new_value": new_value
             })
         else:
-            return jsonify({
+            return json_response({
                 "success": False,
                 "message": f"Failed to update KPI {kpi_id}"
-            }), 500
+            }, 500)
             
     except Exception as e:
-        return jsonify({
+        return json_response({
             "success": False,
             "error": str(e),
             "message": "Failed to update KPI value"
-        }), 500
+        }, 500)
+
+@api_bp.route('/api/kpi/<kpi_id>/root-causes', methods=['GET'])
+@conditional()
+def get_root_causes(kpi_id):
+    """Rank upstream KPIs most likely to explain a KPI's current status"""
+    kpi_uri = reasoner._expand_uri(kpi_id)
+    if kpi_uri not in reasoner.index.kpis:
+        return json_response({
+            "success": False,
+            "message": f"KPI {kpi_id} not found"
+        }, 404)
+    
+    try:
+        max_depth = request.args.get('max_depth', 4, type=int)
+        min_score = request.args.get('min_score', 0.05, type=float)
+        limit = request.args.get('limit', 10, type=int)
+        if not 1 <= max_depth <= 10 or not 1 <= limit <= MAX_PAGE_SIZE or min_score < 0:
+            return json_response({
+                "success": False,
+                "message": "max_depth must be 1-10, limit 1-1000 and min_score >= 0"
+            }, 400)
+        
+        root_causes = reasoner.find_root_causes(kpi_uri, max_depth=max_depth,
+                                                min_score=min_score, limit=limit)
+        
+        return json_response({
+            "success": True,
+            "data": {
+                "kpi": reasoner.index.kpis[kpi_uri],
+                "root_causes": root_causes,
+                "count": len(root_causes)
+            }
+        })
+    except Exception as e:
+        return json_response({
+            "success": False,
+            "error": str(e),
+            "message": "Failed to analyse root causes"
+        }, 500)
+
+@api_bp.route('/api/kpi/<kpi_id>/sensitivity', methods=['GET'])
+@conditional()
+def get_sensitivity(kpi_id):
+    """Rank the KPIs with the largest total effect on a KPI, and those it affects"""
+    kpi_uri = reasoner._expand_uri(kpi_id)
+    if kpi_uri not in reasoner.index.kpis:
+        return json_response({
+            "success": False,
+            "message": f"KPI {kpi_id} not found"
+        }, 404)
+    
+    try:
+        limit = request.args.get('limit', 10, type=int)
+        max_depth = request.args.get('max_depth', analytics.limits["max_depth"], type=int)
+        if not 1 <= limit <= MAX_PAGE_SIZE or not 0 <= max_depth <= analytics.limits["max_depth"]:
+            return json_response({
+                "success": False,
+                "message": f"limit must be 1-{MAX_PAGE_SIZE} and max_depth 0-{analytics.limits['max_depth']}"
+            }, 400)
+        
+        ranking = analytics.sensitivity_ranking(kpi_uri, reasoner.get_all_kpis(),
+                                                limit=limit, max_depth=max_depth)
+        
+        return json_response({
+            "success": True,
+            "data": {
+                "kpi": reasoner.index.kpis[kpi_uri],
+                **ranking
+            }
+        })
+    except Exception as e:
+        return json_response({
+            "success": False,
+            "error": str(e),
+            "message": "Failed to rank sensitivities"
+        }, 500)
+
+SPARQL_FORMATS = {
+    "json": "application/sparql-results+json",
+    "csv": "text/csv",
+}
+
+def _sparql_request():
+    """Query text and result format of a /api/sparql request"""
+    if request.method == 'POST':
+        if request.mimetype == 'application/sparql-query':
+            text = request.get_data(as_text=True)
+        elif request.is_json:
+            text = (request.get_json(silent=True) or {}).get('query')
+        else:
+            text = request.form.get('query')
+    else:
+        text = request.args.get('query')
+    
+    result_format = request.args.get('format')
+    if result_format is None:
+        best = request.accept_mimetypes.best_match(
+            ["application/sparql-results+json", "application/json", "text/csv"])
+        result_format = "csv" if best == "text/csv" else "json"
+    return text, result_format
+
+@api_bp.route('/api/sparql', methods=['GET', 'POST'])
+@admission_control("sparql", concurrency=2, queue=4)
+def run_sparql():
+    """Read-only SELECT/ASK over the tenant's graph, streamed as SPARQL JSON or CSV"""
+    text, result_format = _sparql_request()
+    if not text:
+        return json_response({
+            "success": False,
+            "message": "Missing query"
+        }, 400)
+    if result_format not in SPARQL_FORMATS:
+        return json_response({
+            "success": False,
+            "message": f"Unknown format: {result_format} (json or csv)"
+        }, 400)
+    
+    # Callers may tighten the configured limits but not raise them
+    max_rows = current_app.config.get("SPARQL_MAX_ROWS", sparql.DEFAULT_MAX_ROWS)
+    timeout = current_app.config.get("SPARQL_TIMEOUT", sparql.DEFAULT_TIMEOUT)
+    limit = request.args.get('limit', type=int)
+    requested_timeout = request.args.get('timeout', type=float)
+    if (limit is not None and limit < 1) or (requested_timeout is not None and requested_timeout <= 0):
+        return json_response({
+            "success": False,
+            "message": "limit and timeout must be positive"
+        }, 400)
+    max_rows = min(max_rows, limit or max_rows)
+    timeout = min(timeout, requested_timeout or timeout)
+    
+    try:
+        result = sparql.execute(reasoner.graph, text, timeout=timeout, max_rows=max_rows)
+    except sparql.SparqlError as e:
+        return json_response({
+            "success": False,
+            "message": str(e)
+        }, 400)
+    except sparql.QueryTimeout:
+        return json_response({
+            "success": False,
+            "message": f"Query exceeded the {timeout:g}s time limit"
+        }, 504)
+    except Exception as e:
+        return json_response({
+            "success": False,
+            "error": str(e),
+            "message": "Query evaluation failed"
+        }, 400)
+    
+    chunks = sparql.json_chunks if result_format == "json" else sparql.csv_chunks
+    return Response(stream_with_context(chunks(result)), mimetype=SPARQL_FORMATS[result_format])
+
+EXPORT_KPI_COLUMNS = ["uri", "label", "department", "domain_name", "goal_name",
+                      "target", "unit", "value", "status", "timestamp"]
+EXPORT_OBSERVATION_COLUMNS = ["kpi_uri", "kpi_label", "department", "observation_uri",
+                              "value", "status", "timestamp"]
+EXPORT_CHAIN_COLUMNS = ["chain", "relationships", "impact", "length"]
+
+def _export_format():
+    result_format = request.args.get('format', 'ndjson')
+    if result_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown format: {result_format} (ndjson or csv)")
+    return result_format
+
+def _time_bound(name, end=False):
+    """ISO 8601 bound from a query parameter; a date-only ``to`` includes that day"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        bound = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date or datetime")
+    if end and len(value) == 10:
+        bound += timedelta(days=1)
+    # Compared as strings against stored (naive local) timestamps
+    return normalize_timestamp(bound)
+
+def _export_filters():
+    return {name: request.args.get(name) for name in KPI_FILTERS}
+
+@api_bp.route('/api/export/kpis', methods=['GET'])
+@admission_control("export", concurrency=2, queue=4)
+def export_kpis():
+    """Stream KPIs with their latest observation (same filters as /api/kpis)"""
+    try:
+        result_format = _export_format()
+        kpis, _ = reasoner.query_kpis(**_export_filters())
+    except ValueError as e:
+        return json_response({"success": False, "message": str(e)}, 400)
+    
+    rows = ({
+        "uri": kpi["uri"],
+        "label": kpi["label"],
+        "department": kpi["department"],
+        "domain_name": kpi["domain_name"],
+        "goal_name": kpi["goal_name"],
+        "target": kpi["target"],
+        "unit": kpi["unit"],
+        "value": kpi["observation"]["value"],
+        "status": kpi["observation"]["status"],
+        "timestamp": kpi["observation"]["timestamp"]
+    } for kpi in kpis)
+    return stream_rows(rows, EXPORT_KPI_COLUMNS, result_format, "kpis")
+
+@api_bp.route('/api/export/observations', methods=['GET'])
+@admission_control("export", concurrency=2, queue=4)
+def export_observations():
+    """Stream every observation in ``[from, to)``, optionally for one KPI or a KPI filter"""
+    try:
+        result_format = _export_format()
+        start = _time_bound('from')
+        end = _time_bound('to', end=True)
+        
+        kpi_uris = None
+        filters = _export_filters()
+        if any(filters.values()):
+            kpis, _ = reasoner.query_kpis(**filters)
+            kpi_uris = [kpi["uri"] for kpi in kpis]
+        kpi_id = request.args.get('kpi')
+        if kpi_id:
+            kpi_uri = reasoner._expand_uri(kpi_id)
+            kpi_uris = [kpi_uri] if kpi_uris is None or kpi_uri in kpi_uris else []
+    except ValueError as e:
+        return json_response({"success": False, "message": str(e)}, 400)
+    
+    rows = reasoner.iter_observations(kpi_uris, start=start, end=end)
+    return stream_rows(rows, EXPORT_OBSERVATION_COLUMNS, result_format, "observations")
+
+@api_bp.route('/api/export/causal-chains', methods=['GET'])
+@admission_control("export", concurrency=2, queue=4)
+def export_causal_chains():
+    """Stream causal chains as they are enumerated (``max_depth``, ``limit``)"""
+    # Streaming keeps memory flat, so only the depth and chain caps apply
+    budget = analytics.new_budget(deadline=None)
+    try:
+        result_format = _export_format()
+        max_depth = request.args.get('max_depth', budget.max_depth, type=int)
+        limit = request.args.get('limit', budget.max_chains, type=int)
+        if not 1 <= max_depth <= budget.max_depth or not 1 <= limit <= budget.max_chains:
+            raise ValueError(f"max_depth must be 1-{budget.max_depth} and limit 1-{budget.max_chains}")
+    except ValueError as e:
+        return json_response({"success": False, "message": str(e)}, 400)
+    budget.max_depth = max_depth
+    budget.max_chains = limit
+    
+    rows = analytics.iter_causal_chains(reasoner.get_all_kpis(), budget)
+    return stream_rows(rows, EXPORT_CHAIN_COLUMNS, result_format, "causal-chains")
+
+@api_bp.route('/api/tenants', methods=['GET'])
+def get_tenants():
+    """List registered hospitals"""
+    return json_response({
+        "success": True,
+        "data": tenants.describe()
+    })
+
+@api_bp.route('/api/tenants/compare', methods=['GET'])
+def compare_tenants():
+    """Benchmark hospitals against each other, querying each tenant in parallel"""
+    level = request.args.get('level', 'goal')
+    if level not in ROLLUP_LEVELS:
+        return json_response({
+            "success": False,
+            "message": f"Unknown rollup level: {level}"
+        }, 400)
+    requested = request.args.get('tenants')
+    tenant_ids = [t.strip() for t in requested.split(",") if t.strip()] if requested else None
+    
+    def summarize(tenant):
+        index = tenant.reasoner.index
+        return {
+            "label": tenant.label,
+            "kpis": len(index),
+            "status_counts": {status: len(uris) for status, uris in index.by_status.items() if uris},
+            "rollups": tenant.reasoner.rollups.summary(level)
+        }
+    
+    try:
+        results = tenants.fan_out(summarize, tenant_ids)
+    except UnknownTenant as e:
+        return json_response({
+            "success": False,
+            "message": f"Unknown tenant: {e.args[0]}"
+        }, 404)
+    
+    return json_response({
+        "success": True,
+        "level": level,
+        "data": results
+    })
 
 @api_bp.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "services": {
@@ -344,21 +1011,50 @@ def health_check():
         }
     })
 
+@api_bp.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus text exposition of stage timings, request and cache counters"""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 # Error handler for API
+@api_bp.errorhandler(400)
+def bad_request(error):
+    return json_response({
+        "success": False,
+        "error": "Bad request",
+        "message": "The request could not be parsed; check that the body is valid JSON"
+    }, 400)
+
+@api_bp.errorhandler(415)
+def unsupported_media_type(error):
+    return json_response({
+        "success": False,
+        "error": "Unsupported media type",
+        "message": "Request body must be JSON (Content-Type: application/json)"
+    }, 415)
+
 @api_bp.errorhandler(404)
 def not_found(error):
-    return jsonify({
+    return json_response({
         "success": False,
         "error": "Resource not found",
         "message": "The requested API endpoint does not exist"
-    }), 404
+    }, 404)
+
+@api_bp.errorhandler(413)
+def payload_too_large(error):
+    return json_response({
+        "success": False,
+        "error": "Payload too large",
+        "message": "Request body exceeds the allowed size"
+    }, 413)
 
 @api_bp.errorhandler(500)
 def internal_error(error):
-    return jsonify({
+    return json_response({
         "success": False,
         "error": "Internal server error",
         "message": "An unexpected error occurred while processing your request"
-    }), 500
+    }, 500)
 
 from datetime import datetime
\ No newline at end of file
@@ -0,0 +1,265 @@
+"""
+JSON encoding and response compression for the API blueprint.
+
+- ``dumps`` uses orjson when it is installed and falls back to the stdlib
+  encoder; other encoders can be plugged in with ``register_encoder``.
+- ``Raw`` wraps bytes that are already JSON so cached fragments (graph
+  topology, causal chains, ...) are spliced into responses without being
+  re-encoded.
+- ``compress_response`` negotiates br/gzip for bodies above a size threshold.
+- ``stream_rows`` streams NDJSON or CSV exports from a row generator.
+"""
+
+import csv
+import gzip
+import io
+import json
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from flask import Response, current_app, request, stream_with_context
+
+from services.metrics import record_cache, stage
+from services.singleflight import SingleFlight
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+# ----------------------------------------------------------
+# Encoders
+# ----------------------------------------------------------
+
+def _default(obj: Any) -> Any:
+    # Compact records (services.records) become dicts only here
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is not None:
+        return to_dict()
+    return str(obj)
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def _orjson_dumps(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    except TypeError:
+        # e.g. non-string dict keys, which the stdlib encoder coerces
+        return _stdlib_dumps(obj)
+
+
+_encoders: Dict[str, Callable[[Any], bytes]] = {"json": _stdlib_dumps}
+if orjson is not None:
+    _encoders["orjson"] = _orjson_dumps
+
+_active_encoder = "orjson" if orjson is not None else "json"
+
+
+def register_encoder(name: str, encoder: Callable[[Any], bytes]):
+    """Make an encoder (obj -> UTF-8 JSON bytes) selectable by name"""
+    _encoders[name] = encoder
+
+
+def use_encoder(name: str):
+    """Select the encoder used by ``dumps``"""
+    global _active_encoder
+    if name not in _encoders:
+        raise ValueError(f"Unknown JSON encoder: {name}")
+    _active_encoder = name
+
+
+def encoder_name() -> str:
+    return _active_encoder
+
+
+class Raw:
+    """Pre-encoded JSON value spliced verbatim into a top-level payload"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode ``obj``; top-level ``Raw`` values in a dict are spliced as-is"""
+    encode = _encoders[_active_encoder]
+    with stage("json_encode"):
+        if isinstance(obj, dict) and any(isinstance(v, Raw) for v in obj.values()):
+            parts = []
+            for key, value in obj.items():
+                encoded = value.data if isinstance(value, Raw) else encode(value)
+                parts.append(encode(str(key)) + b":" + encoded)
+            return b"{" + b",".join(parts) + b"}"
+        return encode(obj)
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """Drop-in replacement for ``jsonify`` using the active encoder"""
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+# ----------------------------------------------------------
+# Fragment cache
+# ----------------------------------------------------------
+
+class FragmentCache:
+    """Serialized JSON fragments keyed by name and graph version"""
+
+    def __init__(self):
+        self._fragments: Dict[str, Tuple[Any, bytes]] = {}
+        self._lock = threading.Lock()
+        # Concurrent misses for the same fragment share one build
+        self._flights = SingleFlight("singleflight.fragments")
+
+    def get(self, name: str, version: Any, build: Callable[[], Any]) -> Raw:
+        """Return the fragment for ``version``, encoding ``build()`` on a miss"""
+        cached = self._fragments.get(name)
+        if cached is not None and cached[0] == version:
+            record_cache("fragments", hit=True)
+            return Raw(cached[1])
+        record_cache("fragments", hit=False)
+
+        return Raw(self._flights.do((name, version), lambda: self._build(name, version, build)))
+
+    def _build(self, name: str, version: Any, build: Callable[[], Any]) -> bytes:
+        data = dumps(build())
+        with self._lock:
+            self._fragments[name] = (version, data)
+        return data
+
+    def discard(self, name: str):
+        with self._lock:
+            self._fragments.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+
+fragments = FragmentCache()
+
+
+# ----------------------------------------------------------
+# Streaming exports
+# ----------------------------------------------------------
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+# Bytes buffered before a chunk is sent
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _ndjson_chunks(rows: Iterable[Dict[str, Any]], columns: List[str]) -> Iterator[bytes]:
+    encode = _encoders[_active_encoder]
+    buffer = []
+    size = 0
+    for row in rows:
+        line = encode(row) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= STREAM_CHUNK_SIZE:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "|".join(str(v) for v in value)
+    return value
+
+
+def _csv_chunks(rows: Iterable[Dict[str, Any]], columns: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+        if buffer.tell() >= STREAM_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def stream_rows(rows: Iterable[Dict[str, Any]], columns: List[str], fmt: str,
+                filename: str) -> Response:
+    """
+    Download streamed from a row generator: one JSON object per line
+    (``ndjson``) or a CSV table of ``columns`` (lists joined with ``|``).
+    Rows are encoded as they are produced, so memory stays flat.
+    """
+    chunks = _ndjson_chunks if fmt == "ndjson" else _csv_chunks
+    response = Response(stream_with_context(chunks(rows, columns)),
+                        mimetype=EXPORT_FORMATS[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+# ----------------------------------------------------------
+# Compression
+# ----------------------------------------------------------
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+
+
+def _negotiate_encoding() -> str:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return ""
+
+
+def compress_response(response: Response) -> Response:
+    """``after_request`` hook: br/gzip-encode large uncompressed bodies"""
+    config = current_app.config
+    if not config.get("API_COMPRESSION", True):
+        return response
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return response
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if "Content-Encoding" in response.headers:
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    body = response.get_data()
+    if len(body) < config.get("API_COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE):
+        return response
+
+    encoding = _negotiate_encoding()
+    if not encoding:
+        return response
+
+    with stage(f"compress.{encoding}"):
+        if encoding == "br":
+            body = brotli.compress(
+                body, quality=config.get("API_BROTLI_QUALITY", DEFAULT_BROTLI_QUALITY))
+        else:
+            body = gzip.compress(
+                body, compresslevel=config.get("API_GZIP_LEVEL", DEFAULT_GZIP_LEVEL))
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,35 @@
+"""
+Per-request tenant resolution for the API blueprint.
+
+The tenant comes from the ``X-Tenant-ID`` header or the ``tenant`` query
+parameter and defaults to the bundled ``general`` hospital. ``reasoner`` and
+``analytics`` are proxies to the current tenant's instances, so views use
+them exactly like the old global singletons.
+"""
+
+from flask import g, has_request_context, request
+from werkzeug.local import LocalProxy
+
+from services.tenants import DEFAULT_TENANT, Tenant, tenants
+
+TENANT_HEADER = "X-Tenant-ID"
+
+
+def requested_tenant_id() -> str:
+    if not has_request_context():
+        return DEFAULT_TENANT
+    return request.headers.get(TENANT_HEADER) or request.args.get("tenant") or DEFAULT_TENANT
+
+
+def current_tenant() -> Tenant:
+    """Tenant of the current request (resolved once, then kept on ``g``)"""
+    if not has_request_context():
+        return tenants.get(DEFAULT_TENANT)
+    tenant = g.get("tenant")
+    if tenant is None:
+        tenant = g.tenant = tenants.get(requested_tenant_id())
+    return tenant
+
+
+reasoner = LocalProxy(lambda: current_tenant().reasoner)
+analytics = LocalProxy(lambda: current_tenant().analytics)
@@ -1,9 +1,10 @@
 from flask import Flask, render_template, jsonify, request
-from flask_socketio import SocketIO, emit
+import click
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
 import json
+import logging
 from datetime import datetime, timedelta
-import threading
 import time
 
 # Import our modules
@@ -11,10 +12,17 @@ from api.routes import api_bp
 from services.reasoning_engine import reasoner
 from services.analytics import analytics
 from services.data_generator import data_generator
+from services import loader
+from services.metrics import metrics, stage
+from services.scheduler import Scheduler
+from services.log import get_logger
+
+logger = get_logger("app")
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'hospital-kpi-secret-key-2025'
+app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024  # bounds simulation/reasoning payloads
 app.config['STATIC_FOLDER'] = 'static'
 
 # Initialize SocketIO for real-time updates
@@ -23,9 +31,27 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 # Register API blueprint
 app.register_blueprint(api_bp)
 
-# Global variables for real-time updates
-update_thread = None
-update_active = False
+# Real-time updates: one scheduled broadcast to the dashboards subscribed
+# with start_realtime (each client subscribes and unsubscribes only itself)
+REALTIME_INTERVAL = float(os.environ.get("REALTIME_INTERVAL", 10))
+REALTIME_JITTER = 1.0
+REALTIME_ROOM = "realtime"
+# Subscribed client sids, shared with the asyncio server in asgi.py
+realtime_clients = set()
+
+REALTIME_BROADCASTS = metrics.counter(
+    "hospital_kpi_realtime_broadcasts_total", "Background update broadcasts by outcome",
+    ("outcome",))
+metrics.gauge("hospital_kpi_realtime_subscribers", "Clients subscribed to real-time updates",
+              callback=lambda: len(realtime_clients))
+
+# Recurring background work; started with the app, once per process
+scheduler = Scheduler(workers=int(os.environ.get("SCHEDULER_WORKERS", 4)))
+
+def start_scheduler():
+    """Start the scheduler unless it already runs in this process"""
+    if not scheduler.running:
+        scheduler.start()
 
 @app.route('/')
 def index():
@@ -47,99 +73,84 @@ def dashboard():
     """Alternative dashboard route"""
     return render_template('index.html')
 
+def realtime_snapshot():
+    """(event, payload) pairs pushed to dashboards on each real-time update"""
+    kpis = reasoner.get_all_kpis()
+    insights = reasoner.generate_insights()
+    graph_data = reasoner.get_network_graph_data()
+    timestamp = datetime.now().isoformat()
+    
+    return [
+        # Socket.IO's JSON encoder doesn't know the index's compact records
+        ('kpi_update', {'kpis': [kpi.to_dict() for kpi in kpis], 'timestamp': timestamp}),
+        ('insights_update', {'insights': insights, 'timestamp': timestamp}),
+        ('graph_update', {'graph_data': graph_data, 'timestamp': timestamp})
+    ]
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
-    print(f"Client connected: {request.sid}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Client connected", extra={"sid": request.sid})
     emit('connected', {'data': 'Connected to Hospital KPI Intelligence System'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle client disconnection"""
-    print(f"Client disconnected: {request.sid}")
+    realtime_clients.discard(request.sid)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Client disconnected", extra={"sid": request.sid})
 
 @socketio.on('request_update')
 def handle_update_request():
     """Handle manual update request"""
     try:
-        # Get fresh data
-        kpis = reasoner.get_all_kpis()
-        insights = reasoner.generate_insights()
-        graph_data = reasoner.get_network_graph_data()
-        
-        # Emit updates
-        emit('kpi_update', {
-            'kpis': kpis,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        emit('insights_update', {
-            'insights': insights,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        emit('graph_update', {
-            'graph_data': graph_data,
-            'timestamp': datetime.now().isoformat()
-        })
+        for event, payload in realtime_snapshot():
+            emit(event, payload)
         
     except Exception as e:
         emit('error', {'message': str(e)})
 
-def background_update_task():
-    """Background task to send periodic updates"""
-    global update_active
+def broadcast_realtime():
+    """Scheduled job: push one snapshot to every subscribed client"""
+    if not realtime_clients:
+        return
     
-    while update_active:
-        try:
-            # Get fresh data
-            kpis = reasoner.get_all_kpis()
-            insights = reasoner.generate_insights()
-            graph_data = reasoner.get_network_graph_data()
-            
-            # Broadcast to all connected clients
-            socketio.emit('kpi_update', {
-                'kpis': kpis,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            socketio.emit('insights_update', {
-                'insights': insights,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            socketio.emit('graph_update', {
-                'graph_data': graph_data,
-                'timestamp': datetime.now().isoformat()
-            })
-            
-            # Wait 10 seconds before next update
-            time.sleep(10)
-            
-        except Exception as e:
-            print(f"Background update error: {e}")
-            socketio.emit('error', {'message': str(e)})
-            time.sleep(10)
+    try:
+        # Get fresh data
+        with stage("realtime.compute"):
+            snapshot = realtime_snapshot()
+        
+        # Broadcast to all subscribed clients
+        with stage("realtime.socketio_emit"):
+            for event, payload in snapshot:
+                socketio.emit(event, payload, to=REALTIME_ROOM)
+        REALTIME_BROADCASTS.inc(outcome="success")
+        
+    except Exception as e:
+        REALTIME_BROADCASTS.inc(outcome="error")
+        socketio.emit('error', {'message': str(e)}, to=REALTIME_ROOM)
+        raise
+
+scheduler.add("realtime_broadcast", broadcast_realtime, REALTIME_INTERVAL, jitter=REALTIME_JITTER)
+start_scheduler()
+
+# Workers forked from a preloaded app inherit no scheduler thread
+app.before_request(start_scheduler)
 
 @socketio.on('start_realtime')
 def start_realtime_updates():
-    """Start real-time updates"""
-    global update_thread, update_active
+    """Subscribe this client to real-time updates"""
+    join_room(REALTIME_ROOM)
+    realtime_clients.add(request.sid)
     
-    if not update_active:
-        update_active = True
-        update_thread = threading.Thread(target=background_update_task)
-        update_thread.daemon = True
-        update_thread.start()
-        
-        emit('realtime_started', {'message': 'Real-time updates started'})
+    emit('realtime_started', {'message': 'Real-time updates started'})
 
 @socketio.on('stop_realtime')
 def stop_realtime_updates():
-    """Stop real-time updates"""
-    global update_active
-    
-    update_active = False
+    """Unsubscribe this client from real-time updates"""
+    leave_room(REALTIME_ROOM)
+    realtime_clients.discard(request.sid)
     emit('realtime_stopped', {'message': 'Real-time updates stopped'})
 
 # Template context processors
@@ -188,6 +199,37 @@ def init_data():
     
     print("Sample data generated and saved to sample_data.json")
 
+@app.cli.command("load-data")
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["nt", "nquads", "turtle"]),
+              help="RDF format (guessed from the file extension by default)")
+@click.option("--chunk-size", default=loader.DEFAULT_CHUNK_SIZE, show_default=True,
+              help="Triples per bulk insert")
+@click.option("--output", type=click.Path(dir_okay=False), required=True,
+              help="N-Triples snapshot to write; serve it with KPI_DATA_PATH=<snapshot>")
+def load_data(paths, fmt, chunk_size, output):
+    """Merge large N-Triples/N-Quads/Turtle files into the KPI data and write a snapshot"""
+    def progress(triples, seconds):
+        print(f"  {triples:,} triples ({triples / max(seconds, 1e-9):,.0f} triples/s)")
+    
+    for path in paths:
+        print(f"Loading {path}...")
+    try:
+        result = reasoner.bulk_load(list(paths), fmt=fmt, chunk_size=chunk_size, progress=progress)
+    except (loader.LoadError, ValueError) as e:
+        raise click.ClickException(f"No snapshot written: {e}")
+    
+    for loaded in result["files"]:
+        rate = loaded["triples"] / max(loaded["seconds"], 1e-9)
+        print(f"{loaded['path']}: {loaded['triples']:,} triples in {loaded['seconds']:.1f}s ({rate:,.0f} triples/s)")
+    print(f"Graph: {result['triples']:,} triples (+{result['new_triples']:,}), "
+          f"{result['kpis']:,} KPIs, {result['observations']:,} observations")
+    
+    started = time.perf_counter()
+    loader.write_snapshot(reasoner.graph, output)
+    print(f"Snapshot written to {output} in {time.perf_counter() - started:.1f}s")
+    print(f"Serve it with KPI_DATA_PATH={output}")
+
 @app.cli.command()
 def test_reasoning():
     """Test the reasoning engine"""
@@ -214,7 +256,9 @@ def health_check():
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
         'version': '1.0.0',
-        'realtime_active': update_active
+        'realtime_active': bool(realtime_clients),
+        'realtime_clients': len(realtime_clients),
+        'jobs': scheduler.stats()
     })
 # Configuration
 if __name__ == '__main__':
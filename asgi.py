@@ -0,0 +1,139 @@
+"""
+Hospital KPI Intelligence - asyncio serving mode
+
+    uvicorn asgi:application --host 0.0.0.0 --port 8080
+
+HTTP (pages and the ``api_bp`` endpoints) is served by the Flask app through
+a2wsgi on a bounded worker pool, so reasoning and analytics never run on the
+event loop. The real-time channel is a native asyncio Socket.IO server: idle
+websocket clients cost a coroutine rather than a thread, reasoner calls are
+offloaded to an executor, and the ``realtime_broadcast`` job of the shared
+scheduler computes each broadcast once per interval on a worker thread and
+fans it out to every subscribed client.
+
+- ``ASGI_HTTP_WORKERS``      threads serving Flask requests (default 16)
+- ``ASGI_EXECUTOR_WORKERS``  threads for real-time reasoner calls (default 4)
+- ``REALTIME_INTERVAL``      seconds between real-time broadcasts (default 10)
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import socketio
+from a2wsgi import WSGIMiddleware
+
+from app import (app, realtime_clients, realtime_snapshot, scheduler, start_scheduler,
+                 REALTIME_BROADCASTS, REALTIME_INTERVAL, REALTIME_JITTER, REALTIME_ROOM)
+from services.log import get_logger
+from services.metrics import metrics, stage
+
+logger = get_logger("asgi")
+
+HTTP_WORKERS = int(os.environ.get("ASGI_HTTP_WORKERS", 16))
+EXECUTOR_WORKERS = int(os.environ.get("ASGI_EXECUTOR_WORKERS", 4))
+
+executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="reasoner")
+
+sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+
+CONNECTED_CLIENTS = metrics.gauge(
+    "hospital_kpi_realtime_clients", "Connected real-time (Socket.IO) clients")
+_clients = 0
+
+
+async def offload(fn, *args, **kwargs):
+    """Run a blocking (CPU-bound) call on the reasoner executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+
+# The loop the server runs on. Subscribed clients go in app.realtime_clients,
+# which /health and the subscriber gauge read
+_loop = None
+
+
+async def _emit_snapshot(snapshot):
+    for event, payload in snapshot:
+        await sio.emit(event, payload, to=REALTIME_ROOM)
+
+
+def broadcast_realtime():
+    """Scheduled job: compute a snapshot on this worker thread, emit it on the loop"""
+    if not realtime_clients or _loop is None:
+        return
+    try:
+        with stage("realtime.compute"):
+            snapshot = realtime_snapshot()
+        with stage("realtime.socketio_emit"):
+            asyncio.run_coroutine_threadsafe(_emit_snapshot(snapshot), _loop).result()
+        REALTIME_BROADCASTS.inc(outcome="success")
+    except Exception as e:
+        REALTIME_BROADCASTS.inc(outcome="error")
+        asyncio.run_coroutine_threadsafe(
+            sio.emit('error', {'message': str(e)}, to=REALTIME_ROOM), _loop)
+        raise
+
+
+# Replaces the Flask-SocketIO broadcast registered by app.py
+scheduler.add("realtime_broadcast", broadcast_realtime, REALTIME_INTERVAL,
+              jitter=REALTIME_JITTER, replace=True)
+
+
+@sio.event
+async def connect(sid, environ):
+    global _clients, _loop
+    _loop = asyncio.get_running_loop()
+    start_scheduler()
+    _clients += 1
+    CONNECTED_CLIENTS.set(_clients)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Client connected", extra={"sid": sid})
+    await sio.emit('connected', {'data': 'Connected to Hospital KPI Intelligence System'}, to=sid)
+
+
+@sio.event
+async def disconnect(sid, *args):
+    global _clients
+    _clients -= 1
+    CONNECTED_CLIENTS.set(_clients)
+    realtime_clients.discard(sid)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Client disconnected", extra={"sid": sid})
+
+
+@sio.on('request_update')
+async def handle_update_request(sid, *args):
+    try:
+        for event, payload in await offload(realtime_snapshot):
+            await sio.emit(event, payload, to=sid)
+    except Exception as e:
+        await sio.emit('error', {'message': str(e)}, to=sid)
+
+
+@sio.on('start_realtime')
+async def start_realtime_updates(sid, *args):
+    await sio.enter_room(sid, REALTIME_ROOM)
+    realtime_clients.add(sid)
+    await sio.emit('realtime_started', {'message': 'Real-time updates started'}, to=sid)
+
+
+@sio.on('stop_realtime')
+async def stop_realtime_updates(sid, *args):
+    await sio.leave_room(sid, REALTIME_ROOM)
+    realtime_clients.discard(sid)
+    await sio.emit('realtime_stopped', {'message': 'Real-time updates stopped'}, to=sid)
+
+
+def _shutdown():
+    scheduler.stop()
+    executor.shutdown(wait=False)
+
+
+application = socketio.ASGIApp(
+    sio,
+    other_asgi_app=WSGIMiddleware(app, workers=HTTP_WORKERS),
+    on_shutdown=_shutdown,
+)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Hospital KPI Intelligence - Benchmark Suite
+
+Times the reasoner, analytics and API hot paths on the bundled ontology and
+on seeded synthetic KPI networks, and writes the results as JSON so runs can
+be compared between commits.
+
+    python benchmarks/run_benchmarks.py                       # default sizes
+    python benchmarks/run_benchmarks.py --sizes bundled,1000  # quick run
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<old>.json
+
+Operations whose projected time at the next size exceeds ``--budget``
+seconds (assuming quadratic growth from the previous size of at least
+``PROJECTION_MIN_KPIS`` KPIs) are recorded as skipped instead of being run.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+# Keep the reasoner's load logs out of the timing output
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+ONTOLOGY_PATH = "ontology/hospital_kpi.owl"
+BUNDLED_DATA_PATH = "ontology/kpi_data.ttl"
+DEFAULT_SIZES = "bundled,1000,10000,50000"
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+# Timings on tinier networks are dominated by fixed costs and don't extrapolate
+PROJECTION_MIN_KPIS = 100
+
+
+@contextlib.contextmanager
+def bind_api(client, size, kpi_reasoner, kpi_analytics):
+    """Route the test client's API requests to a benchmark tenant"""
+    from api.tenancy import TENANT_HEADER
+    from services.tenants import tenants
+
+    tenant = tenants.register(f"benchmark-{size}", kpi_reasoner.data_path,
+                              reasoner=kpi_reasoner, analytics=kpi_analytics)
+    environ_key = "HTTP_" + TENANT_HEADER.upper().replace("-", "_")
+    client.environ_base[environ_key] = tenant.id
+    try:
+        yield
+    finally:
+        client.environ_base.pop(environ_key, None)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_reasoner(size, seed: int, workdir: str):
+    """Build a reasoner over the bundled data or a synthetic network"""
+    from services.data_generator import data_generator
+    from services.reasoning_engine import HospitalKPIReasoner
+
+    data_path = BUNDLED_DATA_PATH
+    if size != "bundled":
+        data_path = os.path.join(workdir, f"kpis_{size}_{seed}.nt")
+        with open(data_path, "w") as f:
+            f.write(data_generator.generate_kpi_graph(int(size), seed=seed))
+
+    started = time.perf_counter()
+    kpi_reasoner = HospitalKPIReasoner(ONTOLOGY_PATH, data_path)
+    return kpi_reasoner, time.perf_counter() - started
+
+
+def measure(fn, repeat: int, setup=None):
+    """Run ``fn`` ``repeat`` times and summarise wall-clock seconds"""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "max_s": max(timings),
+        "runs": repeat,
+    }
+
+
+def build_operations(kpi_reasoner, kpi_analytics, client):
+    """Named benchmark operations, in execution order (writes last)"""
+    kpis = kpi_reasoner.get_all_kpis()
+    uris = [k["uri"] for k in kpis]
+    changes = {uri: kpi["observation"]["value"] * 1.1 for uri, kpi in zip(uris[:5], kpis[:5])}
+    update_targets = iter(uris * 1000)
+    # Values the simulation reaches from ``changes``, so goal-seek can always meet them
+    reachable = kpi_analytics._predict_outcomes(changes, kpis, kpi_analytics.limits["max_depth"])
+    goal_targets = {outcome["kpi_uri"]: outcome["projected_value"] for outcome in reachable[:3]}
+
+    def call(method, url, **kwargs):
+        response = client.open(url, method=method, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} returned {response.status_code}")
+        return response
+
+    def invalidate():
+        # Force API routes down the compute path instead of cached fragments
+        kpi_reasoner._mark_modified()
+
+    def update():
+        # Rotate through KPIs so successive writes never share an observation URI
+        kpi_uri = next(update_targets)
+        kpi_reasoner.update_kpi_value(kpi_uri, 42.0)
+
+    def goal_seek_round_trip():
+        # Solve, replay the answer through /api/simulate and check it meets the targets
+        result = call("POST", "/api/goal-seek", json={"targets": goal_targets}).get_json()["data"]
+        replay = {change["kpi_uri"]: change["new_value"] for change in result["changes"]}
+        outcomes = call("POST", "/api/simulate", json={"changes": replay}).get_json()["data"]
+        simulated = {outcome["kpi_uri"]: outcome["projected_value"]
+                     for outcome in outcomes["predicted_outcomes"]}
+        for goal in result["goals"]:
+            reached = simulated.get(goal["kpi_uri"], goal["original_value"])
+            if abs(reached - goal["target_value"]) > 1e-6 * max(abs(goal["target_value"]), 1.0):
+                raise RuntimeError(f"goal-seek for {goal['kpi_uri']} simulates to {reached}, "
+                                   f"not {goal['target_value']}")
+
+    operations = [
+        ("get_all_kpis", kpi_reasoner.get_all_kpis, None),
+        ("get_kpi_relationships", kpi_reasoner.get_kpi_relationships, None),
+        ("generate_insights", kpi_reasoner.generate_insights, None),
+        ("calculate_correlations", lambda: kpi_analytics.calculate_correlations(kpis), None),
+        ("generate_causal_chains", lambda: kpi_analytics.generate_causal_chains(kpis), None),
+        ("simulate_scenario", lambda: kpi_analytics.simulate_scenario(changes, kpis), None),
+        ("GET /api/kpis", lambda: call("GET", "/api/kpis"), invalidate),
+        ("GET /api/graph", lambda: call("GET", "/api/graph"), invalidate),
+        ("GET /api/insights", lambda: call("GET", "/api/insights"), invalidate),
+        ("POST /api/reasoning", lambda: call("POST", "/api/reasoning", json={}), invalidate),
+        ("POST /api/simulate", lambda: call("POST", "/api/simulate", json={"changes": changes}), None),
+        ("goal_seek round trip", goal_seek_round_trip, None),
+        ("update_kpi_value", update, None),
+    ]
+    if not goal_targets:
+        operations = [op for op in operations if op[0] != "goal_seek round trip"]
+    return operations
+
+
+def run(sizes, repeat: int, seed: int, budget: float):
+    from app import app
+    from services.analytics import KPIAnalytics
+    client = app.test_client()
+
+    results = {}
+    previous = {}  # operation -> (numeric size, median seconds)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            kpi_reasoner, load_s = load_reasoner(size, seed, workdir)
+            kpi_analytics = KPIAnalytics(kpi_reasoner)
+            n_kpis = len(kpi_reasoner.index)
+            print(f"\n📏 size={size} ({n_kpis} KPIs with observations, "
+                  f"{len(kpi_reasoner.graph)} triples, load {load_s:.2f}s)")
+
+            size_results = {"kpis": n_kpis, "triples": len(kpi_reasoner.graph),
+                            "load_s": load_s, "operations": {}}
+            numeric_size = max(n_kpis, 1)
+
+            with bind_api(client, size, kpi_reasoner, kpi_analytics):
+                for name, fn, setup in build_operations(kpi_reasoner, kpi_analytics, client):
+                    if name in previous and previous[name][0] >= PROJECTION_MIN_KPIS:
+                        last_size, last_s = previous[name]
+                        projected = last_s * (numeric_size / last_size) ** 2
+                        if projected > budget:
+                            size_results["operations"][name] = {
+                                "skipped": f"projected {projected:.1f}s exceeds budget {budget:.0f}s"
+                            }
+                            print(f"   ⏭️  {name:<26} skipped (projected {projected:.1f}s)")
+                            continue
+
+                    stats = measure(fn, repeat, setup)
+                    size_results["operations"][name] = stats
+                    previous[name] = (numeric_size, stats["median_s"])
+                    print(f"   ⏱️  {name:<26} {stats['median_s'] * 1000:10.2f} ms")
+
+            results[str(size)] = size_results
+
+    return results
+
+
+def compare(current, baseline, threshold: float) -> bool:
+    """Print per-operation ratios; returns False if anything regressed"""
+    ok = True
+    print(f"\n📊 Comparison with {baseline['meta'].get('git_commit', '?')}")
+    for size, size_results in current["results"].items():
+        old_ops = baseline["results"].get(size, {}).get("operations", {})
+        for name, stats in size_results["operations"].items():
+            old = old_ops.get(name)
+            if not old or "median_s" not in old or "median_s" not in stats:
+                continue
+            ratio = stats["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+            flag = "❌" if ratio > threshold else "✅"
+            if ratio > threshold:
+                ok = False
+            print(f"   {flag} size={size:<8} {name:<26} {old['median_s'] * 1000:10.2f} → "
+                  f"{stats['median_s'] * 1000:10.2f} ms  (x{ratio:.2f})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated KPI counts or 'bundled' (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per operation")
+    parser.add_argument("--seed", type=int, default=42, help="synthetic data seed")
+    parser.add_argument("--budget", type=float, default=60.0,
+                        help="skip operations projected to take longer (seconds)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--fail-threshold", type=float, default=1.25,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    report = {
+        "meta": {
+            "git_commit": git_commit(),
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "budget_s": args.budget,
+        },
+        "results": run(sizes, args.repeat, args.seed, args.budget),
+    }
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['meta']['git_commit']}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.fail_threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
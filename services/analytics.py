@@ -1,162 +1,179 @@
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Any, Tuple
+from typing import Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import json
-from services.reasoning_engine import reasoner
+from services.reasoning_engine import reasoner as default_reasoner
+from services.metrics import timed
+from services.budget import WorkBudget, default_limits
+from services.goal_seek import least_change
+from services.sensitivity import RELATIONSHIP_FACTORS, DEFAULT_FACTOR
+from services.log import get_logger
+
+logger = get_logger("analytics")
 
 class KPIAnalytics:
-    def __init__(self):
+    def __init__(self, reasoner=None, limits: Optional[Dict[str, Any]] = None):
+        # Defaults to the global reasoner; benchmarks pass their own instance
+        self.reasoner = reasoner if reasoner is not None else default_reasoner
+        # Work limits applied to every call that isn't given its own budget
+        self.limits = limits if limits is not None else default_limits()
         self.correlation_matrix = {}
         self.causal_chains = {}
         self.historical_data = {}
+    
+    def new_budget(self, **overrides) -> WorkBudget:
+        """Budget with this instance's limits; the deadline starts now"""
+        return WorkBudget(**{**self.limits, **overrides})
         
+    def _kpi_table(self, kpi_data: List[Dict[str, Any]]) -> Dict[int, Dict[str, Any]]:
+        """KPI id -> record for ``kpi_data``"""
+        kpi_id = self.reasoner.ids.id
+        return {kpi_id(kpi["uri"]): kpi for kpi in kpi_data}
+    
+    @timed("analytics.calculate_correlations")
     def calculate_correlations(self, kpi_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
         """Calculate correlation coefficients between KPIs based on their relationships"""
+        # Keyed by KPI id while building; ``correlation_matrix`` keeps that form
         correlations = {}
         
         # Get KPI relationships from ontology
-        relationships = reasoner.get_kpi_relationships()
+        causal = self.reasoner.causal_graph()
         
         # Group KPIs by domain for domain-specific correlations
         domain_groups = {}
-        for kpi in kpi_data:
+        for kpi_id, kpi in self._kpi_table(kpi_data).items():
             domain = kpi["domain"]
             if domain not in domain_groups:
                 domain_groups[domain] = []
-            domain_groups[domain].append(kpi)
+            domain_groups[domain].append(kpi_id)
         
         # Calculate correlations based on relationships
-        for rel in relationships:
-            source_kpi = rel["source"]
-            target_kpi = rel["target"]
-            relationship_type = rel["relationship"]
-            
-            # Assign correlation strength based on relationship type
-            if relationship_type == "influences":
-                correlation_strength = 0.7  # Strong positive correlation
-            elif relationship_type == "dependsOn":
-                correlation_strength = 0.8  # Very strong positive correlation
-            else:
-                correlation_strength = 0.5  # Moderate correlation
-            
-            # Store bidirectional correlation
-            if source_kpi not in correlations:
-                correlations[source_kpi] = {}
-            if target_kpi not in correlations:
-                correlations[target_kpi] = {}
+        for source_kpi, edges in causal.successors.items():
+            for target_kpi, relationship_type in edges:
+                # Assign correlation strength based on relationship type
+                if relationship_type == "influences":
+                    correlation_strength = 0.7  # Strong positive correlation
+                elif relationship_type == "dependsOn":
+                    correlation_strength = 0.8  # Very strong positive correlation
+                else:
+                    correlation_strength = 0.5  # Moderate correlation
                 
-            correlations[source_kpi][target_kpi] = correlation_strength
-            correlations[target_kpi][source_kpi] = correlation_strength
+                # Store bidirectional correlation
+                if source_kpi not in correlations:
+                    correlations[source_kpi] = {}
+                if target_kpi not in correlations:
+                    correlations[target_kpi] = {}
+                    
+                correlations[source_kpi][target_kpi] = correlation_strength
+                correlations[target_kpi][source_kpi] = correlation_strength
         
         # Add domain-based correlations
-        for domain, kpis in domain_groups.items():
-            if len(kpis) > 1:
-                for i, kpi1 in enumerate(kpis):
-                    for j, kpi2 in enumerate(kpis[i+1:], i+1):
-                        kpi1_uri = kpi1["uri"]
-                        kpi2_uri = kpi2["uri"]
-                        
-                        if kpi1_uri not in correlations:
-                            correlations[kpi1_uri] = {}
-                        if kpi2_uri not in correlations:
-                            correlations[kpi2_uri] = {}
-                        
+        for domain, kpi_ids in domain_groups.items():
+            if len(kpi_ids) > 1:
+                for i, kpi1 in enumerate(kpi_ids):
+                    row1 = correlations.setdefault(kpi1, {})
+                    for kpi2 in kpi_ids[i+1:]:
                         # Domain-based moderate correlation
-                        correlations[kpi1_uri][kpi2_uri] = 0.4
-                        correlations[kpi2_uri][kpi1_uri] = 0.4
+                        row1[kpi2] = 0.4
+                        correlations.setdefault(kpi2, {})[kpi1] = 0.4
         
         self.correlation_matrix = correlations
-        return correlations
+        uri = self.reasoner.ids.uri
+        return {uri(source): {uri(target): strength for target, strength in row.items()}
+                for source, row in correlations.items()}
     
-    def generate_causal_chains(self, kpi_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Generate causal chains showing how KPIs influence each other"""
-        chains = []
-        relationships = reasoner.get_kpi_relationships()
-        
-        # Build adjacency list for graph traversal
-        graph = {}
-        for rel in relationships:
-            source = rel["source"]
-            target = rel["target"]
-            
-            if source not in graph:
-                graph[source] = []
-            graph[source].append({
-                "target": target,
-                "type": rel["relationship"]
-            })
-        
-        # Find all possible chains starting from each KPI
-        for kpi in kpi_data:
-            start_kpi = kpi["uri"]
-            chains.extend(self._find_chains_from_source(graph, start_kpi, kpi_data))
+    @timed("analytics.generate_causal_chains")
+    def generate_causal_chains(self, kpi_data: List[Dict[str, Any]],
+                               budget: Optional[WorkBudget] = None) -> List[Dict[str, Any]]:
+        """
+        Generate causal chains showing how KPIs influence each other.
         
+        Enumeration stops at ``budget.max_chains`` chains or the deadline;
+        the budget records why, so callers can flag the result as partial.
+        """
+        chains = list(self.iter_causal_chains(kpi_data, budget))
         self.causal_chains = chains
         return chains
     
-    def _find_chains_from_source(self, graph: Dict[str, List[Dict]], 
-                                start: str, kpi_data: List[Dict[str, Any]], 
-                                max_depth: int = 3) -> List[Dict[str, Any]]:
-        """Find all causal chains starting from a given KPI"""
-        chains = []
+    def iter_causal_chains(self, kpi_data: List[Dict[str, Any]],
+                           budget: Optional[WorkBudget] = None) -> Iterator[Dict[str, Any]]:
+        """Causal chains one at a time, in the order ``generate_causal_chains`` lists them"""
+        budget = budget if budget is not None else self.new_budget()
+        graph = self.reasoner.causal_graph().successors
+        kpis = self._kpi_table(kpi_data)
+        emitted = 0
+        
+        # Find all possible chains starting from each KPI
+        for start_kpi in kpis:
+            if budget.partial:
+                break
+            for chain in self._find_chains_from_source(
+                    graph, start_kpi, kpis, budget.max_depth, budget, budget.max_chains - emitted):
+                emitted += 1
+                yield chain
+    
+    def _find_chains_from_source(self, graph: Dict[int, List[Tuple[int, str]]],
+                                start: int, kpis: Dict[int, Dict[str, Any]],
+                                max_depth: int = 3, budget: Optional[WorkBudget] = None,
+                                max_chains: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield the causal chains starting from a given KPI (paths walked as ids)"""
+        uris = self.reasoner.ids.uris
+        emitted = 0
         
-        def dfs(current: str, path: List[str], depth: int):
+        def dfs(current: int, path: Tuple[int, ...], relationships: Tuple[str, ...],
+                impact: float, depth: int):
+            nonlocal emitted
             if depth > max_depth or current not in graph:
                 return
             
-            for edge in graph[current]:
-                next_kpi = edge["target"]
-                new_path = path + [next_kpi]
+            for next_kpi, relationship in graph[current]:
+                if max_chains is not None and emitted >= max_chains:
+                    if budget is not None:
+                        budget.truncate("max_chains")
+                    return
+                if budget is not None and budget.expired():
+                    return
+                new_path = path + (next_kpi,)
+                new_relationships = relationships + (relationship,)
                 
-                # Calculate chain impact
-                chain_impact = self._calculate_chain_impact(new_path, kpi_data)
+                # Chain impact multiplies through each step
+                chain_impact = impact * self._step_impact(current, next_kpi, kpis)
                 
-                chains.append({
-                    "chain": new_path,
-                    "relationships": [edge["type"] for edge in path_edges(new_path)],
+                emitted += 1
+                yield {
+                    "chain": uris(new_path),
+                    "relationships": list(new_relationships),
                     "impact": chain_impact,
                     "length": len(new_path)
-                })
+                }
                 
-                dfs(next_kpi, new_path, depth + 1)
-        
-        def path_edges(path: List[str]) -> List[Dict]:
-            """Get edges for a path"""
-            edges = []
-            for i in range(len(path) - 1):
-                if path[i] in graph:
-                    for edge in graph[path[i]]:
-                        if edge["target"] == path[i + 1]:
-                            edges.append(edge)
-                            break
-            return edges
-        
-        dfs(start, [start], 1)
-        return chains
+                yield from dfs(next_kpi, new_path, new_relationships, chain_impact, depth + 1)
+        
+        yield from dfs(start, (start,), (), 1.0, 1)
+    
+    def _step_impact(self, source_id: int, target_id: int, kpis: Dict[int, Dict[str, Any]]) -> float:
+        """Impact factor of one causal link (1.0 if either KPI has no data)"""
+        source_kpi = kpis.get(source_id)
+        target_kpi = kpis.get(target_id)
+        if source_kpi is None or target_kpi is None:
+            return 1.0
+        
+        # Calculate performance ratio impact
+        source_performance = source_kpi["observation"]["value"] / source_kpi["target"]
+        target_performance = target_kpi["observation"]["value"] / target_kpi["target"]
+        return abs(target_performance - source_performance) * 0.5
     
     def _calculate_chain_impact(self, chain: List[str], kpi_data: List[Dict[str, Any]]) -> float:
         """Calculate the cumulative impact of a causal chain"""
+        kpis = self._kpi_table(kpi_data)
+        kpi_id = self.reasoner.ids.id
         impact = 1.0
-        
-        for i in range(len(chain) - 1):
-            source_uri = chain[i]
-            target_uri = chain[i + 1]
-            
-            # Find current values
-            source_kpi = next((kpi for kpi in kpi_data if kpi["uri"] == source_uri), None)
-            target_kpi = next((kpi for kpi in kpi_data if kpi["uri"] == target_uri), None)
-            
-            if source_kpi and target_kpi:
-                # Calculate performance ratio impact
-                source_performance = source_kpi["observation"]["value"] / source_kpi["target"]
-                target_performance = target_kpi["observation"]["value"] / target_kpi["target"]
-                
-                # Chain impact multiplies through the causal relationships
-                impact *= abs(target_performance - source_performance) * 0.5
-        
+        for source_uri, target_uri in zip(chain, chain[1:]):
+            impact *= self._step_impact(kpi_id(source_uri), kpi_id(target_uri), kpis)
         return impact
     
+    @timed("analytics.generate_predictive_insights")
     def generate_predictive_insights(self, kpi_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Generate predictive insights based on current trends and relationships"""
         insights = []
@@ -196,11 +213,8 @@ class KPIAnalytics:
         
         if critical_chains:
             worst_chain = max(critical_chains, key=lambda x: x["impact"])
-            chain_labels = []
-            for uri in worst_chain["chain"]:
-                kpi = next((k for k in kpi_data if k["uri"] == uri), None)
-                if kpi:
-                    chain_labels.append(kpi["label"])
+            labels = {kpi["uri"]: kpi["label"] for kpi in kpi_data}
+            chain_labels = [labels[uri] for uri in worst_chain["chain"] if uri in labels]
             
             insights.append({
                 "type": "causal_chain",
@@ -215,13 +229,23 @@ class KPIAnalytics:
     
     def _get_influenced_kpis(self, kpi_uri: str, kpi_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Get KPIs that are influenced by the given KPI"""
-        relationships = reasoner.get_kpi_relationships()
-        influenced_uris = [rel["target"] for rel in relationships if rel["source"] == kpi_uri]
+        influenced_uris = self.reasoner.inference.successors.get(kpi_uri, set())
         
         return [kpi for kpi in kpi_data if kpi["uri"] in influenced_uris]
     
-    def simulate_scenario(self, changes: Dict[str, float], kpi_data: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Simulate the impact of multiple KPI changes"""
+    @timed("analytics.simulate_scenario")
+    def simulate_scenario(self, changes: Dict[str, float], kpi_data: List[Dict[str, Any]],
+                          budget: Optional[WorkBudget] = None) -> Dict[str, Any]:
+        """
+        Simulate the impact of multiple KPI changes.
+        
+        Raises ``BudgetExceeded`` if more KPIs are changed than the budget
+        allows; direct impacts that run into the deadline return what they
+        have with ``partial`` set.
+        """
+        budget = budget if budget is not None else self.new_budget()
+        budget.check_changes(len(changes))
+        
         simulation_results = {
             "original_values": {},
             "new_values": {},
@@ -235,97 +259,244 @@ class KPIAnalytics:
         
         # Apply direct changes
         for kpi_uri, new_value in changes.items():
+            if budget.expired():
+                break
             simulation_results["new_values"][kpi_uri] = new_value
             
             # Calculate immediate impact
-            impact_analysis = reasoner.calculate_kpi_impact(kpi_uri, new_value)
+            impact_analysis = self.reasoner.calculate_kpi_impact(kpi_uri, new_value)
             simulation_results["impacts"][kpi_uri] = impact_analysis
         
         # Propagate changes through relationships
-        propagation_results = self._propagate_changes(changes, kpi_data)
-        simulation_results["predicted_outcomes"] = propagation_results
+        simulation_results["predicted_outcomes"] = self._predict_outcomes(
+            changes, kpi_data, budget.max_depth)
         
         # Calculate overall impact score
         total_impact = sum(abs(simulation_results["new_values"].get(uri, orig) - orig) 
                           for uri, orig in simulation_results["original_values"].items())
         
         simulation_results["overall_impact_score"] = total_impact / len(kpi_data)
+        simulation_results.update(budget.describe())
         
         return simulation_results
     
-    def _propagate_changes(self, changes: Dict[str, float], kpi_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Propagate changes through the KPI relationship network"""
-        outcomes = []
-        relationships = reasoner.get_kpi_relationships()
+    def _changed_deltas(self, changes: Dict[str, float],
+                        kpis: Dict[int, Dict[str, Any]]) -> Dict[int, float]:
+        """KPI id -> change from its observed value, for the observed KPIs in ``changes``"""
+        deltas = {}
+        for kpi_uri, new_value in changes.items():
+            kpi_id = self.reasoner.ids.get(kpi_uri)
+            if kpi_id in kpis:
+                deltas[kpi_id] = float(new_value) - kpis[kpi_id]["observation"]["value"]
+        return deltas
+    
+    @timed("analytics.predict_outcomes")
+    def _predict_outcomes(self, changes: Dict[str, float], kpi_data: List[Dict[str, Any]],
+                          max_depth: int) -> List[Dict[str, Any]]:
+        """
+        Total change of every KPI affected by ``changes``: one product with
+        the sensitivity matrix over ``max_depth + 1`` links.
         
-        # Create a dependency graph
-        dependency_graph = {}
-        for rel in relationships:
-            source = rel["source"]
-            target = rel["target"]
-            
-            if source not in dependency_graph:
-                dependency_graph[source] = []
-            dependency_graph[source].append({
-                "target": target,
-                "type": rel["relationship"]
-            })
+        ``influenced_by`` is the upstream KPI passing the largest change on
+        to the KPI and ``depth`` the fewest links from a changed KPI.
+        """
+        kpis = self._kpi_table(kpi_data)
+        deltas = self._changed_deltas(changes, kpis)
+        effects = self.reasoner.sensitivity(max_depth + 1).apply(deltas)
+        causal = self.reasoner.causal_graph()
+        # Changed KPIs pass on their own change
+        moved = {**effects, **deltas}
         
-        # Propagate changes
-        for changed_kpi, new_value in changes.items():
-            self._propagate_single_change(changed_kpi, new_value, dependency_graph, 
-                                        kpi_data, outcomes, set())
+        depths = {kpi_id: 0 for kpi_id in deltas}
+        frontier = list(deltas)
+        for depth in range(1, max_depth + 2):
+            reached = []
+            for kpi_id in frontier:
+                for target, _ in causal.successors.get(kpi_id, ()):
+                    if target not in depths:
+                        depths[target] = depth
+                        reached.append(target)
+            frontier = reached
         
+        outcomes = []
+        for kpi_id, change_amount in effects.items():
+            target_kpi_data = kpis.get(kpi_id)
+            # Changed KPIs keep the value they were given
+            if target_kpi_data is None or kpi_id in deltas:
+                continue
+            source, relationship_type = max(
+                ((source, relationship) for source, relationship in causal.predecessors.get(kpi_id, ())
+                 if source in moved),
+                key=lambda edge: abs(moved[edge[0]] * RELATIONSHIP_FACTORS.get(edge[1], DEFAULT_FACTOR)))
+            original_value = target_kpi_data["observation"]["value"]
+            outcomes.append({
+                "kpi_uri": target_kpi_data["uri"],
+                "kpi_label": target_kpi_data["label"],
+                "original_value": original_value,
+                "projected_value": original_value + change_amount,
+                "change_amount": change_amount,
+                "influenced_by": self.reasoner.ids.uri(source),
+                "relationship_type": relationship_type,
+                "depth": depths[kpi_id]
+            })
+        outcomes.sort(key=lambda outcome: (outcome["depth"], -abs(outcome["change_amount"])))
         return outcomes
+
+    def sensitivity_ranking(self, kpi_uri: str, kpi_data: List[Dict[str, Any]],
+                            limit: int = 10, max_depth: Optional[int] = None) -> Dict[str, Any]:
+        """
+        KPIs that move ``kpi_uri`` the most (``levers``) and the KPIs it
+        moves the most (``affects``), by total effect. ``elasticity`` is the
+        same effect in relative terms: % change of the affected KPI per 1%
+        change of the lever.
+        """
+        depth = (max_depth if max_depth is not None else self.limits["max_depth"]) + 1
+        matrix = self.reasoner.sensitivity(depth)
+        kpis = self._kpi_table(kpi_data)
+        kpi_id = self.reasoner.ids.id(kpi_uri)
+        # Labels for every KPI, observed or not; values only for observed ones
+        records = self.reasoner.index.kpis
+        value = lambda other: kpis[other]["observation"]["value"] if other in kpis else None
+        
+        def ranked(others, effects, lever_side):
+            order = np.argsort(-np.abs(effects), kind="stable")[:limit]
+            ranking = []
+            for position in order:
+                other, effect = int(others[position]), float(effects[position])
+                lever, affected = (other, kpi_id) if lever_side else (kpi_id, other)
+                lever_value, affected_value = value(lever), value(affected)
+                other_uri = self.reasoner.ids.uri(other)
+                record = records.get(other_uri)
+                ranking.append({
+                    "kpi_uri": other_uri,
+                    "kpi_label": record["label"] if record is not None else None,
+                    "effect": effect,
+                    "elasticity": (effect * lever_value / affected_value
+                                   if lever_value is not None and affected_value else None)
+                })
+            return ranking
+        
+        return {
+            "levers": ranked(*matrix.levers(kpi_id), True),
+            "affects": ranked(*matrix.effects(kpi_id), False),
+            "max_depth": depth
+        }
     
-    def _propagate_single_change(self, kpi_uri: str, new_value: float, 
-                                dependency_graph: Dict[str, List[Dict]], 
-                                kpi_data: List[Dict[str, Any]], 
-                                outcomes: List[Dict[str, Any]], 
-                                visited: set, depth: int = 0, max_depth: int = 3):
-        """Recursively propagate a single KPI change through the network"""
-        if depth > max_depth or kpi_uri in visited:
-            return
-        
-        visited.add(kpi_uri)
-        
-        if kpi_uri in dependency_graph:
-            for dependency in dependency_graph[kpi_uri]:
-                target_kpi = dependency["target"]
-                relationship_type = dependency["type"]
-                
-                # Calculate impact based on relationship type
-                if relationship_type == "influences":
-                    impact_factor = 0.3  # 30% influence
-                elif relationship_type == "dependsOn":
-                    impact_factor = 0.5  # 50% influence
-                else:
-                    impact_factor = 0.1  # 10% influence
-                
-                # Find original target value
-                target_kpi_data = next((kpi for kpi in kpi_data if kpi["uri"] == target_kpi), None)
-                if target_kpi_data:
-                    original_value = target_kpi_data["observation"]["value"]
-                    
-                    # Calculate propagated change
-                    change_amount = (new_value - original_value) * impact_factor
-                    projected_value = original_value + change_amount
-                    
-                    outcomes.append({
-                        "kpi_uri": target_kpi,
-                        "kpi_label": target_kpi_data["label"],
-                        "original_value": original_value,
-                        "projected_value": projected_value,
-                        "change_amount": change_amount,
-                        "influenced_by": kpi_uri,
-                        "relationship_type": relationship_type,
-                        "depth": depth + 1
-                    })
-                    
-                    # Continue propagation
-                    self._propagate_single_change(target_kpi, projected_value, 
-                                                dependency_graph, kpi_data, 
-                                                outcomes, visited, depth + 1, max_depth)
+    @timed("analytics.goal_seek")
+    def goal_seek(self, targets: Dict[str, float], kpi_data: List[Dict[str, Any]],
+                  levers: Optional[List[str]] = None,
+                  bounds: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+                  budget: Optional[WorkBudget] = None) -> Dict[str, Any]:
+        """
+        Smallest relative changes to upstream KPIs that bring the ``targets``
+        KPIs to the given values under the propagation model of
+        ``simulate_scenario``.
+        
+        ``levers`` limits which KPIs may change (default: every observed KPI
+        upstream of a target, other than the targets). ``bounds`` maps a
+        lever to its allowed (min, max) value; values never go below 0.
+        The projected goal values come from simulating the recommended
+        changes, so they are what ``/api/simulate`` reports for them.
+        Raises ``ValueError`` for unknown or unobserved KPIs, or a KPI that
+        is both a target and a lever, and ``BudgetExceeded`` for more
+        targets than changes allowed.
+        """
+        budget = budget if budget is not None else self.new_budget()
+        budget.check_changes(len(targets))
+        bounds = bounds or {}
+        kpis = self._kpi_table(kpi_data)
+        kpi_id = self.reasoner.ids.get
+        
+        goal_ids = []
+        for uri in targets:
+            goal_id = kpi_id(uri)
+            if goal_id not in kpis:
+                raise ValueError(f"KPI {uri} not found or has no observation")
+            goal_ids.append(goal_id)
+        
+        sensitivities = self.reasoner.sensitivity(budget.max_depth + 1).columns(goal_ids)
+        if levers is None:
+            goal_set = set(goal_ids)
+            lever_ids = [lever for lever in np.flatnonzero(sensitivities.any(axis=1)).tolist()
+                         if lever in kpis and lever not in goal_set]
+        else:
+            lever_ids = []
+            for uri in levers:
+                lever = kpi_id(uri)
+                if lever not in kpis:
+                    raise ValueError(f"KPI {uri} not found or has no observation")
+                if lever in goal_ids:
+                    raise ValueError(f"KPI {uri} cannot be both a target and a lever")
+                lever_ids.append(lever)
+        
+        current = np.array([kpis[lever]["observation"]["value"] for lever in lever_ids])
+        scale = np.array([abs(kpis[lever]["observation"]["value"]) or abs(kpis[lever]["target"]) or 1.0
+                          for lever in lever_ids])
+        lower = np.empty(len(lever_ids))
+        upper = np.empty(len(lever_ids))
+        for i, lever in enumerate(lever_ids):
+            low, high = bounds.get(self.reasoner.ids.uri(lever), (None, None))
+            low = max(low if low is not None else 0.0, 0.0)
+            lower[i] = min(low - current[i], 0.0)
+            upper[i] = max((high if high is not None else np.inf) - current[i], lower[i])
+        
+        goal_values = np.array([kpis[goal]["observation"]["value"] for goal in goal_ids])
+        goal_targets = np.array([float(value) for value in targets.values()])
+        solution = least_change(sensitivities[lever_ids].T, goal_targets - goal_values,
+                                scale, lower, upper)
+        delta, residual = solution["delta"], solution["residual"]
+        
+        changes = []
+        for lever, value, change, lever_scale in zip(lever_ids, current, delta, scale):
+            if abs(change) <= 1e-9 * lever_scale:
+                continue
+            kpi = kpis[lever]
+            changes.append({
+                "kpi_uri": kpi["uri"],
+                "kpi_label": kpi["label"],
+                "original_value": float(value),
+                "new_value": float(value + change),
+                "change_amount": float(change),
+                "change_percent": round(float(change / lever_scale * 100), 2)
+            })
+        changes.sort(key=lambda change: -abs(change["change_percent"]))
+        
+        # Round trip: the recommendation must reach what the solver expects
+        # when run through the simulation itself
+        simulated = {outcome["kpi_uri"]: outcome["projected_value"]
+                     for outcome in self._predict_outcomes(
+                         {change["kpi_uri"]: change["new_value"] for change in changes},
+                         kpi_data, budget.max_depth)}
+        projected = np.array([simulated.get(kpis[goal]["uri"], value)
+                              for goal, value in zip(goal_ids, goal_values)])
+        tolerance = 1e-6 * np.maximum(np.abs(goal_targets), 1.0)
+        if not budget.partial and np.any(np.abs(goal_targets - residual - projected) > tolerance):
+            logger.warning("Goal-seek solution does not reproduce in simulation",
+                           extra={"targets": list(targets)})
+        residual = goal_targets - projected
+        
+        goals = []
+        for goal, value, target, reached, missed in zip(goal_ids, goal_values, goal_targets,
+                                                        projected, residual):
+            kpi = kpis[goal]
+            goals.append({
+                "kpi_uri": kpi["uri"],
+                "kpi_label": kpi["label"],
+                "original_value": float(value),
+                "target_value": float(target),
+                "projected_value": float(reached),
+                "residual": float(missed)
+            })
+        
+        result = {
+            "goals": goals,
+            "changes": changes,
+            "feasible": bool(np.all(np.abs(residual) <= tolerance)),
+            "lever_count": len(lever_ids),
+            "max_depth": budget.max_depth + 1
+        }
+        result.update(budget.describe())
+        return result
 
 # Initialize analytics instance
 analytics = KPIAnalytics()
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+Work budgets for the analytics engine.
+
+A ``WorkBudget`` bounds one unit of analytics work (a simulation, a causal
+chain enumeration): how many KPIs may be changed, how many chains may be
+produced, how deep propagation goes and a wall-clock deadline. Hard limits
+on the input (``max_changes``) raise ``BudgetExceeded``; limits reached
+while working stop the traversal early and are recorded in ``truncated`` so
+callers can return a partial result.
+
+Defaults come from the environment:
+
+- ``KPI_MAX_CHANGES``       KPIs a single simulation may change (default 100)
+- ``KPI_MAX_CHAINS``        causal chains enumerated per call (default 10000)
+- ``KPI_MAX_DEPTH``         propagation / chain depth (default 3)
+- ``KPI_DEADLINE_SECONDS``  wall-clock budget per call, 0 = none (default 5)
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_LIMITS = {
+    "max_changes": 100,
+    "max_chains": 10000,
+    "max_depth": 3,
+    "deadline": 5.0,
+}
+
+
+def default_limits() -> Dict[str, Any]:
+    """``DEFAULT_LIMITS`` overridden by the ``KPI_*`` environment variables"""
+    limits = dict(DEFAULT_LIMITS)
+    for key, env, cast in (("max_changes", "KPI_MAX_CHANGES", int),
+                           ("max_chains", "KPI_MAX_CHAINS", int),
+                           ("max_depth", "KPI_MAX_DEPTH", int),
+                           ("deadline", "KPI_DEADLINE_SECONDS", float)):
+        value = os.environ.get(env)
+        if value is not None:
+            limits[key] = cast(value)
+    return limits
+
+
+class BudgetExceeded(ValueError):
+    """The requested work is larger than the budget allows"""
+
+
+class WorkBudget:
+    """Limits for one analytics call; the deadline clock starts on creation"""
+
+    def __init__(self, max_changes: int = DEFAULT_LIMITS["max_changes"],
+                 max_chains: int = DEFAULT_LIMITS["max_chains"],
+                 max_depth: int = DEFAULT_LIMITS["max_depth"],
+                 deadline: Optional[float] = DEFAULT_LIMITS["deadline"]):
+        self.max_changes = max_changes
+        self.max_chains = max_chains
+        self.max_depth = max_depth
+        self.deadline = deadline
+        self._expires_at = time.monotonic() + deadline if deadline else None
+        self.truncated: List[str] = []
+
+    def check_changes(self, count: int):
+        if count > self.max_changes:
+            raise BudgetExceeded(
+                f"{count} KPI changes requested, at most {self.max_changes} allowed")
+
+    def truncate(self, reason: str):
+        """Record that work stopped early (each reason once)"""
+        if reason not in self.truncated:
+            self.truncated.append(reason)
+
+    def expired(self) -> bool:
+        """Whether the deadline has passed (recorded as a truncation)"""
+        if self._expires_at is not None and time.monotonic() >= self._expires_at:
+            self.truncate("deadline")
+            return True
+        return False
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.truncated)
+
+    def describe(self) -> Dict[str, Any]:
+        return {"partial": self.partial, "truncated": list(self.truncated)}
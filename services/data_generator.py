@@ -381,6 +381,81 @@ class KPIDataGenerator:
         ]
         
         return milestones
+    
+    def generate_kpi_graph(self, num_kpis: int, seed: int = 42,
+                           relationships_per_kpi: int = 2) -> str:
+        """
+        Generate a synthetic KPI dataset as N-Triples (a subset of Turtle).
+        
+        Produces ``num_kpis`` KPIs spread over the template departments, each
+        with one observation, plus roughly ``relationships_per_kpi`` outgoing
+        influences/dependsOn edges towards nearby KPIs. The output only
+        depends on ``seed``, so benchmark datasets are reproducible.
+        """
+        rng = random.Random(seed)
+        ns = "http://hospital-kpi.org/ontology#"
+        rdf_type = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+        rdfs_label = "<http://www.w3.org/2000/01/rdf-schema#label>"
+        xsd = "http://www.w3.org/2001/XMLSchema#"
+        timestamp = "2025-11-08T10:00:00"
+        
+        def uri(name: str) -> str:
+            return f"<{ns}{name}>"
+        
+        def slug(name: str) -> str:
+            return "".join(part.capitalize() for part in name.split())
+        
+        lines = []
+        
+        def triple(s: str, p: str, o: str):
+            lines.append(f"{s} {p} {o} .")
+        
+        for name, kind in ([(d, "Department") for d in self.departments] +
+                           [(d, "PerformanceDomain") for d in self.performance_domains] +
+                           [(g, "StrategicGoal") for g in self.strategic_goals]):
+            triple(uri(slug(name)), rdf_type, uri(kind))
+            triple(uri(slug(name)), rdfs_label, json.dumps(name))
+        
+        for i in range(num_kpis):
+            dept_name = self.departments[i % len(self.departments)]
+            template = rng.choice(self.kpi_templates[dept_name])
+            kpi = uri(f"KPI{i}")
+            obs = uri(f"KPI{i}_obs0")
+            
+            target = template["target"]
+            variance = (template["max"] - template["min"]) * 0.2
+            value = round(max(template["min"], min(template["max"], rng.gauss(target, variance))), 2)
+            ratio = (value / target) * 100
+            if ratio >= 95:
+                status = "excellent"
+            elif ratio >= 80:
+                status = "good"
+            elif ratio >= 60:
+                status = "warning"
+            else:
+                status = "critical"
+            
+            triple(uri(slug(dept_name)), uri("hasKPI"), kpi)
+            triple(kpi, rdf_type, uri("KPI"))
+            triple(kpi, rdfs_label, json.dumps(f"{template['name']} #{i}"))
+            triple(kpi, uri("belongsToDomain"), uri(slug(rng.choice(self.performance_domains))))
+            triple(kpi, uri("contributesToGoal"), uri(slug(rng.choice(self.strategic_goals))))
+            triple(kpi, uri("targetValue"), f'"{target}"^^<{xsd}float>')
+            triple(kpi, uri("unit"), json.dumps(template["unit"]))
+            triple(kpi, uri("hasObservation"), obs)
+            triple(obs, rdf_type, uri("PerformanceObservation"))
+            triple(obs, uri("hasValue"), f'"{value}"^^<{xsd}float>')
+            triple(obs, uri("status"), json.dumps(status))
+            triple(obs, uri("timestamp"), f'"{timestamp}"^^<{xsd}dateTime>')
+            
+            # Edges only point forward to nearby KPIs, keeping the network acyclic
+            for _ in range(relationships_per_kpi):
+                j = i + rng.randint(1, 50)
+                if j < num_kpis:
+                    relationship = "influences" if rng.random() < 0.7 else "dependsOn"
+                    triple(kpi, uri(relationship), uri(f"KPI{j}"))
+        
+        return "\n".join(lines) + "\n"
 
 # Initialize data generator
 data_generator = KPIDataGenerator()
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Least-change goal seeking over a linear KPI response model.
+
+With ``J[g, l]`` the sensitivity of goal KPI ``g`` to lever ``l`` (see
+``KPIAnalytics.goal_seek``), the changes ``d`` that bring the goals from
+their current values to their targets solve ``J d = gap``. Among all
+solutions the smallest relative one is taken: with ``d = scale * z`` this is
+the minimum-norm ``z``, so a 10% move counts the same on a KPI measured in
+minutes as on one measured in percent.
+
+Bounds are handled with a small active-set loop: levers whose solution
+leaves their range are clamped to the bound and the rest is re-solved for
+the remaining gap. When the targets cannot all be met the least-squares
+best fit is returned and the residual says by how much each goal misses.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+# Active-set rounds; every round fixes at least one lever, usually few are needed
+MAX_ROUNDS = 50
+
+
+def least_change(sensitivity: np.ndarray, gap: np.ndarray, scale: np.ndarray,
+                 lower: np.ndarray, upper: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Smallest relative lever changes ``delta`` with ``sensitivity @ delta ~= gap``.
+
+    ``sensitivity`` is (goals, levers); ``scale``, ``lower`` and ``upper``
+    are per lever, with the bounds on the change (not the value).
+    Returns ``delta`` and the per-goal ``residual`` (gap not closed).
+    """
+    goals, levers = sensitivity.shape
+    weighted = sensitivity * scale[None, :]
+    z_lower, z_upper = lower / scale, upper / scale
+    z = np.zeros(levers)
+    free = np.ones(levers, dtype=bool)
+
+    for _ in range(MAX_ROUNDS):
+        if not free.any():
+            break
+        remaining = gap - weighted[:, ~free] @ z[~free]
+        # Minimum-norm least-squares solution for the free levers
+        z[free] = np.linalg.lstsq(weighted[:, free], remaining, rcond=None)[0]
+        violated = free & ((z < z_lower) | (z > z_upper))
+        if not violated.any():
+            break
+        z[violated] = np.clip(z[violated], z_lower[violated], z_upper[violated])
+        free &= ~violated
+
+    # Rounds ran out with levers still out of range: clamp them
+    z = np.clip(z, z_lower, z_upper)
+    delta = z * scale
+    return {"delta": delta, "residual": gap - sensitivity @ delta}
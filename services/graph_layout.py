@@ -0,0 +1,124 @@
+"""
+Server-side layout of the KPI network.
+
+Node positions for the ``influences`` / ``dependsOn`` graph are computed
+once with a NumPy Fruchterman-Reingold force simulation and cached by a hash
+of the topology (KPI URIs plus edges), so observation updates never trigger
+a re-layout and hospitals sharing an ontology share one layout. The layout
+is deterministic: nodes are placed in URI order from a fixed seed.
+
+Repulsion is exact up to ``EXACT_REPULSION_NODES`` nodes; above that each
+step pushes every node away from a random sample of the others (scaled up
+to the full count), which keeps a step O(n * sample) instead of O(n^2).
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Positions are scaled into a SCALE x SCALE box
+SCALE = 1000.0
+ITERATIONS = 60
+EXACT_REPULSION_NODES = 1000
+REPULSION_SAMPLE = 256
+# Pull toward the centre so isolated KPIs don't drift off
+GRAVITY = 0.5
+SEED = 7
+
+CACHE_SIZE = 8
+
+Position = Tuple[float, float]
+
+_layouts: "OrderedDict[str, Dict[str, Position]]" = OrderedDict()
+_layouts_lock = threading.Lock()
+
+
+def topology_key(uris: Iterable[str], edges: Iterable[Tuple[str, str]]) -> str:
+    """Stable hash of a node set and its (undirected) edges"""
+    digest = hashlib.sha1()
+    for uri in sorted(uris):
+        digest.update(uri.encode())
+        digest.update(b"\n")
+    digest.update(b"\0")
+    for source, target in sorted({tuple(sorted(edge)) for edge in edges}):
+        digest.update(f"{source} {target}\n".encode())
+    return digest.hexdigest()
+
+
+def force_layout(n: int, edges: np.ndarray, iterations: int = ITERATIONS,
+                 seed: int = SEED) -> np.ndarray:
+    """
+    Fruchterman-Reingold positions for ``n`` nodes in the unit square.
+
+    ``edges`` is an (m, 2) integer array of node indexes.
+    """
+    rng = np.random.default_rng(seed)
+    # float32 halves the memory traffic of the n x sample distance matrix
+    pos = rng.random((n, 2), dtype=np.float32)
+    if n < 2:
+        return pos
+    # Ideal edge length for unit area
+    k = np.float32(np.sqrt(1.0 / n))
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    source, target = (edges[:, 0], edges[:, 1]) if len(edges) else (None, None)
+    sampled = n > EXACT_REPULSION_NODES
+
+    for _ in range(iterations):
+        # Repulsion between all pairs (or against a sample):
+        # sum_j (p_i - p_j) w_ij = p_i * sum_j w_ij - (W @ P)_i
+        others = pos[rng.choice(n, REPULSION_SAMPLE, replace=False)] if sampled else pos
+        dist2 = ((pos * pos).sum(axis=1)[:, None] + (others * others).sum(axis=1)[None, :]
+                 - 2.0 * (pos @ others.T))
+        weights = (k * k) / np.maximum(dist2, 1e-6)
+        disp = pos * weights.sum(axis=1)[:, None] - weights @ others
+        if sampled:
+            disp *= n / REPULSION_SAMPLE
+
+        # Attraction along edges
+        if source is not None:
+            delta = pos[source] - pos[target]
+            dist = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+            force = delta * (dist / k)[:, None]
+            np.add.at(disp, source, -force)
+            np.add.at(disp, target, force)
+
+        disp -= GRAVITY * k * (pos - pos.mean(axis=0))
+
+        length = np.maximum(np.sqrt(np.einsum("ij,ij->i", disp, disp)), 1e-9)
+        pos += disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+
+    return pos
+
+
+def _scaled(pos: np.ndarray) -> np.ndarray:
+    low = pos.min(axis=0)
+    span = np.maximum(pos.max(axis=0) - low, 1e-9)
+    return np.round((pos - low).astype(np.float64) / span.max() * SCALE, 1)
+
+
+def compute_layout(uris: List[str], edges: List[Tuple[str, str]]) -> Dict[str, Position]:
+    """``uri -> (x, y)`` for the given network, from the cache when the topology is known"""
+    key = topology_key(uris, edges)
+    with _layouts_lock:
+        layout = _layouts.get(key)
+        if layout is not None:
+            _layouts.move_to_end(key)
+            return layout
+
+    nodes = sorted(set(uris))
+    index = {uri: i for i, uri in enumerate(nodes)}
+    pairs = sorted({tuple(sorted((index[s], index[t]))) for s, t in edges
+                    if s in index and t in index and s != t})
+    pos = _scaled(force_layout(len(nodes), np.array(pairs, dtype=np.int64).reshape(-1, 2)))
+    layout = {uri: (float(x), float(y)) for uri, (x, y) in zip(nodes, pos)}
+
+    with _layouts_lock:
+        _layouts[key] = layout
+        if len(_layouts) > CACHE_SIZE:
+            _layouts.popitem(last=False)
+    return layout
@@ -0,0 +1,143 @@
+"""
+Level-of-detail view of the KPI network.
+
+At coarse zoom the network is shown as one node per department, domain or
+goal (a KPI belongs to the cluster of its primary group, see
+``KPIIndex.DIMENSIONS``) with status counts, and one edge per pair of
+clusters carrying the number of causal links between their KPIs. Expanding
+a cluster returns its KPIs, the links among them and their links to other
+clusters, again aggregated per (KPI, cluster).
+
+A ``ClusterGraph`` is built in one pass over the index and the causal
+adjacency and is immutable; the reasoner keeps one per dimension and graph
+version.
+"""
+
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.kpi_ids import CausalGraph, KPIIds
+from services.kpi_index import DIMENSIONS, KPIIndex
+
+# Cluster of KPIs without a group in the dimension
+UNASSIGNED = "unassigned"
+
+
+def cluster_key(group_uri: Optional[str]) -> str:
+    """Cluster id used in the API: the group's local name"""
+    return group_uri.rsplit("#", 1)[-1] if group_uri else UNASSIGNED
+
+
+class ClusterGraph:
+    """KPIs grouped by one membership dimension, with aggregated causal links"""
+
+    def __init__(self, version: int, dimension: str, index: KPIIndex,
+                 causal: CausalGraph, ids: KPIIds):
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        self.version = version
+        self.dimension = dimension
+        self.ids = ids
+        self.causal = causal
+        uri_field, label_field = DIMENSIONS[dimension]
+
+        # cluster key -> summary; kpi id -> cluster key
+        self.clusters: Dict[str, Dict[str, Any]] = {}
+        self.cluster_of: Dict[int, str] = {}
+        self.members: Dict[str, List[str]] = defaultdict(list)
+
+        groups, records = index.grouping(dimension)
+        # Declared groups are listed even without KPIs
+        for group_uri, label in groups.items():
+            self._cluster(cluster_key(group_uri), group_uri, label)
+
+        # Like the full graph, only KPIs with an observation are shown
+        for record in records:
+            uri = record.uri
+            key = cluster_key(record[uri_field])
+            cluster = self._cluster(key, record[uri_field], record[label_field])
+            cluster["kpi_count"] += 1
+            cluster["status_counts"][record.observation.status] += 1
+            self.cluster_of[ids.id(uri)] = key
+            self.members[key].append(uri)
+
+        # (source cluster, target cluster) -> Counter of relationship types
+        self.links: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        for source, edges in causal.successors.items():
+            source_key = self.cluster_of.get(source)
+            if source_key is None:
+                continue
+            for target, relationship in edges:
+                target_key = self.cluster_of.get(target)
+                if target_key is None:
+                    continue
+                if target_key == source_key:
+                    self.clusters[source_key]["internal_links"] += 1
+                else:
+                    self.links[(source_key, target_key)][relationship] += 1
+
+    def _cluster(self, key: str, uri: Optional[str], label: Optional[str]) -> Dict[str, Any]:
+        cluster = self.clusters.get(key)
+        if cluster is None:
+            cluster = self.clusters[key] = {
+                "cluster": key,
+                "uri": uri,
+                "label": label or ("Unassigned" if key == UNASSIGNED else key),
+                "kpi_count": 0,
+                "status_counts": Counter(),
+                "internal_links": 0,
+            }
+        return cluster
+
+    # ----------------------------------------------------------
+    # Views
+    # ----------------------------------------------------------
+
+    def overview(self) -> Dict[str, Any]:
+        """One node per cluster and one edge per linked pair of clusters"""
+        nodes = [dict(cluster, status_counts=dict(cluster["status_counts"]))
+                 for cluster in sorted(self.clusters.values(), key=lambda c: c["label"])]
+        edges = [{
+            "source": source,
+            "target": target,
+            "count": sum(types.values()),
+            "types": dict(types)
+        } for (source, target), types in sorted(self.links.items())]
+        return {"dimension": self.dimension, "nodes": nodes, "edges": edges}
+
+    def expand(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        A cluster's KPI uris plus its links to other clusters, aggregated
+        per (member KPI, other cluster) in each direction.
+        """
+        if key not in self.clusters:
+            return None
+        ids = self.ids
+        outgoing: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        incoming: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+
+        for uri in self.members.get(key, ()):
+            kpi_id = ids.get(uri)
+            for target, relationship in self.causal.successors.get(kpi_id, ()):
+                other = self.cluster_of.get(target)
+                if other is not None and other != key:
+                    outgoing[(uri, other)][relationship] += 1
+            for source, relationship in self.causal.predecessors.get(kpi_id, ()):
+                other = self.cluster_of.get(source)
+                if other is not None and other != key:
+                    incoming[(other, uri)][relationship] += 1
+
+        def links(aggregated, kpi_side):
+            return [{"kpi": pair[kpi_side], "cluster": pair[1 - kpi_side],
+                     "count": sum(types.values()), "types": dict(types)}
+                    for pair, types in sorted(aggregated.items())]
+
+        return {
+            "dimension": self.dimension,
+            "cluster": key,
+            "members": list(self.members.get(key, ())),
+            # member -> other cluster, and other cluster -> member
+            "outgoing": links(outgoing, 0),
+            "incoming": links(incoming, 1),
+            "neighbours": sorted({other for _, other in outgoing} | {other for other, _ in incoming}),
+        }
@@ -0,0 +1,241 @@
+"""
+Forward-chaining materialization of the ontology's property axioms.
+
+At load time the materializer:
+
+- asserts ``rdf:type`` facts implied by ``rdfs:domain`` / ``rdfs:range``,
+- asserts the inverse of every triple whose predicate has an ``owl:inverseOf``,
+- computes the closure of the ``owl:TransitiveProperty`` KPI relations
+  (``influences``, ``dependsOn``) together with its inverse, recording the
+  minimum hop count for each reachable pair.
+
+Typing and inverse facts are added to the graph so SPARQL sees them. The
+transitive closure is kept in memory instead: the analytics treat asserted
+``influences`` edges as direct links, and materialized shortcut edges would
+change their results. Closure depth is bounded by ``max_depth`` (None for
+the full closure) so large networks stay linear in size.
+
+``add_triple`` keeps everything up to date incrementally, so reachability
+and multi-hop scope queries are dictionary lookups.
+"""
+
+import os
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Optional, Set, Tuple
+
+from rdflib import Graph, Namespace, OWL, RDF, RDFS, URIRef
+
+from services.log import get_logger
+
+logger = get_logger("inference")
+
+DEFAULT_MAX_DEPTH = 4  # matches the propagation horizon in KPIAnalytics
+
+
+def closure_max_depth() -> Optional[int]:
+    """Closure depth from ``KPI_CLOSURE_MAX_DEPTH`` (0 means unbounded)"""
+    value = os.environ.get("KPI_CLOSURE_MAX_DEPTH")
+    if value is None:
+        return DEFAULT_MAX_DEPTH
+    depth = int(value)
+    return depth if depth > 0 else None
+
+
+class OntologyMaterializer:
+    """Materialized typing, inverse facts and bounded transitive closure"""
+
+    def __init__(self, graph: Graph, ns: Namespace, max_depth: Optional[int] = None):
+        self.graph = graph
+        self.ns = ns
+        self.max_depth = max_depth
+        self._lock = threading.RLock()
+
+        self.domains: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        self.ranges: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        self.inverses: Dict[URIRef, Set[URIRef]] = defaultdict(set)
+        self.transitive: Set[URIRef] = set()
+
+        # Asserted edges of the transitive properties, both directions
+        self.successors: Dict[str, Set[str]] = defaultdict(set)
+        self.predecessors: Dict[str, Set[str]] = defaultdict(set)
+        # (source, target) -> predicate of the asserted edge
+        self.relations: Dict[Tuple[str, str], URIRef] = {}
+        # Closure: source -> {reachable: min hops} and its inverse
+        self.descendants: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.ancestors: Dict[str, Dict[str, int]] = defaultdict(dict)
+
+        self.inferred_triples = 0
+
+    @classmethod
+    def from_graph(cls, graph: Graph, ns: Namespace,
+                   max_depth: Optional[int] = DEFAULT_MAX_DEPTH,
+                   entail: bool = True) -> "OntologyMaterializer":
+        """Read the schema axioms from ``graph`` and materialize everything"""
+        materializer = cls(graph, ns, max_depth)
+        materializer.materialize(entail)
+        return materializer
+
+    # ----------------------------------------------------------
+    # Load-time materialization
+    # ----------------------------------------------------------
+
+    def _load_schema(self):
+        for prop, cls in self.graph.subject_objects(RDFS.domain):
+            self.domains[prop].add(cls)
+        for prop, cls in self.graph.subject_objects(RDFS.range):
+            # Datatype ranges (xsd:*) don't type literal objects
+            if (cls, RDF.type, OWL.Class) in self.graph:
+                self.ranges[prop].add(cls)
+        for prop, other in self.graph.subject_objects(OWL.inverseOf):
+            self.inverses[prop].add(other)
+            self.inverses[other].add(prop)
+        self.transitive = set(self.graph.subjects(RDF.type, OWL.TransitiveProperty))
+
+    def materialize(self, entail: bool = True):
+        """
+        Apply the typing/inverse rules and rebuild the closure from scratch.
+
+        ``entail=False`` skips the rules for graphs that already hold their
+        inferred facts (``loader`` snapshots) and only rebuilds the closure.
+        """
+        with self._lock:
+            self._load_schema()
+
+            self.inferred_triples = 0
+            if entail:
+                pending = []
+                for prop in set(self.domains) | set(self.ranges) | set(self.inverses):
+                    for s, o in self.graph.subject_objects(prop):
+                        pending.extend(self._entailed(s, prop, o))
+                before = len(self.graph)
+                for triple in pending:
+                    self.graph.add(triple)
+                self.inferred_triples = len(self.graph) - before
+
+            for prop in self.transitive:
+                for s, o in self.graph.subject_objects(prop):
+                    self.successors[str(s)].add(str(o))
+                    self.predecessors[str(o)].add(str(s))
+                    self.relations.setdefault((str(s), str(o)), prop)
+            self._compute_closure()
+
+            logger.info("Ontology materialized", extra={
+                "inferred_triples": self.inferred_triples,
+                "closure_pairs": self.closure_size(),
+                "max_depth": self.max_depth,
+            })
+
+    def _entailed(self, s, p, o):
+        """Triples directly entailed by one asserted triple"""
+        for cls in self.domains.get(p, ()):
+            yield (s, RDF.type, cls)
+        if isinstance(o, URIRef):
+            for cls in self.ranges.get(p, ()):
+                yield (o, RDF.type, cls)
+            for inverse in self.inverses.get(p, ()):
+                yield (o, inverse, s)
+
+    def _compute_closure(self):
+        """Bounded BFS from every source node"""
+        self.descendants.clear()
+        self.ancestors.clear()
+        for source in list(self.successors):
+            reached = self._bfs(source)
+            if reached:
+                self.descendants[source] = reached
+                for target, hops in reached.items():
+                    self.ancestors[target][source] = hops
+
+    def _bfs(self, source: str) -> Dict[str, int]:
+        reached: Dict[str, int] = {}
+        frontier = deque([(source, 0)])
+        while frontier:
+            node, hops = frontier.popleft()
+            if self.max_depth is not None and hops >= self.max_depth:
+                continue
+            for nxt in self.successors.get(node, ()):
+                if nxt == source or nxt in reached:
+                    continue
+                reached[nxt] = hops + 1
+                frontier.append((nxt, hops + 1))
+        return reached
+
+    # ----------------------------------------------------------
+    # Incremental maintenance
+    # ----------------------------------------------------------
+
+    def add_triple(self, s: URIRef, p: URIRef, o) -> int:
+        """
+        Assert a triple plus its consequences; returns the number of new
+        triples added to the graph (including the asserted one).
+
+        The closure follows every transitive triple among them, so asserting
+        an inverse (``influencedBy``) extends it like the forward edge.
+        """
+        with self._lock:
+            triples = [(s, p, o), *self._entailed(s, p, o)]
+            before = len(self.graph)
+            for triple in triples:
+                self.graph.add(triple)
+            added = len(self.graph) - before
+            self.inferred_triples += max(added - 1, 0)
+
+            for u, prop, v in triples:
+                if prop in self.transitive:
+                    self._add_edge(str(u), prop, str(v))
+            return added
+
+    def _add_edge(self, u: str, p: URIRef, v: str):
+        if v in self.successors[u]:
+            return
+        self.relations[(u, v)] = p
+        self.successors[u].add(v)
+        self.predecessors[v].add(u)
+
+        # Any new shortest path goes a ~> u -> v ~> d exactly once
+        sources = dict(self.ancestors.get(u, {}))
+        sources[u] = 0
+        targets = dict(self.descendants.get(v, {}))
+        targets[v] = 0
+        for a, da in sources.items():
+            for d, dd in targets.items():
+                hops = da + 1 + dd
+                if a == d or (self.max_depth is not None and hops > self.max_depth):
+                    continue
+                current = self.descendants[a].get(d)
+                if current is None or hops < current:
+                    self.descendants[a][d] = hops
+                    self.ancestors[d][a] = hops
+
+    # ----------------------------------------------------------
+    # Queries
+    # ----------------------------------------------------------
+
+    def reaches(self, source: str, target: str) -> bool:
+        """Whether ``target`` is causally downstream of ``source``"""
+        return target in self.descendants.get(source, {})
+
+    def distance(self, source: str, target: str) -> Optional[int]:
+        """Minimum number of causal hops from ``source`` to ``target``"""
+        return self.descendants.get(source, {}).get(target)
+
+    def downstream(self, kpi: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """KPIs reachable from ``kpi`` with their hop counts"""
+        reached = self.descendants.get(kpi, {})
+        if max_depth is None:
+            return dict(reached)
+        return {k: d for k, d in reached.items() if d <= max_depth}
+
+    def upstream(self, kpi: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """KPIs that can reach ``kpi`` with their hop counts"""
+        reached = self.ancestors.get(kpi, {})
+        if max_depth is None:
+            return dict(reached)
+        return {k: d for k, d in reached.items() if d <= max_depth}
+
+    def closure_size(self) -> int:
+        return sum(len(targets) for targets in self.descendants.values())
+
+    def edges(self) -> Set[Tuple[str, str]]:
+        return {(s, o) for s, targets in self.successors.items() for o in targets}
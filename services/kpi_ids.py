@@ -0,0 +1,84 @@
+"""
+Dense integer ids for KPIs.
+
+Graph algorithms (correlations, causal chains, change propagation, root
+cause search) key their dicts, visited sets and paths by small integers
+instead of full URIs. ``KPIIds`` assigns ids in first-seen order and never
+reuses one, so an id stays valid for the life of the reasoner; URIs are
+looked up again (``uri`` / ``uris``) only when a result leaves the engine.
+
+``CausalGraph`` is the id-keyed form of the asserted ``influences`` /
+``dependsOn`` edges for one graph version.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.records import intern
+
+# (neighbour id, relationship name)
+Edge = Tuple[int, str]
+
+
+class KPIIds:
+    """Bidirectional URI <-> dense integer id dictionary"""
+
+    def __init__(self, uris: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._uris: List[str] = []
+        self._lock = threading.Lock()
+        for uri in uris:
+            self.id(uri)
+
+    def id(self, uri: str) -> int:
+        """Id of ``uri``, assigning the next one if it has none yet"""
+        kid = self._ids.get(uri)
+        if kid is None:
+            with self._lock:
+                kid = self._ids.get(uri)
+                if kid is None:
+                    uri = intern(uri)
+                    kid = len(self._uris)
+                    self._uris.append(uri)
+                    self._ids[uri] = kid
+        return kid
+
+    def get(self, uri: str) -> Optional[int]:
+        """Id of ``uri`` or None, without assigning one"""
+        return self._ids.get(uri)
+
+    def uri(self, kid: int) -> str:
+        return self._uris[kid]
+
+    def uris(self, ids: Iterable[int]) -> List[str]:
+        uris = self._uris
+        return [uris[kid] for kid in ids]
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._ids
+
+    def __len__(self) -> int:
+        return len(self._uris)
+
+
+class CausalGraph:
+    """Id-keyed causal adjacency of one graph version"""
+
+    def __init__(self, version: int, relationships: List[Dict[str, str]], ids: KPIIds):
+        self.version = version
+        # source id -> [(target id, relationship), ...] in relationship order
+        self.successors: Dict[int, List[Edge]] = {}
+        # target id -> [(source id, relationship), ...], one entry per pair
+        self.predecessors: Dict[int, List[Edge]] = {}
+        self.edge_count = 0
+
+        first: Dict[Tuple[int, int], str] = {}
+        for rel in relationships:
+            source, target = ids.id(rel["source"]), ids.id(rel["target"])
+            relationship = intern(rel["relationship"])
+            first.setdefault((source, target), relationship)
+            self.successors.setdefault(source, []).append((target, relationship))
+            self.edge_count += 1
+
+        for (source, target), relationship in first.items():
+            self.predecessors.setdefault(target, []).append((source, relationship))
@@ -0,0 +1,352 @@
+"""
+In-memory KPI index maintained alongside the RDF graph.
+
+Holds a compact record per KPI (metadata plus latest observation, see
+``services.records``) and membership sets (department, domain, goal,
+status) so filtered and paginated KPI reads don't have to run SPARQL over
+the whole graph.
+
+Every KPI also keeps its observations in timestamp order, so ``as_of``
+can produce a ``KPISnapshot``: the same read interface with each KPI's
+last observation at or before a point in time. Snapshots share unchanged
+records, metadata and membership with the live index instead of copying
+the graph or replaying its history.
+"""
+
+import base64
+import bisect
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from rdflib import Graph, Namespace, RDF, RDFS
+
+from services.records import KPIRecord, Observation, intern
+
+
+def normalize_timestamp(moment: Union[str, datetime]) -> str:
+    """
+    ISO 8601 time in the stored observation convention (naive local time),
+    so string comparison with observation timestamps orders correctly.
+    Offsets (``Z``, ``+02:00``) are converted; raises ``ValueError``.
+    """
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
+
+def encode_cursor(uri: str) -> str:
+    return base64.urlsafe_b64encode(uri.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> str:
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        return base64.b64decode(cursor + padding, altchars=b"-_", validate=True).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+# Membership dimension -> (KPI meta fields for the primary group's uri and label)
+DIMENSIONS = {
+    "department": ("department_uri", "department"),
+    "domain": ("domain", "domain_name"),
+    "goal": ("goal", "goal_name"),
+}
+
+
+class KPIIndex:
+    """KPI metadata, latest observations and membership indexes"""
+
+    def __init__(self):
+        self.kpis: Dict[str, KPIRecord] = {}
+        self.latest: Dict[str, Observation] = {}
+        self.by_department: Dict[str, Set[str]] = defaultdict(set)
+        self.by_domain: Dict[str, Set[str]] = defaultdict(set)
+        self.by_goal: Dict[str, Set[str]] = defaultdict(set)
+        self.by_status: Dict[str, Set[str]] = defaultdict(set)
+        # Labels of departments, domains and goals
+        self.labels: Dict[str, str] = {}
+        # KPI uri -> every observation, and their timestamps, oldest first
+        self.history: Dict[str, List[Observation]] = {}
+        self._history_times: Dict[str, List[str]] = {}
+        self._sorted_uris: List[str] = []
+        self.observation_count = 0
+        self._lock = threading.RLock()
+
+    # ----------------------------------------------------------
+    # Building
+    # ----------------------------------------------------------
+
+    @classmethod
+    def from_graph(cls, graph: Graph, ns: Namespace) -> "KPIIndex":
+        index = cls()
+        index.rebuild(graph, ns)
+        return index
+
+    def rebuild(self, graph: Graph, ns: Namespace):
+        """Re-derive every entry from the graph"""
+        with self._lock:
+            self.kpis.clear()
+            self.latest.clear()
+            self.history.clear()
+            self._history_times.clear()
+            self.observation_count = 0
+            self.labels.clear()
+            for members in (self.by_department, self.by_domain, self.by_goal, self.by_status):
+                members.clear()
+
+            labels = {}
+
+            def label(node) -> str:
+                if node not in labels:
+                    labels[node] = intern(graph.value(node, RDFS.label) or "")
+                return labels[node]
+
+            departments = defaultdict(list)
+            for dept, kpi in graph.subject_objects(ns.hasKPI):
+                departments[kpi].append(dept)
+
+            # Every declared group is listed, even before it has KPIs
+            for dimension, cls in (("department", ns.Department), ("domain", ns.PerformanceDomain),
+                                   ("goal", ns.StrategicGoal)):
+                members = self.membership(dimension)
+                for group in graph.subjects(RDF.type, cls):
+                    members[intern(group)]
+                    self.labels[intern(group)] = label(group)
+
+            for kpi in graph.subjects(RDF.type, ns.KPI):
+                domains = sorted(graph.objects(kpi, ns.belongsToDomain))
+                goals = sorted(graph.objects(kpi, ns.contributesToGoal))
+                depts = sorted(departments.get(kpi, []))
+                target = graph.value(kpi, ns.targetValue)
+                unit = graph.value(kpi, ns.unit)
+                # Same required properties as the get_all_kpis query
+                if not domains or not goals or target is None or unit is None:
+                    continue
+
+                uri = intern(kpi)
+                self.kpis[uri] = KPIRecord(
+                    uri=uri,
+                    label=label(kpi),
+                    domain=intern(domains[0]),
+                    goal=intern(goals[0]),
+                    target=float(target),
+                    unit=intern(unit),
+                    department_uri=intern(depts[0]) if depts else None,
+                    department=label(depts[0]) if depts else None,
+                    domain_name=label(domains[0]),
+                    goal_name=label(goals[0]),
+                )
+                for dept in depts:
+                    self.by_department[intern(dept)].add(uri)
+                    self.labels[intern(dept)] = label(dept)
+                for domain in domains:
+                    self.by_domain[intern(domain)].add(uri)
+                    self.labels[intern(domain)] = label(domain)
+                for goal in goals:
+                    self.by_goal[intern(goal)].add(uri)
+                    self.labels[intern(goal)] = label(goal)
+
+            for kpi, obs in graph.subject_objects(ns.hasObservation):
+                uri = str(kpi)
+                if uri not in self.kpis:
+                    continue
+                value = graph.value(obs, ns.hasValue)
+                status = graph.value(obs, ns.status)
+                timestamp = graph.value(obs, ns.timestamp)
+                if value is None or status is None or timestamp is None:
+                    continue
+                observation = Observation(intern(obs), float(value), intern(status), str(timestamp))
+                self.observation_count += 1
+                self.history.setdefault(uri, []).append(observation)
+                self._set_latest(uri, observation)
+
+            for uri, observations in self.history.items():
+                observations.sort(key=lambda observation: observation.timestamp)
+                self._history_times[uri] = [observation.timestamp for observation in observations]
+            self._sorted_uris = sorted(self.kpis)
+
+    # ----------------------------------------------------------
+    # Maintenance
+    # ----------------------------------------------------------
+
+    def _set_latest(self, kpi_uri: str, observation: Observation) -> bool:
+        current = self.latest.get(kpi_uri)
+        if current is not None:
+            if current.timestamp > observation.timestamp:
+                return False
+            self.by_status[current.status].discard(kpi_uri)
+        self.latest[kpi_uri] = observation
+        self.kpis[kpi_uri] = self.kpis[kpi_uri].replace(observation=observation)
+        self.by_status[observation.status].add(kpi_uri)
+        return True
+
+    def add_member(self, dimension: str, group_uri: str, kpi_uri: str,
+                   label: Optional[str] = None) -> bool:
+        """Add a KPI to a department/domain/goal; returns False if already a member"""
+        with self._lock:
+            record = self.kpis.get(kpi_uri)
+            if record is None:
+                return False
+            members = self.membership(dimension)[group_uri]
+            if kpi_uri in members:
+                return False
+            members.add(kpi_uri)
+            if label is not None or group_uri not in self.labels:
+                self.labels[group_uri] = label or group_uri.rsplit("#", 1)[-1]
+
+            # A KPI's first group of each dimension is the one shown in its record
+            uri_field, label_field = DIMENSIONS[dimension]
+            if record[uri_field] is None:
+                self.kpis[kpi_uri] = record.replace(
+                    **{uri_field: intern(group_uri), label_field: self.labels[group_uri]})
+            return True
+
+    def add_observation(self, kpi_uri: str, observation: Observation) -> bool:
+        """Record a new observation; returns False if it is not the latest"""
+        if not isinstance(observation, Observation):
+            observation = Observation.from_mapping(observation)
+        with self._lock:
+            if kpi_uri not in self.kpis:
+                return False
+            self.observation_count += 1
+            times = self._history_times.setdefault(kpi_uri, [])
+            position = bisect.bisect_right(times, observation.timestamp)
+            times.insert(position, observation.timestamp)
+            self.history.setdefault(kpi_uri, []).insert(position, observation)
+            return self._set_latest(kpi_uri, observation)
+
+    # ----------------------------------------------------------
+    # Reads
+    # ----------------------------------------------------------
+
+    def get(self, kpi_uri: str) -> Optional[KPIRecord]:
+        """KPI record with its latest observation, or None if never observed"""
+        record = self.kpis.get(kpi_uri)
+        if record is None or record.observation is None:
+            return None
+        return record
+
+    def __len__(self) -> int:
+        return len(self.latest)
+
+    def as_of(self, timestamp: str) -> "KPISnapshot":
+        """Read-only view with each KPI's last observation at or before ``timestamp``"""
+        return KPISnapshot(self, timestamp)
+
+    def membership(self, dimension: str) -> Dict[str, Set[str]]:
+        """Group uri -> member KPI uris for ``department``, ``domain`` or ``goal``"""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        return getattr(self, f"by_{dimension}")
+
+    def grouping(self, dimension: str) -> Tuple[Dict[str, Optional[str]], List[KPIRecord]]:
+        """
+        Consistent copy of the declared ``dimension`` groups (uri -> label)
+        and the records of every observed KPI, in URI order
+        """
+        with self._lock:
+            groups = {group_uri: self.labels.get(group_uri)
+                      for group_uri in self.membership(dimension)}
+            records = [record for record in map(self.get, sorted(self.kpis)) if record is not None]
+        return groups, records
+
+    def members(self, dimension: str, group_uri: str) -> List[KPIRecord]:
+        """Records of a group's KPIs that have an observation, in URI order"""
+        with self._lock:
+            uris = sorted(self.membership(dimension).get(group_uri, ()))
+            return [record for record in map(self.get, uris) if record is not None]
+
+    def query(self, department: Optional[str] = None, domain: Optional[str] = None,
+              goal: Optional[str] = None, status: Optional[str] = None,
+              cursor: Optional[str] = None,
+              limit: Optional[int] = None) -> Tuple[List[KPIRecord], Optional[str]]:
+        """
+        Filtered, URI-ordered page of KPI records.
+
+        Filters are intersected starting from the smallest membership set.
+        ``cursor`` is the opaque value returned as the second element of a
+        previous call and resumes after the last KPI of that page.
+        """
+        with self._lock:
+            filters = []
+            for members, key in ((self.by_department, department), (self.by_domain, domain),
+                                 (self.by_goal, goal), (self.by_status, status)):
+                if key is not None:
+                    filters.append(members.get(key, set()))
+
+            if filters:
+                filters.sort(key=len)
+                candidates = sorted(
+                    uri for uri in filters[0] if all(uri in f for f in filters[1:]))
+            else:
+                candidates = self._sorted_uris
+
+            start = 0
+            if cursor:
+                start = bisect.bisect_right(candidates, decode_cursor(cursor))
+
+            page = []
+            next_cursor = None
+            for position in range(start, len(candidates)):
+                record = self.get(candidates[position])
+                if record is None:
+                    continue
+                if limit is not None and len(page) >= limit:
+                    next_cursor = encode_cursor(page[-1]["uri"])
+                    break
+                page.append(record)
+            return page, next_cursor
+
+
+def _copy_groups(groups: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+    return defaultdict(set, {group: set(members) for group, members in groups.items()})
+
+
+class KPISnapshot(KPIIndex):
+    """
+    ``KPIIndex`` as of a point in time (ISO 8601, see ``normalize_timestamp``).
+
+    Observations and statuses are historical. KPI metadata, labels and group
+    membership are copied from the live index when the snapshot is taken, so
+    later writes to the index don't show through.
+    """
+
+    def __init__(self, index: KPIIndex, as_of: str):
+        as_of = normalize_timestamp(as_of)
+        self.timestamp = as_of
+        self.kpis: Dict[str, KPIRecord] = {}
+        self.latest: Dict[str, Observation] = {}
+        self.by_status: Dict[str, Set[str]] = defaultdict(set)
+        self.history = {}
+        self._history_times = {}
+        self.observation_count = 0
+        self._lock = threading.RLock()
+
+        with index._lock:
+            self.by_department = _copy_groups(index.by_department)
+            self.by_domain = _copy_groups(index.by_domain)
+            self.by_goal = _copy_groups(index.by_goal)
+            self.labels = dict(index.labels)
+            self._sorted_uris = index._sorted_uris
+            for uri, record in index.kpis.items():
+                times = index._history_times.get(uri)
+                position = bisect.bisect_right(times, as_of) if times else 0
+                observation = index.history[uri][position - 1] if position else None
+                # Records unchanged since ``as_of`` are the live index's own
+                if observation is not record.observation:
+                    record = record.replace(observation=observation)
+                self.kpis[uri] = record
+                self.observation_count += position
+                if observation is not None:
+                    self.latest[uri] = observation
+                    self.by_status[observation.status].add(uri)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("KPI snapshots are read-only")
+
+    rebuild = add_member = add_observation = as_of = _read_only
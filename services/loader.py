@@ -0,0 +1,184 @@
+"""
+Streaming bulk loader for large RDF datasets.
+
+Triples are parsed incrementally and added to the target graph in batches
+of ``chunk_size`` with ``Graph.addN``, so memory stays bounded by the batch
+rather than the file:
+
+- N-Triples / N-Quads are read line by line (quads are loaded into the
+  target graph, dropping their graph name);
+- Turtle is split into chunks at statement boundaries (lines ending in
+  ``.`` outside long strings) and fed to one parser, so prefixes and blank
+  node labels carry across chunks.
+
+Blank node labels are shared across the whole file. ``.gz`` files are read
+through gzip. The loader only inserts triples; callers rebuild their
+derived indexes once afterwards (see ``HospitalKPIReasoner.bulk_load``).
+"""
+
+import gzip
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from rdflib import Graph
+from rdflib.exceptions import ParserError
+from rdflib.plugins.parsers.notation3 import RDFSink, SinkParser
+from rdflib.plugins.parsers.nquads import NQuadsParser
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+
+DEFAULT_CHUNK_SIZE = 50000
+# First line of a snapshot: the file already holds the ontology and the
+# inferred facts, so readers load it on its own and skip the inference rules
+SNAPSHOT_HEADER = "# hospital-kpi snapshot\n"
+# Characters of Turtle text fed to the parser at a time
+TURTLE_CHUNK_CHARS = 4 * 1024 * 1024
+
+FORMATS = {
+    ".nt": "nt",
+    ".ntriples": "nt",
+    ".nq": "nquads",
+    ".nquads": "nquads",
+    ".ttl": "turtle",
+    ".turtle": "turtle",
+}
+
+Progress = Callable[[int, float], None]
+
+
+class LoadError(Exception):
+    """An RDF file that could not be read or parsed"""
+
+
+def guess_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    for suffix, fmt in FORMATS.items():
+        if name.endswith(suffix):
+            return fmt
+    raise ValueError(f"Cannot tell the RDF format of {path}; pass it explicitly")
+
+
+class _BatchSink:
+    """Parser sink that adds triples to a graph ``chunk_size`` at a time"""
+
+    def __init__(self, graph: Graph, chunk_size: int, progress: Optional[Progress]):
+        self.graph = graph
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.count = 0
+        self.started = time.perf_counter()
+        self._batch: List = []
+        self.default_context = self
+
+    # W3CNTriplesParser sink
+    def triple(self, s, p, o):
+        self.add((s, p, o))
+
+    # NQuadsParser asks for the quad's graph; everything goes to the target
+    def get_context(self, identifier):
+        return self
+
+    # RDFSink (Turtle) target
+    def add(self, triple):
+        self._batch.append(triple)
+        if len(self._batch) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._batch:
+            return
+        context = self.graph
+        self.graph.addN((s, p, o, context) for s, p, o in self._batch)
+        self.count += len(self._batch)
+        self._batch = []
+        if self.progress is not None:
+            self.progress(self.count, time.perf_counter() - self.started)
+
+
+def _turtle_chunks(stream, chunk_chars: int) -> Iterator[str]:
+    """Turtle text in pieces that each end on a statement boundary"""
+    lines: List[str] = []
+    size = 0
+    in_long_string = False
+    for line in stream:
+        lines.append(line)
+        size += len(line)
+        # A long string toggles on each unbalanced triple quote
+        if (line.count('"""') + line.count("'''")) % 2:
+            in_long_string = not in_long_string
+        if size < chunk_chars or in_long_string:
+            continue
+        stripped = line.rstrip()
+        if stripped.endswith(".") and not stripped.lstrip().startswith("#"):
+            yield "".join(lines)
+            lines = []
+            size = 0
+    if lines:
+        yield "".join(lines)
+
+
+def _open(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def write_snapshot(graph: Graph, path: str):
+    """Serialize ``graph`` as N-Triples behind the ``SNAPSHOT_HEADER`` comment"""
+    with open(path, "wb") as stream:
+        stream.write(SNAPSHOT_HEADER.encode("utf-8"))
+        graph.serialize(destination=stream, format="nt", encoding="utf-8")
+
+
+def is_snapshot(path: str) -> bool:
+    """Whether ``path`` was written by ``write_snapshot``"""
+    try:
+        with _open(path) as stream:
+            return stream.readline() == SNAPSHOT_HEADER
+    except (OSError, EOFError, UnicodeDecodeError):
+        return False
+
+
+def load_file(graph: Graph, path: str, fmt: Optional[str] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              progress: Optional[Progress] = None) -> Dict[str, float]:
+    """
+    Stream the triples of ``path`` into ``graph``.
+
+    ``progress(triples, seconds)`` is called after every batch. Returns the
+    number of triples read (duplicates included) and the elapsed time.
+    Raises ``LoadError`` for unreadable or malformed files; triples of
+    earlier batches are already in ``graph`` by then.
+    """
+    fmt = fmt or guess_format(path)
+    try:
+        return _load(graph, path, fmt, chunk_size, progress)
+    except (ParserError, SyntaxError, UnicodeDecodeError, OSError, EOFError) as e:
+        raise LoadError(f"{path}: {e}") from e
+
+
+def _load(graph: Graph, path: str, fmt: str, chunk_size: int,
+          progress: Optional[Progress]) -> Dict[str, float]:
+    sink = _BatchSink(graph, chunk_size, progress)
+    bnodes: Dict = {}
+
+    with _open(path) as stream:
+        if fmt == "nt":
+            W3CNTriplesParser(sink).parse(stream, bnode_context=bnodes)
+        elif fmt == "nquads":
+            parser = NQuadsParser()
+            parser.sink = sink
+            # The line loop of the base parser, with NQuadsParser.parseline
+            W3CNTriplesParser.parse(parser, stream, bnode_context=bnodes)
+        elif fmt == "turtle":
+            parser = SinkParser(RDFSink(sink), baseURI=graph.absolutize(path), turtle=True)
+            parser.startDoc()
+            for chunk in _turtle_chunks(stream, TURTLE_CHUNK_CHARS):
+                parser.feed(chunk)
+            parser.endDoc()
+            for prefix, namespace in parser._bindings.items():
+                graph.bind(prefix, namespace)
+        else:
+            raise ValueError(f"Unsupported format: {fmt} (nt, nquads or turtle)")
+    sink.flush()
+
+    return {"triples": sink.count, "seconds": time.perf_counter() - sink.started}
@@ -0,0 +1,135 @@
+"""
+Structured, level-gated logging for the services and API.
+
+Records go through a ``QueueHandler`` so request threads only enqueue;
+a background ``QueueListener`` does the formatting and I/O. Messages use
+lazy ``%`` arguments and ``extra`` fields, so a disabled level costs one
+``isEnabledFor`` check and no string formatting.
+
+Configured from the environment on first use:
+
+- ``LOG_LEVEL``        DEBUG / INFO / WARNING / ... (default INFO)
+- ``LOG_FORMAT``       ``json`` for one JSON object per line, ``text`` otherwise
+- ``LOG_SAMPLE_RATE``  fraction (0-1] of DEBUG/INFO records kept (default 1)
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+ROOT_LOGGER = "hospital_kpi"
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_configured = False
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable line with ``key=value`` extra fields appended"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{k}={v}" for k, v in record.__dict__.items()
+                          if k not in _RESERVED and not k.startswith("_"))
+        return f"{line} {fields}" if fields else line
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records below WARNING; warnings and errors always pass"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records untouched so message formatting happens on the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      sample_rate: Optional[float] = None):
+    """(Re)configure the ``hospital_kpi`` logger tree"""
+    global _configured, _listener
+
+    level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+    fmt = fmt or os.environ.get("LOG_FORMAT", "text")
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("LOG_SAMPLE_RATE", "1"))
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+
+        stream = logging.StreamHandler()
+        stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(sample_rate))
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.handlers[:] = [queue_handler]
+        root.setLevel(level)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        _configured = True
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger under ``hospital_kpi``; configures logging on first use"""
+    if not _configured:
+        configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
@@ -4,12 +4,74 @@
 # ==============================================================
 
 import os
-import traceback
 import json
-from datetime import datetime
-from typing import Dict, List, Any
+import heapq
+import logging
+import threading
+from collections import OrderedDict
+from itertools import islice
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
 from rdflib import Graph, Namespace, URIRef, RDF, RDFS, Literal, XSD
-from rdflib.plugins.sparql import prepareQuery
+
+from services import loader
+from services.graph_layout import Position, compute_layout
+from services.graph_lod import ClusterGraph
+from services.kpi_ids import CausalGraph, KPIIds
+from services.kpi_index import KPIIndex, KPISnapshot, normalize_timestamp
+from services.records import KPIRecord, Observation
+from services.sensitivity import SensitivityMatrix
+from services.inference import OntologyMaterializer, closure_max_depth
+from services.rollups import GoalRollups, rollup_config
+from services.metrics import stage, timed
+from services.singleflight import coalesced
+from services.sparql import prepare_query
+from services.log import get_logger
+
+logger = get_logger("reasoner")
+
+# Point-in-time KPI snapshots kept per reasoner
+SNAPSHOT_CACHE_SIZE = 8
+
+HOSPITAL = Namespace("http://hospital-kpi.org/ontology#")
+
+# Parsed at import, so request paths only ever hit the prepared-query cache
+RELATIONSHIPS_QUERY = prepare_query("""
+    SELECT ?kpi1 ?kpi2 ?relationship
+    WHERE {
+        { ?kpi1 hospital:influences ?kpi2 . BIND("influences" as ?relationship) }
+        UNION
+        { ?kpi1 hospital:dependsOn ?kpi2 . BIND("dependsOn" as ?relationship) }
+    }
+""", initNs={"hospital": HOSPITAL})
+
+INFLUENCED_QUERY = prepare_query("""
+    SELECT ?influenced_kpi ?label ?current_value
+    WHERE {
+        ?kpi hospital:influences ?influenced_kpi .
+        ?influenced_kpi rdfs:label ?label ;
+                        hospital:hasObservation ?obs .
+        ?obs hospital:hasValue ?current_value .
+        FILTER(?kpi = ?kpi_uri)
+    }
+""", initNs={"hospital": HOSPITAL, "rdfs": RDFS})
+
+IMPACT_QUERY = prepare_query("""
+    SELECT ?label ?target ?unit ?current_value
+    WHERE {
+        ?kpi rdfs:label ?label ;
+             hospital:targetValue ?target ;
+             hospital:unit ?unit ;
+             hospital:hasObservation ?obs .
+        ?obs hospital:hasValue ?current_value .
+        FILTER(?kpi = ?kpi_uri)
+    }
+""", initNs={"hospital": HOSPITAL, "rdfs": RDFS})
+
+TARGET_QUERY = prepare_query("""
+    SELECT ?target
+    WHERE { ?kpi hospital:targetValue ?target . FILTER(?kpi = ?kpi_uri) }
+""", initNs={"hospital": HOSPITAL})
 
 
 class HospitalKPIReasoner:
@@ -19,153 +81,306 @@ class HospitalKPIReasoner:
     """
 
     def __init__(self, ontology_path: str, data_path: str):
-        print("\n🧠 Initializing Hospital KPI Reasoner global instance...")
-        print("\n🔍 === HOSPITAL KPI REASONER STARTUP DEBUG ===")
+        logger.info("Initializing Hospital KPI Reasoner")
 
         self.ontology_path = ontology_path
         self.data_path = data_path
 
+        # Graph mutation version, bumped on every write. HTTP validators
+        # (ETag / Last-Modified) and result caches are keyed on it.
+        self.version = 0
+        # Bumped only when KPI-to-KPI relationships change
+        self.topology_version = 0
+        self.last_modified = datetime.now(timezone.utc)
+
         ontology_full = os.path.join(os.getcwd(), ontology_path)
         data_full = os.path.join(os.getcwd(), data_path)
 
-        print(f"🧩 Working directory: {os.getcwd()}")
-        print(f"📂 Ontology path arg: {ontology_path}")
-        print(f"📂 Data path arg: {data_path}")
-        print(f"📍 Ontology full path: {ontology_full}")
-        print(f"📍 Data full path: {data_full}")
-        print(f"✅ Ontology file exists? {os.path.exists(ontology_full)}")
-        print(f"✅ Data file exists? {os.path.exists(data_full)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Reasoner input files", extra={
+                "cwd": os.getcwd(),
+                "ontology_path": ontology_full,
+                "ontology_exists": os.path.exists(ontology_full),
+                "data_path": data_full,
+                "data_exists": os.path.exists(data_full),
+            })
 
         try:
             self.graph = Graph()
             self.hospital = Namespace("http://hospital-kpi.org/ontology#")
 
-            # Load ontology
-            print("🧠 Parsing ontology file...")
-            self.graph.parse(ontology_full, format="xml")
-            print("✅ Ontology parsed successfully!")
-
-            # Load data
-            print("🧠 Parsing data file...")
-            self.graph.parse(data_full, format="turtle")
-            print("✅ Data parsed successfully!")
-
-            print(f"📊 Total triples loaded: {len(self.graph)}")
-            for s, p, o in list(self.graph)[:6]:
-                print(f"   • {s} {p} {o}")
-
-            print("🔍 === DEBUG COMPLETE ===\n")
-            print("✅ Hospital KPI Reasoner ready.\n")
-
-        except Exception as e:
-            print("❌ ERROR during ontology/data loading:")
-            traceback.print_exc()
-            raise e
+            # A ``flask load-data`` snapshot already holds the ontology and the
+            # inferred facts; parsing the ontology again would duplicate its
+            # blank nodes
+            snapshot = loader.is_snapshot(data_full)
+            if not snapshot:
+                self.graph.parse(ontology_full, format="xml")
+                logger.debug("Ontology parsed", extra={"path": ontology_full})
+
+            # Load data; N-Triples/N-Quads (e.g. snapshots) stream in
+            if data_path.endswith((".nt", ".nt.gz", ".nq", ".nq.gz")):
+                loader.load_file(self.graph, data_full)
+            else:
+                self.graph.parse(data_full, format="turtle")
+            logger.debug("Data parsed", extra={"path": data_full, "snapshot": snapshot})
+
+            # Materialize typing/inverse facts and the causal closure before indexing
+            self.inference = OntologyMaterializer.from_graph(
+                self.graph, self.hospital, max_depth=closure_max_depth(),
+                entail=not snapshot)
+            self.index = KPIIndex.from_graph(self.graph, self.hospital)
+            # Dense ids for the graph algorithms; later KPIs get theirs on first use
+            self.ids = KPIIds(sorted(self.index.kpis))
+            self._causal_graph: Optional[CausalGraph] = None
+            self._causal_lock = threading.Lock()
+            # dimension -> ClusterGraph of the version it was built for
+            self._clusters: Dict[str, ClusterGraph] = {}
+            self._clusters_lock = threading.Lock()
+            # max_depth -> SensitivityMatrix of the topology it was built for
+            self._sensitivity: Dict[int, SensitivityMatrix] = {}
+            self._sensitivity_lock = threading.Lock()
+            # (as_of, version) -> KPISnapshot, most recently used last
+            self._snapshots: "OrderedDict[Tuple[str, int], KPISnapshot]" = OrderedDict()
+            self._snapshots_lock = threading.Lock()
+            # ((topology version, KPI count), uri -> (x, y))
+            self._layout: Optional[Tuple[Tuple[int, int], Dict[str, Position]]] = None
+            self._layout_lock = threading.Lock()
+            self.rollups = GoalRollups.from_index(self.index, **rollup_config())
+
+            if logger.isEnabledFor(logging.DEBUG):
+                for s, p, o in islice(self.graph, 6):
+                    logger.debug("Sample triple: %s %s %s", s, p, o)
+
+            logger.info("Hospital KPI Reasoner ready",
+                        extra={"triples": len(self.graph), "kpis": len(self.index)})
+
+        except Exception:
+            logger.exception("Error during ontology/data loading")
+            raise
 
     # ----------------------------------------------------------
     # Core KPI Queries
     # ----------------------------------------------------------
 
-    def get_all_kpis(self) -> List[Dict[str, Any]]:
-        """Retrieve all KPIs with their metadata and latest observations"""
-        print("🔎 Querying all KPIs...")
-        query = prepareQuery("""
-            SELECT ?kpi ?label ?domain ?goal ?target ?unit ?obs ?value ?status ?timestamp
-            WHERE {
-                ?kpi a hospital:KPI ;
-                     rdfs:label ?label ;
-                     hospital:targetValue ?target ;
-                     hospital:unit ?unit ;
-                     hospital:belongsToDomain ?domain ;
-                     hospital:contributesToGoal ?goal ;
-                     hospital:hasObservation ?obs .
-                ?obs hospital:hasValue ?value ;
-                     hospital:status ?status ;
-                     hospital:timestamp ?timestamp .
-            }
-        """, initNs={"hospital": self.hospital, "rdfs": RDFS})
-
-        results = []
-        try:
-            for row in self.graph.query(query):
-                results.append({
-                    "uri": str(row.kpi),
-                    "label": str(row.label),
-                    "domain": str(row.domain),
-                    "goal": str(row.goal),
-                    "target": float(row.target),
-                    "unit": str(row.unit),
-                    "observation": {
-                        "uri": str(row.obs),
-                        "value": float(row.value),
-                        "status": str(row.status),
-                        "timestamp": str(row.timestamp)
-                    }
-                })
-            print(f"✅ Retrieved {len(results)} KPIs")
-        except Exception as e:
-            print("❌ SPARQL error in get_all_kpis:", e)
-        return results
-
+    def get_all_kpis(self, as_of: Optional[str] = None) -> List[KPIRecord]:
+        """Retrieve all KPIs with their metadata and latest observations (as of ``as_of``)"""
+        kpis, _ = self.snapshot(as_of).query()
+        return kpis
+
+    def snapshot(self, as_of: Optional[str] = None) -> KPIIndex:
+        """
+        KPI index as of an ISO 8601 timestamp (the live index for None).
+        Snapshots are kept per (timestamp, graph version), so a backfilled
+        observation yields a fresh one.
+        """
+        if as_of is None:
+            return self.index
+        as_of = normalize_timestamp(as_of)
+        key = (as_of, self.version)
+        with self._snapshots_lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+                return snapshot
+        with stage("reasoner.snapshot"):
+            snapshot = self.index.as_of(as_of)
+        with self._snapshots_lock:
+            self._snapshots[key] = snapshot
+            if len(self._snapshots) > SNAPSHOT_CACHE_SIZE:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    def iter_observations(self, kpi_uris: Optional[Iterable[str]] = None,
+                          start: Optional[str] = None,
+                          end: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Every observation of ``kpi_uris`` (default: all indexed KPIs), KPI by
+        KPI, optionally limited to ``start <= timestamp < end`` (ISO 8601).
+
+        Observations are read from the graph one at a time, so callers can
+        stream any time range without materializing it.
+        """
+        ns = self.hospital
+        graph = self.graph
+        if kpi_uris is None:
+            kpi_uris = sorted(self.index.kpis)
+        start = normalize_timestamp(start) if start is not None else None
+        end = normalize_timestamp(end) if end is not None else None
+
+        for kpi_uri in kpi_uris:
+            record = self.index.kpis.get(kpi_uri)
+            if record is None:
+                continue
+            for obs in graph.objects(URIRef(kpi_uri), ns.hasObservation):
+                # One scan of the observation's properties instead of a lookup each
+                properties = dict(graph.predicate_objects(obs))
+                timestamp = properties.get(ns.timestamp)
+                value = properties.get(ns.hasValue)
+                if timestamp is None or value is None:
+                    continue
+                timestamp = str(timestamp)
+                if (start is not None and timestamp < start) or (end is not None and timestamp >= end):
+                    continue
+                status = properties.get(ns.status)
+                yield {
+                    "kpi_uri": kpi_uri,
+                    "kpi_label": record.label,
+                    "department": record.department,
+                    "observation_uri": str(obs),
+                    "value": float(value),
+                    "status": str(status) if status is not None else None,
+                    "timestamp": timestamp
+                }
+
+    @coalesced("get_kpi_relationships")
     def get_kpi_relationships(self) -> List[Dict[str, Any]]:
         """Retrieve all KPI-to-KPI relationships"""
-        print("🔎 Querying KPI relationships...")
-        query = prepareQuery("""
-            SELECT ?kpi1 ?kpi2 ?relationship
-            WHERE {
-                { ?kpi1 hospital:influences ?kpi2 . BIND("influences" as ?relationship) }
-                UNION
-                { ?kpi1 hospital:dependsOn ?kpi2 . BIND("dependsOn" as ?relationship) }
-            }
-        """, initNs={"hospital": self.hospital})
-
         results = []
         try:
-            for row in self.graph.query(query):
-                results.append({
-                    "source": str(row.kpi1),
-                    "target": str(row.kpi2),
-                    "relationship": str(row.relationship)
-                })
-            print(f"✅ Found {len(results)} KPI relationships")
-        except Exception as e:
-            print("❌ SPARQL error in get_kpi_relationships:", e)
+            with stage("sparql.get_kpi_relationships"):
+                rows = list(self.graph.query(RELATIONSHIPS_QUERY))
+            with stage("postprocess.get_kpi_relationships"):
+                for row in rows:
+                    results.append({
+                        "source": str(row.kpi1),
+                        "target": str(row.kpi2),
+                        "relationship": str(row.relationship)
+                    })
+            logger.debug("Found %d KPI relationships", len(results))
+        except Exception:
+            logger.exception("SPARQL error in get_kpi_relationships")
         return results
 
+    def causal_graph(self) -> CausalGraph:
+        """Id-keyed causal adjacency, rebuilt when the relationships change"""
+        graph = self._causal_graph
+        if graph is None or graph.version != self.topology_version:
+            with self._causal_lock:
+                graph = self._causal_graph
+                if graph is None or graph.version != self.topology_version:
+                    version = self.topology_version
+                    graph = CausalGraph(version, self.get_kpi_relationships(), self.ids)
+                    self._causal_graph = graph
+        return graph
+
+    def sensitivity(self, max_depth: int) -> SensitivityMatrix:
+        """Total-effect matrix of the causal network, rebuilt when the topology changes"""
+        matrix = self._sensitivity.get(max_depth)
+        if matrix is None or matrix.version != self.topology_version:
+            causal = self.causal_graph()
+            with self._sensitivity_lock:
+                matrix = self._sensitivity.get(max_depth)
+                if matrix is None or matrix.version != causal.version:
+                    with stage("reasoner.sensitivity"):
+                        matrix = SensitivityMatrix(causal.version, causal, len(self.ids), max_depth)
+                    self._sensitivity[max_depth] = matrix
+        return matrix
+
+    def graph_clusters(self, dimension: str) -> ClusterGraph:
+        """KPI network clustered by department, domain or goal, built once per version"""
+        clusters = self._clusters.get(dimension)
+        if clusters is None or clusters.version != self.version:
+            causal = self.causal_graph()
+            with self._clusters_lock:
+                clusters = self._clusters.get(dimension)
+                if clusters is None or clusters.version != self.version:
+                    clusters = ClusterGraph(self.version, dimension, self.index, causal, self.ids)
+                    self._clusters[dimension] = clusters
+        return clusters
+
+    def graph_layout(self) -> Dict[str, Position]:
+        """Precomputed network positions, laid out again only when the topology changes"""
+        key = (self.topology_version, len(self.index.kpis))
+        layout = self._layout
+        if layout is None or layout[0] != key:
+            causal = self.causal_graph()
+            with self._layout_lock:
+                layout = self._layout
+                if layout is None or layout[0] != key:
+                    uri = self.ids.uri
+                    edges = [(uri(source), uri(target))
+                             for source, targets in causal.successors.items()
+                             for target, _ in targets]
+                    with stage("reasoner.graph_layout"):
+                        positions = compute_layout(list(self.index.kpis), edges)
+                    layout = self._layout = (key, positions)
+        return layout[1]
+
+    @timed("reasoner.query_kpis")
+    def query_kpis(self, department: Optional[str] = None, domain: Optional[str] = None,
+                   goal: Optional[str] = None, status: Optional[str] = None,
+                   cursor: Optional[str] = None,
+                   limit: Optional[int] = None,
+                   as_of: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Filtered, paginated KPI records served from the KPI index.
+
+        ``department``, ``domain`` and ``goal`` accept a full URI or a local
+        name in the hospital namespace (e.g. ``EmergencyDepartment``).
+        ``as_of`` reads observations and statuses from a point-in-time snapshot.
+        Returns the page and the cursor for the next page (None at the end).
+        """
+        return self.snapshot(as_of).query(
+            department=self._expand_uri(department),
+            domain=self._expand_uri(domain),
+            goal=self._expand_uri(goal),
+            status=status,
+            cursor=cursor,
+            limit=limit,
+        )
+
+    def _expand_uri(self, value: Optional[str]) -> Optional[str]:
+        if value is None or "://" in value:
+            return value
+        return str(self.hospital[value])
+
     # ----------------------------------------------------------
     # Department Queries
     # ----------------------------------------------------------
 
+    @timed("reasoner.get_department_kpis")
     def get_department_kpis(self, department_uri: str) -> List[Dict[str, Any]]:
         """Return all KPIs linked to a department"""
-        query = prepareQuery("""
-            SELECT ?kpi ?label ?obs ?value ?status
-            WHERE {
-                ?dept a hospital:Department ;
-                      hospital:hasKPI ?kpi .
-                ?kpi rdfs:label ?label ;
-                     hospital:hasObservation ?obs .
-                ?obs hospital:hasValue ?value ;
-                     hospital:status ?status .
-                FILTER(?dept = ?department)
-            }
-        """, initNs={"hospital": self.hospital, "rdfs": RDFS})
+        return self.get_group_kpis("department", department_uri)
+
+    def get_group_kpis(self, dimension: str, group_uri: str) -> List[Dict[str, Any]]:
+        """
+        KPIs of a department, domain or goal with their latest observation,
+        read from the membership index in O(members).
+        """
+        return self.index.members(dimension, self._expand_uri(group_uri))
+
+    # Membership dimension -> (predicate, whether the group is the subject)
+    MEMBERSHIP_PREDICATES = {
+        "department": ("hasKPI", True),
+        "domain": ("belongsToDomain", False),
+        "goal": ("contributesToGoal", False),
+    }
+
+    @timed("reasoner.assign_kpi")
+    def assign_kpi(self, kpi_uri: str, dimension: str, group_uri: str) -> bool:
+        """Link a KPI to a department, domain or goal, keeping the indexes current"""
+        if dimension not in self.MEMBERSHIP_PREDICATES:
+            raise ValueError(f"Unknown dimension: {dimension}")
+        kpi_uri = self._expand_uri(kpi_uri)
+        group_uri = self._expand_uri(group_uri)
+        if kpi_uri not in self.index.kpis:
+            return False
 
-        results = []
-        try:
-            for row in self.graph.query(query, initBindings={'department': URIRef(department_uri)}):
-                results.append({
-                    "uri": str(row.kpi),
-                    "label": str(row.label),
-                    "observation": {
-                        "uri": str(row.obs),
-                        "value": float(row.value),
-                        "status": str(row.status)
-                    }
-                })
-        except Exception as e:
-            print("❌ Error fetching department KPIs:", e)
-        return results
+        predicate, group_is_subject = self.MEMBERSHIP_PREDICATES[dimension]
+        kpi, group = URIRef(kpi_uri), URIRef(group_uri)
+        if group_is_subject:
+            self.inference.add_triple(group, self.hospital[predicate], kpi)
+        else:
+            self.inference.add_triple(kpi, self.hospital[predicate], group)
+
+        label = self.graph.value(group, RDFS.label)
+        if not self.index.add_member(dimension, group_uri, kpi_uri,
+                                     str(label) if label is not None else None):
+            return False
+        self.rollups.add_member(dimension, group_uri, kpi_uri)
+        self._mark_modified()
+        return True
 
     # ----------------------------------------------------------
     # Simulation and Impact Reasoning
@@ -173,47 +388,26 @@ class HospitalKPIReasoner:
 
     def _get_influenced_kpis(self, kpi_uri: str) -> List[Dict[str, Any]]:
         """Internal helper: get KPIs influenced by a given KPI"""
-        query = prepareQuery("""
-            SELECT ?influenced_kpi ?label ?current_value
-            WHERE {
-                ?kpi hospital:influences ?influenced_kpi .
-                ?influenced_kpi rdfs:label ?label ;
-                                hospital:hasObservation ?obs .
-                ?obs hospital:hasValue ?current_value .
-                FILTER(?kpi = ?kpi_uri)
-            }
-        """, initNs={"hospital": self.hospital, "rdfs": RDFS})
-
         results = []
         try:
-            for row in self.graph.query(query, initBindings={'kpi_uri': URIRef(kpi_uri)}):
+            for row in self.graph.query(INFLUENCED_QUERY, initBindings={'kpi_uri': URIRef(kpi_uri)}):
                 results.append({
                     "uri": str(row.influenced_kpi),
                     "label": str(row.label),
                     "current_value": float(row.current_value)
                 })
-        except Exception as e:
-            print("❌ Error in _get_influenced_kpis:", e)
+        except Exception:
+            logger.exception("Error in _get_influenced_kpis")
         return results
 
+    @timed("reasoner.calculate_kpi_impact")
     def calculate_kpi_impact(self, kpi_uri: str, new_value: float) -> Dict[str, Any]:
         """Simulate how changing one KPI might impact others"""
-        print(f"🧮 Simulating impact for KPI: {kpi_uri} new_value={new_value}")
-
-        query = prepareQuery("""
-            SELECT ?label ?target ?unit ?current_value
-            WHERE {
-                ?kpi rdfs:label ?label ;
-                     hospital:targetValue ?target ;
-                     hospital:unit ?unit ;
-                     hospital:hasObservation ?obs .
-                ?obs hospital:hasValue ?current_value .
-                FILTER(?kpi = ?kpi_uri)
-            }
-        """, initNs={"hospital": self.hospital, "rdfs": RDFS})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Simulating KPI impact", extra={"kpi": kpi_uri, "new_value": new_value})
 
         kpi_data = None
-        for row in self.graph.query(query, initBindings={'kpi_uri': URIRef(kpi_uri)}):
+        for row in self.graph.query(IMPACT_QUERY, initBindings={'kpi_uri': URIRef(kpi_uri)}):
             kpi_data = {
                 "label": str(row.label),
                 "target": float(row.target),
@@ -223,7 +417,7 @@ class HospitalKPIReasoner:
             break
 
         if not kpi_data:
-            print("⚠️ KPI not found")
+            logger.warning("KPI not found", extra={"kpi": kpi_uri})
             return {"error": "KPI not found"}
 
         # Calculate base change %
@@ -248,17 +442,18 @@ class HospitalKPIReasoner:
                 "projected_value": round(inf["current_value"] + projected_change, 2)
             })
 
-        print(f"✅ Impact simulation complete for {len(influenced_kpis)} influenced KPIs.")
+        logger.debug("Impact simulation complete for %d influenced KPIs", len(influenced_kpis))
         return impact_analysis
 
     # ----------------------------------------------------------
     # Insight Generation
     # ----------------------------------------------------------
 
-    def generate_insights(self) -> List[Dict[str, Any]]:
-        """Generate high-level performance insights"""
-        print("🧠 Generating semantic insights...")
-        kpis = self.get_all_kpis()
+    @coalesced("generate_insights")
+    @timed("reasoner.generate_insights")
+    def generate_insights(self, as_of: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Generate high-level performance insights (from a snapshot if ``as_of`` is given)"""
+        kpis = self.get_all_kpis(as_of)
         relationships = self.get_kpi_relationships()
 
         insights = []
@@ -298,32 +493,27 @@ class HospitalKPIReasoner:
                         "recommendation": f"Address {src['label']} to improve {tgt['label']}."
                     })
 
-        print(f"✅ Generated {len(insights)} insights")
+        logger.debug("Generated %d insights", len(insights))
         return insights
 
     # ----------------------------------------------------------
     # KPI Update and Real-Time Observation Creation
     # ----------------------------------------------------------
 
+    @timed("reasoner.update_kpi_value")
     def update_kpi_value(self, kpi_uri: str, new_value: float) -> bool:
         """Create new observation for a KPI"""
         try:
-            print(f"✏️ Updating KPI {kpi_uri} with new value {new_value}")
             new_obs_uri = f"{kpi_uri}_obs_{int(datetime.now().timestamp())}"
             new_obs = URIRef(new_obs_uri)
 
-            query = prepareQuery("""
-                SELECT ?target
-                WHERE { ?kpi hospital:targetValue ?target . FILTER(?kpi = ?kpi_uri) }
-            """, initNs={"hospital": self.hospital})
-
             target_val = None
-            for row in self.graph.query(query, initBindings={'kpi_uri': URIRef(kpi_uri)}):
+            for row in self.graph.query(TARGET_QUERY, initBindings={'kpi_uri': URIRef(kpi_uri)}):
                 target_val = float(row.target)
                 break
 
             if target_val is None:
-                print("⚠️ KPI target not found.")
+                logger.warning("KPI target not found", extra={"kpi": kpi_uri})
                 return False
 
             ratio = (new_value / target_val) * 100
@@ -337,29 +527,198 @@ class HospitalKPIReasoner:
                 status = "critical"
 
             # Insert into graph
+            timestamp = datetime.now().isoformat()
             self.graph.add((new_obs, RDF.type, self.hospital.PerformanceObservation))
             self.graph.add((new_obs, self.hospital.hasValue, Literal(new_value, datatype=XSD.float)))
             self.graph.add((new_obs, self.hospital.status, Literal(status)))
-            self.graph.add((new_obs, self.hospital.timestamp, Literal(datetime.now().isoformat(), datatype=XSD.dateTime)))
+            self.graph.add((new_obs, self.hospital.timestamp, Literal(timestamp, datatype=XSD.dateTime)))
             self.graph.add((URIRef(kpi_uri), self.hospital.hasObservation, new_obs))
+            observation = Observation(new_obs_uri, float(new_value), status, timestamp)
+            if self.index.add_observation(kpi_uri, observation):
+                self.rollups.observe(kpi_uri, observation)
+            self._mark_modified()
 
-            print(f"✅ KPI {kpi_uri} updated successfully (status={status})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("KPI updated", extra={"kpi": kpi_uri, "value": new_value, "status": status})
             return True
 
-        except Exception as e:
-            print("❌ Error updating KPI:", e)
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error updating KPI", extra={"kpi": kpi_uri})
             return False
 
+    # ----------------------------------------------------------
+    # Bulk Loading
+    # ----------------------------------------------------------
+
+    @timed("reasoner.bulk_load")
+    def bulk_load(self, paths: List[str], fmt: Optional[str] = None,
+                  chunk_size: int = loader.DEFAULT_CHUNK_SIZE,
+                  progress: Optional[loader.Progress] = None) -> Dict[str, Any]:
+        """
+        Stream RDF files into the graph, then re-derive the inferred facts,
+        KPI/observation indexes, rollups and causal adjacency once.
+
+        Each batch goes straight into the graph, so peak memory is the graph
+        plus one batch. A ``loader.LoadError`` keeps the batches read before
+        the failure; the indexes are rebuilt either way so they match it.
+        """
+        before = len(self.graph)
+        files = []
+        try:
+            for path in paths:
+                stats = loader.load_file(self.graph, path, fmt, chunk_size, progress)
+                files.append({"path": path, **stats})
+                logger.info("Loaded RDF file", extra={"path": path, **stats})
+        finally:
+            with stage("bulk_load.reindex"):
+                self.inference.materialize()
+                self.index.rebuild(self.graph, self.hospital)
+                self.rollups.rebuild()
+                for uri in sorted(self.index.kpis):
+                    self.ids.id(uri)
+                self.topology_version += 1
+                self._mark_modified()
+
+        return {
+            "files": files,
+            "new_triples": len(self.graph) - before,
+            "triples": len(self.graph),
+            "kpis": len(self.index.kpis),
+            "observed_kpis": len(self.index),
+            "observations": self.index.observation_count
+        }
+
+    # ----------------------------------------------------------
+    # Causal Topology (materialized closure)
+    # ----------------------------------------------------------
+
+    RELATIONSHIPS = ("influences", "dependsOn")
+    # Inverse properties add_relationship also accepts, asserted target -> source
+    INVERSE_RELATIONSHIPS = ("influencedBy", "dependencyOf")
+    # Strength of each causal link type, as used for KPI correlations
+    CAUSAL_WEIGHTS = {"influences": 0.7, "dependsOn": 0.8}
+    # How strongly an observation status marks a KPI as a likely cause
+    STATUS_SEVERITY = {"critical": 1.0, "warning": 0.6, "good": 0.2, "excellent": 0.0}
+
+    @timed("reasoner.add_relationship")
+    def add_relationship(self, source_uri: str, target_uri: str, relationship: str) -> bool:
+        """Assert a KPI-to-KPI relationship and update the inferred closure"""
+        if relationship not in self.RELATIONSHIPS + self.INVERSE_RELATIONSHIPS:
+            raise ValueError(f"Unknown relationship: {relationship}")
+        added = self.inference.add_triple(
+            URIRef(source_uri), self.hospital[relationship], URIRef(target_uri))
+        if added:
+            self.topology_version += 1
+            self._mark_modified()
+        return bool(added)
+
+    def get_downstream_kpis(self, kpi_uri: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """KPIs transitively influenced by / dependent on ``kpi_uri``, with hop counts"""
+        return self.inference.downstream(kpi_uri, max_depth)
+
+    def get_upstream_kpis(self, kpi_uri: str, max_depth: Optional[int] = None) -> Dict[str, int]:
+        """KPIs that transitively affect ``kpi_uri``, with hop counts"""
+        return self.inference.upstream(kpi_uri, max_depth)
+
+    def is_reachable(self, source_uri: str, target_uri: str) -> bool:
+        """Whether a causal path links ``source_uri`` to ``target_uri``"""
+        return self.inference.reaches(source_uri, target_uri)
+
+    @timed("reasoner.find_root_causes")
+    def find_root_causes(self, kpi_uri: str, max_depth: int = 4, min_score: float = 0.05,
+                         limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Rank upstream KPIs by how likely they are to explain ``kpi_uri``.
+
+        Best-first search over the reverse causal adjacency: a path's weight
+        is the product of its link strengths, and each ancestor is visited
+        once via its strongest path. An ancestor scores
+        ``path_weight * (status severity + target deviation) / 2``, so the
+        search stops as soon as the best remaining path weight drops below
+        ``min_score`` (no deeper ancestor can score higher).
+        """
+        start = self.ids.get(kpi_uri)
+        if start is None:
+            return []
+        predecessors = self.causal_graph().predecessors
+
+        best = {start: 1.0}
+        parent: Dict[int, int] = {}
+        heap = [(-1.0, 0, start)]
+        contributors = []
+
+        while heap:
+            neg_weight, depth, node = heapq.heappop(heap)
+            weight = -neg_weight
+            if weight < min_score:
+                break
+            if weight < best.get(node, 0.0):
+                continue  # stale entry, a stronger path was found
+
+            if node != start:
+                record = self.index.get(self.ids.uri(node))
+                if record is not None:
+                    contributors.append(self._score_contributor(record, weight, depth, node, parent, start))
+
+            if depth >= max_depth:
+                continue
+            for upstream, link in predecessors.get(node, ()):
+                candidate = weight * self.CAUSAL_WEIGHTS.get(link, 0.5)
+                if candidate > best.get(upstream, 0.0) and candidate >= min_score:
+                    best[upstream] = candidate
+                    parent[upstream] = node
+                    heapq.heappush(heap, (-candidate, depth + 1, upstream))
+
+        contributors = [c for c in contributors if c["score"] >= min_score]
+        contributors.sort(key=lambda c: c["score"], reverse=True)
+        return contributors[:limit]
+
+    def _score_contributor(self, record: Dict[str, Any], weight: float, depth: int,
+                           node: int, parent: Dict[int, int], target: int) -> Dict[str, Any]:
+        observation = record["observation"]
+        deviation = 0.0
+        if record["target"]:
+            deviation = min(abs(observation["value"] / record["target"] - 1.0), 1.0)
+        severity = self.STATUS_SEVERITY.get(observation["status"], 0.0)
+
+        path = [node]
+        while path[-1] != target:
+            path.append(parent[path[-1]])
+
+        return {
+            "uri": record["uri"],
+            "label": record["label"],
+            "score": round(weight * (severity + deviation) / 2, 4),
+            "path_weight": round(weight, 4),
+            "depth": depth,
+            "status": observation["status"],
+            "value": observation["value"],
+            "target": record["target"],
+            "deviation": round(deviation, 4),
+            "path": self.ids.uris(path)
+        }
+
+    def _mark_modified(self):
+        """Record a graph mutation so cached reads are invalidated"""
+        self.version += 1
+        self.last_modified = datetime.now(timezone.utc)
+
     # ----------------------------------------------------------
     # Graph Data for Visualization
     # ----------------------------------------------------------
 
-    def get_network_graph_data(self) -> Dict[str, Any]:
-        """Return KPI network graph structure for visualization"""
-        print("🌐 Building KPI network graph data...")
-        kpis = self.get_all_kpis()
+    @timed("reasoner.get_network_graph_data")
+    def get_network_graph_data(self, kpis: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Return KPI network graph structure for visualization.
+
+        ``kpis`` restricts the graph to those KPI records (e.g. a filtered
+        page from ``query_kpis``); edges are kept only between listed nodes.
+        """
+        if kpis is None:
+            kpis, _ = self.index.query()
         rels = self.get_kpi_relationships()
+        layout = self.graph_layout()
 
         nodes = [{
             "id": k["uri"],
@@ -369,12 +728,20 @@ class HospitalKPIReasoner:
             "value": k["observation"]["value"],
             "target": k["target"],
             "status": k["observation"]["status"],
-            "unit": k["unit"]
+            "unit": k["unit"],
+            "department": k["department"],
+            "domain_name": k["domain_name"],
+            "goal_name": k["goal_name"]
         } for k in kpis]
+        # Precomputed positions, so clients can skip their own layout
+        for node in nodes:
+            node["x"], node["y"] = layout.get(node["id"], (None, None))
 
-        edges = [{"source": r["source"], "target": r["target"], "type": r["relationship"]} for r in rels]
+        node_ids = {n["id"] for n in nodes}
+        edges = [{"source": r["source"], "target": r["target"], "type": r["relationship"]}
+                 for r in rels if r["source"] in node_ids and r["target"] in node_ids]
 
-        print(f"✅ Network graph ready with {len(nodes)} nodes and {len(edges)} edges.")
+        logger.debug("Network graph ready with %d nodes and %d edges", len(nodes), len(edges))
         return {"nodes": nodes, "edges": edges}
 
 
@@ -382,4 +749,6 @@ class HospitalKPIReasoner:
 # Initialize Singleton Instance
 # ==============================================================
 
-reasoner = HospitalKPIReasoner("ontology/hospital_kpi.owl", "ontology/kpi_data.ttl")
+# KPI_DATA_PATH points the default hospital at other data, e.g. a load-data snapshot
+reasoner = HospitalKPIReasoner("ontology/hospital_kpi.owl",
+                               os.environ.get("KPI_DATA_PATH", "ontology/kpi_data.ttl"))
@@ -0,0 +1,87 @@
+"""
+Compact KPI and observation records.
+
+The KPI index holds one slotted record per KPI instead of nested dicts, with
+URIs and status strings interned so the thousands of references to the same
+department, domain or goal share one string. Records are read-only
+``Mapping``s: existing ``kpi["observation"]["value"]`` style code keeps
+working, and the JSON encoders turn them into dicts (``to_dict``) only when
+a response is serialized.
+
+Records are never mutated in place. The index swaps in a new record
+(``replace``) on every change, so a record a caller is holding is a
+consistent snapshot.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Optional
+
+
+def intern(value: Any) -> Optional[str]:
+    """Interned ``str(value)`` (None stays None)"""
+    return sys.intern(str(value)) if value is not None else None
+
+
+class _Record(Mapping):
+    __slots__ = ()
+    FIELDS: tuple = ()
+    _field_set: frozenset = frozenset()
+
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.FIELDS, args):
+            object.__setattr__(self, name, value)
+        for name in self.FIELDS[len(args):]:
+            object.__setattr__(self, name, kwargs.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def replace(self, **changes) -> "_Record":
+        """Copy with some fields changed"""
+        return type(self)(*[changes[name] if name in changes else getattr(self, name)
+                            for name in self.FIELDS])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class Observation(_Record):
+    """Latest performance observation of a KPI"""
+
+    __slots__ = FIELDS = ("uri", "value", "status", "timestamp")
+    _field_set = frozenset(FIELDS)
+
+    @classmethod
+    def from_mapping(cls, data: Mapping) -> "Observation":
+        return cls(intern(data["uri"]), float(data["value"]),
+                   intern(data["status"]), str(data["timestamp"]))
+
+
+class KPIRecord(_Record):
+    """KPI metadata plus its latest observation (None until observed)"""
+
+    __slots__ = FIELDS = ("uri", "label", "domain", "goal", "target", "unit",
+                          "department_uri", "department", "domain_name", "goal_name",
+                          "observation")
+    _field_set = frozenset(FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = super().to_dict()
+        if self.observation is not None:
+            record["observation"] = self.observation.to_dict()
+        return record
@@ -0,0 +1,192 @@
+"""
+Strategic goal, performance domain and department scorecards.
+
+Every KPI with a current observation contributes ``weight * score`` to each
+goal (``contributesToGoal``), domain (``belongsToDomain``) and department
+(``hasKPI``) it is linked to, where ``score`` comes from the observation's
+status band. Groups keep running sums, so an observation update adjusts
+only the groups its KPI belongs to and reading a rollup is a dict lookup.
+
+Weights are configured with ``KPI_ROLLUP_WEIGHTS``, the path of a JSON file:
+
+    {
+        "kpis": {"MortalityRate": 3.0, "MedicationErrors": 2.0},
+        "status_scores": {"excellent": 100, "good": 85, "warning": 65, "critical": 35}
+    }
+
+KPIs are named by local name or full URI and default to weight 1.0.
+"""
+
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.kpi_index import KPIIndex
+
+LEVELS = ("goal", "domain", "department")
+
+# Midpoints of the value/target bands used to assign observation status
+DEFAULT_STATUS_SCORES = {"excellent": 97.5, "good": 87.5, "warning": 70.0, "critical": 40.0}
+
+
+def rollup_config() -> Dict[str, Any]:
+    """Weights from the JSON file named by ``KPI_ROLLUP_WEIGHTS``, if set"""
+    path = os.environ.get("KPI_ROLLUP_WEIGHTS")
+    if not path:
+        return {}
+    with open(path) as f:
+        config = json.load(f)
+    return {
+        "kpi_weights": config.get("kpis", {}),
+        "status_scores": config.get("status_scores"),
+    }
+
+
+class GoalRollups:
+    """Weighted scores per goal, domain and department, updated per observation"""
+
+    def __init__(self, index: KPIIndex, kpi_weights: Optional[Dict[str, float]] = None,
+                 status_scores: Optional[Dict[str, float]] = None):
+        self.index = index
+        self.status_scores = dict(DEFAULT_STATUS_SCORES)
+        self.status_scores.update(status_scores or {})
+        self._weights = {}
+        for name, weight in (kpi_weights or {}).items():
+            self._weights[name.rsplit("#", 1)[-1]] = float(weight)
+        self._lock = threading.RLock()
+
+        # level -> group uri -> running totals
+        self.groups: Dict[str, Dict[str, Dict[str, Any]]] = {level: {} for level in LEVELS}
+        # kpi uri -> [(level, group uri), ...]
+        self.memberships: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        # kpi uri -> (weight, status) currently counted in its groups
+        self.contributions: Dict[str, Tuple[float, str]] = {}
+
+    @classmethod
+    def from_index(cls, index: KPIIndex, **config) -> "GoalRollups":
+        rollups = cls(index, **config)
+        rollups.rebuild()
+        return rollups
+
+    def rebuild(self):
+        """Recompute every group from the index"""
+        with self._lock:
+            self.memberships.clear()
+            self.contributions.clear()
+            for level in LEVELS:
+                groups = self.groups[level]
+                groups.clear()
+                for group, uris in self.index.membership(level).items():
+                    groups[group] = self._new_group(group)
+                    groups[group]["members"].update(uris)
+                    for uri in uris:
+                        self.memberships[uri].append((level, group))
+
+            for uri, observation in self.index.latest.items():
+                self._apply(uri, observation["status"])
+
+    def _new_group(self, group_uri: str) -> Dict[str, Any]:
+        return {
+            "uri": group_uri,
+            "name": self.index.labels.get(group_uri) or group_uri.rsplit("#", 1)[-1],
+            "members": set(),
+            "weight": 0.0,
+            "weighted_score": 0.0,
+            "status_counts": defaultdict(int),
+        }
+
+    # ----------------------------------------------------------
+    # Maintenance
+    # ----------------------------------------------------------
+
+    def weight(self, kpi_uri: str) -> float:
+        return self._weights.get(kpi_uri.rsplit("#", 1)[-1], 1.0)
+
+    def _apply(self, kpi_uri: str, status: Optional[str]):
+        """Replace the KPI's contribution in every group it belongs to"""
+        previous = self.contributions.pop(kpi_uri, None)
+        current = (self.weight(kpi_uri), status) if status is not None else None
+        if current is not None:
+            self.contributions[kpi_uri] = current
+
+        for level, group_uri in self.memberships.get(kpi_uri, ()):
+            group = self.groups[level][group_uri]
+            if previous is not None:
+                weight, old_status = previous
+                group["weight"] -= weight
+                group["weighted_score"] -= weight * self.status_scores.get(old_status, 0.0)
+                group["status_counts"][old_status] -= 1
+            if current is not None:
+                weight, new_status = current
+                group["weight"] += weight
+                group["weighted_score"] += weight * self.status_scores.get(new_status, 0.0)
+                group["status_counts"][new_status] += 1
+
+    def observe(self, kpi_uri: str, observation: Dict[str, Any]):
+        """Account for a KPI's new latest observation"""
+        with self._lock:
+            self._apply(kpi_uri, observation["status"])
+
+    def add_member(self, level: str, group_uri: str, kpi_uri: str):
+        """Count a KPI in a (possibly new) group from now on"""
+        with self._lock:
+            groups = self.groups[level]
+            group = groups.get(group_uri)
+            if group is None:
+                group = groups[group_uri] = self._new_group(group_uri)
+            if kpi_uri in group["members"]:
+                return
+            group["members"].add(kpi_uri)
+            self.memberships[kpi_uri].append((level, group_uri))
+
+            contribution = self.contributions.get(kpi_uri)
+            if contribution is not None:
+                weight, status = contribution
+                group["weight"] += weight
+                group["weighted_score"] += weight * self.status_scores.get(status, 0.0)
+                group["status_counts"][status] += 1
+
+    def set_weight(self, kpi_uri: str, weight: float):
+        """Change one KPI's weight and re-score its groups"""
+        with self._lock:
+            self._weights[kpi_uri.rsplit("#", 1)[-1]] = float(weight)
+            contribution = self.contributions.get(kpi_uri)
+            if contribution is not None:
+                self._apply(kpi_uri, contribution[1])
+
+    # ----------------------------------------------------------
+    # Reads
+    # ----------------------------------------------------------
+
+    def _summary(self, group: Dict[str, Any]) -> Dict[str, Any]:
+        weight = group["weight"]
+        score = group["weighted_score"] / weight if weight > 1e-9 else None
+        return {
+            "uri": group["uri"],
+            "name": group["name"],
+            "score": round(score, 1) if score is not None else None,
+            "kpi_count": len(group["members"]),
+            "observed_kpis": sum(group["status_counts"].values()),
+            "status_counts": {k: v for k, v in group["status_counts"].items() if v},
+        }
+
+    def get(self, level: str, group_uri: str) -> Optional[Dict[str, Any]]:
+        if level not in self.groups:
+            raise ValueError(f"Unknown rollup level: {level}")
+        with self._lock:
+            group = self.groups[level].get(group_uri)
+            return self._summary(group) if group is not None else None
+
+    def summary(self, level: str) -> List[Dict[str, Any]]:
+        """All groups of ``level``, ordered by name"""
+        if level not in self.groups:
+            raise ValueError(f"Unknown rollup level: {level}")
+        with self._lock:
+            groups = [self._summary(g) for g in self.groups[level].values()]
+        return sorted(groups, key=lambda g: g["name"])
+
+    def members(self, level: str, group_uri: str) -> List[str]:
+        group = self.groups.get(level, {}).get(group_uri)
+        return sorted(group["members"]) if group is not None else []
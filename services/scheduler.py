@@ -0,0 +1,221 @@
+"""
+Periodic job scheduler.
+
+Named jobs run every ``interval`` seconds (plus a random delay of up to
+``jitter`` seconds, so jobs registered together don't fire in lockstep) on a
+small worker pool. One dispatcher thread keeps the schedule; a job that is
+still running when it comes due again is skipped for that round rather
+than started twice. Jobs keep fixed-rate timing: a slow run delays the next
+one only if it overruns the interval.
+
+Each job records its runs, failures, skips and durations (``stats``), and
+run outcomes and timings go to ``/api/metrics``.
+"""
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from services.log import get_logger
+from services.metrics import metrics, stage
+
+logger = get_logger("scheduler")
+
+DEFAULT_WORKERS = 4
+
+JOB_RUNS = metrics.counter(
+    "hospital_kpi_scheduler_runs_total", "Scheduled job runs by outcome",
+    ("job", "outcome"))
+
+
+class Job:
+    """A named periodic callable and its run statistics"""
+
+    def __init__(self, name: str, fn: Callable[[], Any], interval: float,
+                 jitter: float = 0.0, run_immediately: bool = False):
+        if interval <= 0:
+            raise ValueError(f"Job {name}: interval must be positive")
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.jitter = jitter
+        self.paused = False
+        self.running = False
+        self.next_run = time.monotonic() + (0.0 if run_immediately else self._delay())
+
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_duration: Optional[float] = None
+        self.last_started: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+
+    def _delay(self) -> float:
+        return self.interval + (random.uniform(0.0, self.jitter) if self.jitter else 0.0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "interval": self.interval,
+            "jitter": self.jitter,
+            "paused": self.paused,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_started": self.last_started.isoformat() if self.last_started else None,
+            "last_duration": self.last_duration,
+            "average_duration": self.total_seconds / self.runs if self.runs else None,
+            "max_duration": self.max_seconds if self.runs else None,
+            "last_error": self.last_error,
+            "next_run_in": max(self.next_run - time.monotonic(), 0.0),
+        }
+
+
+class Scheduler:
+    """Runs registered jobs periodically on a worker pool (see module docstring)"""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = workers
+        self._jobs: Dict[str, Job] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running = False
+        # Process the dispatcher runs in; a forked child inherits the flag
+        # but not the threads
+        self._pid: Optional[int] = None
+
+    # ----------------------------------------------------------
+    # Registration
+    # ----------------------------------------------------------
+
+    def add(self, name: str, fn: Callable[[], Any], interval: float, jitter: float = 0.0,
+            run_immediately: bool = False, replace: bool = False) -> Job:
+        """Register a job; an existing name is an error unless ``replace`` is set"""
+        job = Job(name, fn, interval, jitter, run_immediately)
+        with self._cond:
+            if name in self._jobs and not replace:
+                raise ValueError(f"Job {name} is already scheduled")
+            self._jobs[name] = job
+            self._cond.notify()
+        return job
+
+    def remove(self, name: str):
+        with self._cond:
+            self._jobs.pop(name, None)
+
+    def get(self, name: str) -> Optional[Job]:
+        return self._jobs.get(name)
+
+    def pause(self, name: str):
+        with self._cond:
+            self._jobs[name].paused = True
+
+    def resume(self, name: str):
+        with self._cond:
+            job = self._jobs[name]
+            job.paused = False
+            job.next_run = time.monotonic() + job._delay()
+            self._cond.notify()
+
+    def run_now(self, name: str):
+        """Bring a job's next run forward to now"""
+        with self._cond:
+            self._jobs[name].next_run = time.monotonic()
+            self._cond.notify()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            jobs = list(self._jobs.values())
+        return [job.stats() for job in jobs]
+
+    # ----------------------------------------------------------
+    # Lifecycle
+    # ----------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._running and self._pid == os.getpid()
+
+    def start(self) -> bool:
+        """Start the dispatcher in this process; returns False if it is already running"""
+        if self._pid is not None and self._pid != os.getpid():
+            # Forked: the parent's lock may have been held mid-dispatch
+            self._cond = threading.Condition()
+            self._running = False
+        with self._cond:
+            if self._running:
+                return False
+            self._running = True
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="job")
+            self._thread = threading.Thread(target=self._dispatch_loop,
+                                            name="scheduler", daemon=True)
+            self._thread.start()
+        logger.info("Scheduler started", extra={"jobs": sorted(self._jobs)})
+        return True
+
+    def stop(self, wait: bool = False):
+        """Stop dispatching; running jobs finish unless the process exits"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify()
+            thread, executor = self._thread, self._executor
+        thread.join()
+        executor.shutdown(wait=wait)
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while self._running:
+                now = time.monotonic()
+                for job in self._jobs.values():
+                    if not job.paused and job.next_run <= now:
+                        self._dispatch(job, now)
+                upcoming = [job.next_run for job in self._jobs.values() if not job.paused]
+                self._cond.wait(timeout=max(min(upcoming) - now, 0.0) if upcoming else None)
+
+    def _dispatch(self, job: Job, now: float):
+        # Fixed rate; after falling behind, the schedule restarts from now
+        job.next_run += job._delay()
+        if job.next_run <= now:
+            job.next_run = now + job._delay()
+        if job.running:
+            job.skipped += 1
+            JOB_RUNS.inc(job=job.name, outcome="skipped")
+            logger.info("Job still running, skipped", extra={"job": job.name})
+            return
+        job.running = True
+        self._executor.submit(self._execute, job)
+
+    def _execute(self, job: Job):
+        job.last_started = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        outcome = "success"
+        try:
+            with stage(f"job.{job.name}"):
+                job.fn()
+            job.last_error = None
+        except Exception as e:
+            outcome = "error"
+            job.failures += 1
+            job.last_error = str(e)
+            logger.exception("Scheduled job failed", extra={"job": job.name})
+        finally:
+            duration = time.perf_counter() - started
+            with self._cond:
+                job.running = False
+                job.runs += 1
+                job.total_seconds += duration
+                job.max_seconds = max(job.max_seconds, duration)
+                job.last_duration = duration
+            JOB_RUNS.inc(job=job.name, outcome=outcome)
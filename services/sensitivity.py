@@ -0,0 +1,135 @@
+"""
+Precomputed KPI sensitivity matrix.
+
+A change to one KPI passes a fixed share (``RELATIONSHIP_FACTORS``) of
+itself along each causal link, so a KPI reached over several walks adds up
+their contributions (``propagate``). ``SensitivityMatrix`` holds the result
+for a unit change of every KPI: the total effect ``T[s, t]`` of KPI ``s`` on
+KPI ``t``, the sum over causal walks of up to ``max_depth`` links of the
+products of their factors. The model is linear and the factors only depend
+on the topology, so the matrix is built once per topology version and every
+what-if (simulation, goal-seek) is a sparse vector-matrix product
+(``apply``).
+
+The matrix is stored twice in compressed sparse form: by row (what a KPI
+affects) and by column (which KPIs affect it).
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from services.kpi_ids import CausalGraph
+
+# Share of a change passed along one causal link, by relationship type
+RELATIONSHIP_FACTORS = {
+    "influences": 0.3,  # 30% influence
+    "dependsOn": 0.5,   # 50% influence
+}
+DEFAULT_FACTOR = 0.1    # 10% influence
+
+# target id, factor, relationship
+Link = Tuple[int, float, str]
+
+
+def causal_links(causal: CausalGraph) -> Dict[int, List[Link]]:
+    """source id -> outgoing links, one per (source, target) pair with the first relationship"""
+    links: Dict[int, List[Link]] = defaultdict(list)
+    for target, edges in causal.predecessors.items():
+        for source, relationship in edges:
+            links[source].append(
+                (target, RELATIONSHIP_FACTORS.get(relationship, DEFAULT_FACTOR), relationship))
+    return dict(links)
+
+
+def propagate(links: Dict[int, List[Link]], deltas: Dict[int, float],
+              max_depth: int) -> Dict[int, float]:
+    """Total change of every KPI reached from ``deltas`` over up to ``max_depth`` links"""
+    totals: Dict[int, float] = {}
+    frontier = dict(deltas)
+    for _ in range(max_depth):
+        if not frontier:
+            break
+        reached: Dict[int, float] = defaultdict(float)
+        for node, change in frontier.items():
+            for target, factor, _ in links.get(node, ()):
+                reached[target] += change * factor
+        for target, change in reached.items():
+            totals[target] = totals.get(target, 0.0) + change
+        frontier = reached
+    return totals
+
+
+def _compressed(rows: List[Dict[int, float]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(indptr, indices, values) of a list of sparse rows, indices sorted"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indices: List[int] = []
+    values: List[float] = []
+    for i, row in enumerate(rows):
+        for index in sorted(row):
+            indices.append(index)
+            values.append(row[index])
+        indptr[i + 1] = len(indices)
+    return indptr, np.array(indices, dtype=np.int64), np.array(values)
+
+
+class SensitivityMatrix:
+    """Total effect of every KPI on every other within a depth limit"""
+
+    def __init__(self, version: int, causal: CausalGraph, size: int, max_depth: int):
+        self.version = version
+        self.max_depth = max_depth
+        self.size = size
+
+        links = causal_links(causal)
+        rows: List[Dict[int, float]] = [{} for _ in range(size)]
+        for source in links:
+            if source < size:
+                rows[source] = propagate(links, {source: 1.0}, max_depth)
+
+        self.indptr, self.indices, self.values = _compressed(rows)
+        columns: List[Dict[int, float]] = [{} for _ in range(size)]
+        for source, row in enumerate(rows):
+            for target, effect in row.items():
+                if target < size:
+                    columns[target][source] = effect
+        self.column_indptr, self.column_indices, self.column_values = _compressed(columns)
+
+    @property
+    def nnz(self) -> int:
+        return len(self.values)
+
+    def effects(self, kpi_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(target ids, effects) of a change to ``kpi_id``"""
+        if not 0 <= kpi_id < self.size:
+            return self.indices[:0], self.values[:0]
+        start, end = self.indptr[kpi_id], self.indptr[kpi_id + 1]
+        return self.indices[start:end], self.values[start:end]
+
+    def levers(self, kpi_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(source ids, effects) of the KPIs that move ``kpi_id``"""
+        if not 0 <= kpi_id < self.size:
+            return self.column_indices[:0], self.column_values[:0]
+        start, end = self.column_indptr[kpi_id], self.column_indptr[kpi_id + 1]
+        return self.column_indices[start:end], self.column_values[start:end]
+
+    def columns(self, kpi_ids: List[int]) -> np.ndarray:
+        """Dense (size, len(kpi_ids)) block of the matrix"""
+        block = np.zeros((self.size, len(kpi_ids)))
+        for j, kpi_id in enumerate(kpi_ids):
+            sources, effects = self.levers(kpi_id)
+            block[sources, j] = effects
+        return block
+
+    def apply(self, deltas: Dict[int, float]) -> Dict[int, float]:
+        """Net change of every affected KPI for the given changes (``deltas @ T``)"""
+        parts = [(self.effects(kpi_id), delta) for kpi_id, delta in deltas.items()]
+        parts = [(targets, effects * delta) for (targets, effects), delta in parts if len(targets)]
+        if not parts:
+            return {}
+        targets = np.concatenate([targets for targets, _ in parts])
+        changes = np.concatenate([changes for _, changes in parts])
+        affected, positions = np.unique(targets, return_inverse=True)
+        totals = np.bincount(positions, weights=changes)
+        return dict(zip(affected.tolist(), totals.tolist()))
@@ -0,0 +1,85 @@
+"""
+Single-flight coalescing of identical concurrent computations.
+
+When several threads ask for the same key at once, the first (the leader)
+runs the computation and the others wait for its result instead of
+repeating the work. Nothing is kept once the call finishes, so a result is
+shared only by callers that overlapped it; keys include the graph version
+so a write always starts a fresh computation.
+
+Coalesced results are handed to every waiter as the same object, so
+callers must treat them as read-only.
+"""
+
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable
+
+from services.metrics import record_cache
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one execution"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        record_cache(self.name, hit=not leader)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+_reasoner_flights = SingleFlight("singleflight.reasoner")
+
+
+def coalesced(name: str, flights: SingleFlight = _reasoner_flights):
+    """
+    Coalesce concurrent calls of a method with equal arguments against the
+    same ``self.version``. Calls with unhashable arguments run directly.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            key = (name, id(self), self.version, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                return fn(self, *args, **kwargs)
+            return flights.do(key, lambda: fn(self, *args, **kwargs))
+        return wrapper
+    return decorator
@@ -0,0 +1,313 @@
+"""
+Guarded, read-only SPARQL evaluation.
+
+Queries are parsed once and the prepared algebra is cached. The
+application's own queries (``prepare_query``) are a fixed set, parsed when
+their module loads and then read from a plain dict without locking; ad-hoc
+queries (``prepare_adhoc``) have a bounded LRU cache of their own, so they
+can neither evict nor wait behind application queries. rdflib's parser is
+not thread-safe, so every parse holds one lock. Only SELECT and ASK are
+accepted; the query grammar has no update forms, and ``SERVICE`` clauses
+(which would make outbound HTTP requests) are rejected.
+
+Evaluation runs against a view of the graph whose triple scans check a
+deadline, and an rdflib ``CUSTOM_EVALS`` hook checks it between the
+solutions of every algebra node of such a query, so a runaway scan, join,
+cross-product or the input of a sort stops inside rdflib with
+``QueryTimeout`` rather than after it finishes. SELECT rows are produced
+lazily and stop at ``max_rows``; ``QueryResult.truncated`` records why a
+result ended early.
+``json_chunks`` / ``csv_chunks`` encode a result incrementally as SPARQL
+1.1 JSON / CSV results.
+"""
+
+import csv
+import io
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pyparsing import ParseException
+from rdflib import BNode, Graph, Literal, OWL, RDF, RDFS, URIRef, XSD
+from rdflib.plugins.sparql import CUSTOM_EVALS, prepareQuery
+from rdflib.plugins.sparql.evaluate import evalPart, evalQuery
+from rdflib.plugins.sparql.parserutils import CompValue
+from rdflib.plugins.sparql.sparql import Query
+
+# Prefixes available to ad-hoc queries without declaring them
+PREFIXES = {
+    "hospital": "http://hospital-kpi.org/ontology#",
+    "rdf": str(RDF),
+    "rdfs": str(RDFS),
+    "owl": str(OWL),
+    "xsd": str(XSD),
+}
+
+DEFAULT_TIMEOUT = 5.0
+DEFAULT_MAX_ROWS = 10000
+
+CACHE_SIZE = 256
+# Triples scanned, or solutions produced by one algebra node, between deadline checks
+CHECK_INTERVAL = 1024
+# Rows per chunk written to the response
+CHUNK_ROWS = 500
+
+
+class SparqlError(ValueError):
+    """Query rejected: syntax error, unsupported form or feature"""
+
+
+class QueryTimeout(Exception):
+    """Evaluation ran past its deadline"""
+
+
+# Application queries, kept for the life of the process
+_prepared: Dict[Tuple[str, Tuple], Query] = {}
+# Ad-hoc query text -> parsed query, most recently used last
+_adhoc: "OrderedDict[str, Query]" = OrderedDict()
+_adhoc_lock = threading.Lock()
+# Held by every parse
+_parse_lock = threading.Lock()
+
+
+def prepare_query(text: str, initNs: Optional[Dict[str, Any]] = None) -> Query:
+    """Parsed application query; cache hits take no lock"""
+    initNs = initNs if initNs is not None else PREFIXES
+    key = (text, tuple(sorted((k, str(v)) for k, v in initNs.items())))
+    query = _prepared.get(key)
+    if query is None:
+        with _parse_lock:
+            query = _prepared.get(key)
+            if query is None:
+                query = _prepared[key] = prepareQuery(text, initNs=initNs)
+    return query
+
+
+def prepare_adhoc(text: str) -> Query:
+    """Parsed ad-hoc query (``PREFIXES`` predeclared) from its own LRU cache"""
+    with _adhoc_lock:
+        query = _adhoc.get(text)
+        if query is not None:
+            _adhoc.move_to_end(text)
+            return query
+    with _parse_lock:
+        query = prepareQuery(text, initNs=PREFIXES)
+    with _adhoc_lock:
+        _adhoc[text] = query
+        if len(_adhoc) > CACHE_SIZE:
+            _adhoc.popitem(last=False)
+    return query
+
+
+class _GuardedGraph(Graph):
+    """Read view over a graph's store whose triple scans honour a deadline"""
+
+    def __init__(self, graph: Graph, deadline: float):
+        super().__init__(store=graph.store, identifier=graph.identifier,
+                         namespace_manager=graph.namespace_manager)
+        self.deadline = deadline
+
+    def triples(self, pattern):
+        deadline = self.deadline
+        if time.monotonic() > deadline:
+            raise QueryTimeout()
+        scanned = 0
+        for triple in super().triples(pattern):
+            scanned += 1
+            if scanned % CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+                raise QueryTimeout()
+            yield triple
+
+
+# Algebra node the hook hands back to rdflib's own evaluation (per thread)
+_delegated = threading.local()
+
+
+def _checked(solutions, deadline: float):
+    for count, solution in enumerate(solutions, 1):
+        if count % CHECK_INTERVAL == 0 and time.monotonic() > deadline:
+            raise QueryTimeout()
+        yield solution
+
+
+def _deadline_eval(ctx, part):
+    """``CUSTOM_EVALS`` hook: deadline checks between the solutions of a guarded query's nodes"""
+    graph = ctx.graph
+    if not isinstance(graph, _GuardedGraph) or part.name.endswith("Query"):
+        raise NotImplementedError()
+    if getattr(_delegated, "part", None) is part:
+        _delegated.part = None
+        raise NotImplementedError()
+    if time.monotonic() > graph.deadline:
+        raise QueryTimeout()
+    _delegated.part = part
+    solutions = evalPart(ctx, part)
+    if isinstance(solutions, dict):
+        return solutions
+    return _checked(solutions, graph.deadline)
+
+
+CUSTOM_EVALS["hospital_kpi_deadline"] = _deadline_eval
+
+
+def _uses_service(node) -> bool:
+    if isinstance(node, CompValue):
+        if node.name == "ServiceGraphPattern":
+            return True
+        return any(_uses_service(value) for value in node.values())
+    if isinstance(node, (list, tuple)):
+        return any(_uses_service(value) for value in node)
+    return False
+
+
+class QueryResult:
+    """Lazily evaluated SELECT rows or an ASK answer"""
+
+    def __init__(self, query_type: str, variables: List = (), bindings=None,
+                 boolean: Optional[bool] = None, max_rows: Optional[int] = None):
+        self.type = query_type
+        self.vars = [str(var) for var in variables]
+        self.boolean = boolean
+        self.max_rows = max_rows
+        self.truncated: List[str] = []
+        self.row_count = 0
+        self._variables = list(variables)
+        self._bindings = bindings
+        self._first = None
+        if bindings is not None:
+            # Evaluate up to the first row now, so errors and timeouts that
+            # happen before any output can still be reported as such
+            self._first = self._next_row()
+
+    def _next_row(self) -> Optional[Tuple]:
+        solution = next(self._bindings, None)
+        if solution is None:
+            return None
+        return tuple(solution.get(var) for var in self._variables)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        """Rows as tuples of terms (None for unbound), in ``vars`` order"""
+        if self._bindings is None:
+            return
+        row = self._first
+        try:
+            while row is not None:
+                if self.max_rows is not None and self.row_count >= self.max_rows:
+                    self.truncated.append("max_rows")
+                    break
+                self.row_count += 1
+                yield row
+                # Raises QueryTimeout if producing the next row runs out of time
+                row = self._next_row()
+        except QueryTimeout:
+            self.truncated.append("timeout")
+        finally:
+            close = getattr(self._bindings, "close", None)
+            if close is not None:
+                close()
+
+
+def execute(graph: Graph, text: str, timeout: float = DEFAULT_TIMEOUT,
+            max_rows: Optional[int] = None) -> QueryResult:
+    """
+    Prepare and start evaluating a read-only query.
+
+    Raises ``SparqlError`` for rejected queries and ``QueryTimeout`` if the
+    deadline passes before the first row (or an ASK answer) is available.
+    """
+    try:
+        query = prepare_adhoc(text)
+    except ParseException as e:
+        raise SparqlError(f"Invalid query: {e}")
+
+    algebra = query.algebra
+    if algebra.name not in ("SelectQuery", "AskQuery"):
+        raise SparqlError("Only SELECT and ASK queries are supported")
+    if algebra.datasetClause:
+        raise SparqlError("FROM / FROM NAMED are not supported")
+    if _uses_service(algebra):
+        raise SparqlError("SERVICE is not supported")
+
+    deadline = time.monotonic() + timeout
+    result = evalQuery(_GuardedGraph(graph, deadline), query)
+    if algebra.name == "AskQuery":
+        return QueryResult("ASK", boolean=bool(result["askAnswer"]))
+    return QueryResult("SELECT", result["vars_"], iter(result["bindings"]),
+                       max_rows=max_rows)
+
+
+# ----------------------------------------------------------
+# SPARQL 1.1 result formats
+# ----------------------------------------------------------
+
+def _json_term(term) -> Dict[str, str]:
+    if isinstance(term, URIRef):
+        return {"type": "uri", "value": str(term)}
+    if isinstance(term, BNode):
+        return {"type": "bnode", "value": str(term)}
+    encoded = {"type": "literal", "value": str(term)}
+    if isinstance(term, Literal):
+        if term.language:
+            encoded["xml:lang"] = term.language
+        elif term.datatype:
+            encoded["datatype"] = str(term.datatype)
+    return encoded
+
+
+def json_chunks(result: QueryResult) -> Iterator[str]:
+    """``application/sparql-results+json``; early stops are listed under ``truncated``"""
+    if result.type == "ASK":
+        yield json.dumps({"head": {}, "boolean": result.boolean})
+        return
+
+    yield '{"head": %s, "results": {"bindings": [' % json.dumps({"vars": result.vars})
+    variables = result.vars
+    batch = []
+    separator = ""
+    for row in result:
+        binding = {var: _json_term(term) for var, term in zip(variables, row) if term is not None}
+        batch.append(json.dumps(binding))
+        if len(batch) >= CHUNK_ROWS:
+            yield separator + ", ".join(batch)
+            separator = ", "
+            batch = []
+    if batch:
+        yield separator + ", ".join(batch)
+    yield ']}, "truncated": %s}' % json.dumps(result.truncated)
+
+
+def _csv_term(term) -> str:
+    if term is None:
+        return ""
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    return str(term)
+
+
+def csv_chunks(result: QueryResult) -> Iterator[str]:
+    """``text/csv`` per SPARQL 1.1 CSV results (ASK answers as a ``boolean`` column)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+
+    def flush() -> str:
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    if result.type == "ASK":
+        writer.writerow(["boolean"])
+        writer.writerow(["true" if result.boolean else "false"])
+        yield flush()
+        return
+
+    writer.writerow(result.vars)
+    rows = 0
+    for row in result:
+        writer.writerow([_csv_term(term) for term in row])
+        rows += 1
+        if rows % CHUNK_ROWS == 0:
+            yield flush()
+    yield flush()
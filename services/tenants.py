@@ -0,0 +1,172 @@
+"""
+Multi-hospital tenancy.
+
+Each hospital (tenant) gets its own ``HospitalKPIReasoner`` over its own
+``Graph``, so a query for one hospital only touches that hospital's triples,
+indexes and closure. The bundled data is the ``general`` tenant and reuses
+the global ``reasoner``/``analytics`` singletons; further hospitals come
+from the JSON file named by ``KPI_TENANTS``:
+
+    {
+        "north": {"label": "North Campus", "data": "data/north.ttl"},
+        "south": {"label": "South Campus", "data": "data/south.nt"}
+    }
+
+Tenant reasoners are loaded lazily on first use. ``fan_out`` runs a function
+against several tenants on a thread pool for cross-hospital comparisons.
+"""
+
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from services.analytics import KPIAnalytics, analytics as default_analytics
+from services.log import get_logger
+from services.metrics import metrics
+from services.reasoning_engine import HospitalKPIReasoner, reasoner as default_reasoner
+
+logger = get_logger("tenants")
+
+DEFAULT_TENANT = "general"
+ONTOLOGY_PATH = "ontology/hospital_kpi.owl"
+TENANT_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+DEFAULT_FAN_OUT_WORKERS = 8
+
+
+class UnknownTenant(KeyError):
+    """Raised for a tenant id that is not registered"""
+
+
+class Tenant:
+    """One hospital: its data file and (once loaded) reasoner and analytics"""
+
+    def __init__(self, tenant_id: str, data_path: str, label: Optional[str] = None,
+                 reasoner: Optional[HospitalKPIReasoner] = None,
+                 analytics: Optional[KPIAnalytics] = None):
+        self.id = tenant_id
+        self.label = label or tenant_id
+        self.data_path = data_path
+        self.reasoner = reasoner
+        self.analytics = analytics
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.reasoner is not None
+
+    def load(self) -> "Tenant":
+        """Build the tenant's reasoner on first use"""
+        if self.reasoner is None:
+            with self._lock:
+                if self.reasoner is None:
+                    logger.info("Loading tenant", extra={"tenant": self.id, "data": self.data_path})
+                    kpi_reasoner = HospitalKPIReasoner(ONTOLOGY_PATH, self.data_path)
+                    self.analytics = KPIAnalytics(kpi_reasoner)
+                    self.reasoner = kpi_reasoner
+        return self
+
+    def describe(self) -> Dict[str, Any]:
+        info = {"id": self.id, "label": self.label, "loaded": self.loaded}
+        if self.loaded:
+            info["kpis"] = len(self.reasoner.index)
+            info["triples"] = len(self.reasoner.graph)
+            info["version"] = self.reasoner.version
+        return info
+
+
+class TenantRegistry:
+    """Registered tenants by id"""
+
+    def __init__(self):
+        self._tenants: Dict[str, Tenant] = {}
+        self._lock = threading.Lock()
+
+    def register(self, tenant_id: str, data_path: str, label: Optional[str] = None,
+                 reasoner: Optional[HospitalKPIReasoner] = None,
+                 analytics: Optional[KPIAnalytics] = None) -> Tenant:
+        if not TENANT_ID.match(tenant_id):
+            raise ValueError(f"Invalid tenant id: {tenant_id}")
+        tenant = Tenant(tenant_id, data_path, label, reasoner, analytics)
+        with self._lock:
+            self._tenants[tenant_id] = tenant
+        return tenant
+
+    def load_config(self, path: str):
+        """Register every tenant listed in a ``KPI_TENANTS`` JSON file"""
+        with open(path) as f:
+            config = json.load(f)
+        for tenant_id, entry in config.items():
+            self.register(tenant_id, entry["data"], entry.get("label"))
+
+    def get(self, tenant_id: Optional[str] = None) -> Tenant:
+        """Loaded tenant by id (the default tenant if None)"""
+        tenant = self._tenants.get(tenant_id or DEFAULT_TENANT)
+        if tenant is None:
+            raise UnknownTenant(tenant_id)
+        return tenant.load()
+
+    def __contains__(self, tenant_id: str) -> bool:
+        return tenant_id in self._tenants
+
+    def ids(self) -> List[str]:
+        return sorted(self._tenants)
+
+    def loaded(self) -> List[Tenant]:
+        """Tenants whose reasoner has been built, by id"""
+        return [tenant for tenant in map(self._tenants.get, self.ids()) if tenant.loaded]
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [self._tenants[t].describe() for t in self.ids()]
+
+    def fan_out(self, fn: Callable[[Tenant], Any], tenant_ids: Optional[Iterable[str]] = None,
+                max_workers: int = DEFAULT_FAN_OUT_WORKERS) -> Dict[str, Any]:
+        """
+        Call ``fn(tenant)`` for each tenant (all by default) in parallel.
+
+        Returns ``{tenant_id: result}``; a tenant whose call raised maps to
+        ``{"error": message}`` so one failing hospital doesn't sink the rest.
+        """
+        ids = list(tenant_ids) if tenant_ids is not None else self.ids()
+        for tenant_id in ids:
+            if tenant_id not in self._tenants:
+                raise UnknownTenant(tenant_id)
+
+        def call(tenant_id):
+            try:
+                return fn(self.get(tenant_id))
+            except Exception as e:
+                logger.exception("Tenant fan-out call failed", extra={"tenant": tenant_id})
+                return {"error": str(e)}
+
+        if len(ids) <= 1:
+            return {tenant_id: call(tenant_id) for tenant_id in ids}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(ids)),
+                                thread_name_prefix="tenant-fan-out") as pool:
+            return dict(zip(ids, pool.map(call, ids)))
+
+
+tenants = TenantRegistry()
+tenants.register(DEFAULT_TENANT, default_reasoner.data_path, "General Hospital",
+                 reasoner=default_reasoner, analytics=default_analytics)
+if os.environ.get("KPI_TENANTS"):
+    tenants.load_config(os.environ["KPI_TENANTS"])
+
+
+def _per_tenant(read: Callable[[HospitalKPIReasoner], float]) -> Callable[[], Dict]:
+    """Gauge callback: ``read(reasoner)`` of every loaded tenant"""
+    return lambda: {(tenant.id,): read(tenant.reasoner) for tenant in tenants.loaded()}
+
+
+metrics.gauge("hospital_kpi_graph_triples", "Triples in the reasoner graph", ("tenant",),
+              callback=_per_tenant(lambda reasoner: len(reasoner.graph)))
+metrics.gauge("hospital_kpi_indexed_kpis", "KPIs with a current observation", ("tenant",),
+              callback=_per_tenant(lambda reasoner: len(reasoner.index)))
+metrics.gauge("hospital_kpi_observations", "Performance observations in the graph", ("tenant",),
+              callback=_per_tenant(lambda reasoner: reasoner.index.observation_count))
+metrics.gauge("hospital_kpi_graph_version", "Graph mutation version", ("tenant",),
+              callback=_per_tenant(lambda reasoner: reasoner.version))
+metrics.gauge("hospital_kpi_closure_pairs", "Materialized causal reachability pairs", ("tenant",),
+              callback=_per_tenant(lambda reasoner: reasoner.inference.closure_size()))
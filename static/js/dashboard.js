@@ -6,6 +6,12 @@ let currentKPIs = [];
 let currentInsights = [];
 let isRealtimeActive = false;
 
+// Networks larger than this are drawn as clusters that expand on click
+const CLUSTER_THRESHOLD = 300;
+const CLUSTER_DIMENSION = 'department';
+let graphClustered = false;
+let expandedCluster = null;
+
 // Initialize dashboard
 function initializeDashboard() {
     console.log('Initializing Hospital KPI Dashboard...');
@@ -47,7 +53,11 @@ function initializeWebSocket() {
         });
         
         socket.on('graph_update', function(data) {
-            updateNetworkGraph(data.graph_data);
+            if (graphClustered) {
+                loadNetworkGraph();
+            } else {
+                updateNetworkGraph(data.graph_data);
+            }
         });
         
         socket.on('error', function(data) {
@@ -83,11 +93,8 @@ async function loadDashboardData() {
         }
         
         // Load network graph
-        const graphResponse = await fetch('/api/graph');
-        if (graphResponse.ok) {
-            const graphData = await graphResponse.json();
-            updateNetworkGraph(graphData.data);
-        }
+        graphClustered = currentKPIs.length > CLUSTER_THRESHOLD;
+        await loadNetworkGraph();
         
         // Load strategic goals
         const goalsResponse = await fetch('/api/strategic-goals');
@@ -319,6 +326,31 @@ function getSeverityColor(severity) {
     return colors[severity] || 'bg-gray-100 text-gray-800';
 }
 
+// Load the full network, or for large networks the cluster overview or
+// the currently expanded cluster
+async function loadNetworkGraph() {
+    let url = '/api/graph';
+    if (graphClustered) {
+        url = expandedCluster
+            ? `/api/graph/clusters/${encodeURIComponent(expandedCluster)}?by=${CLUSTER_DIMENSION}`
+            : `/api/graph/clusters?by=${CLUSTER_DIMENSION}`;
+    }
+    const graphResponse = await fetch(url);
+    if (graphResponse.ok) {
+        const graphData = await graphResponse.json();
+        updateNetworkGraph(graphData.data);
+    } else if (expandedCluster) {
+        // The cluster is gone; fall back to the overview
+        expandedCluster = null;
+        await loadNetworkGraph();
+    }
+}
+
+function expandNetworkCluster(clusterId) {
+    expandedCluster = clusterId;
+    loadNetworkGraph();
+}
+
 // Update network graph
 function updateNetworkGraph(graphData) {
     if (!graphData || !graphData.nodes || !graphData.edges) return;
@@ -329,14 +361,34 @@ function updateNetworkGraph(graphData) {
     // Initialize ECharts network graph
     if (!networkChart) {
         networkChart = echarts.init(container);
+        networkChart.on('click', function(params) {
+            if (params.dataType === 'node' && params.data.cluster) {
+                expandNetworkCluster(params.data.cluster);
+            }
+        });
     }
     
+    // Use the server's precomputed layout when every node has a position
+    const positioned = graphData.nodes.length > 0 &&
+        graphData.nodes.every(node => typeof node.x === 'number' && typeof node.y === 'number');
+    
     const option = {
         backgroundColor: 'transparent',
         tooltip: {
             trigger: 'item',
             formatter: function(params) {
-                if (params.dataType === 'node') {
+                if (params.dataType === 'node' && params.data.cluster) {
+                    const node = params.data;
+                    const score = node.score !== null && node.score !== undefined ? `${node.score.toFixed(1)}%` : 'n/a';
+                    return `
+                        <div class="text-sm">
+                            <strong>${node.label}</strong><br/>
+                            KPIs: ${node.kpi_count}<br/>
+                            Score: ${score}<br/>
+                            Click to expand
+                        </div>
+                    `;
+                } else if (params.dataType === 'node') {
                     const node = params.data;
                     return `
                         <div class="text-sm">
@@ -347,6 +399,8 @@ function updateNetworkGraph(graphData) {
                             Performance: ${((node.value / node.target) * 100).toFixed(1)}%
                         </div>
                     `;
+                } else if (params.data.count) {
+                    return `${params.data.source} → ${params.data.target}<br/>Links: ${params.data.count}`;
                 } else {
                     return `${params.data.source} → ${params.data.target}<br/>Type: ${params.data.type}`;
                 }
@@ -354,12 +408,20 @@ function updateNetworkGraph(graphData) {
         },
         series: [{
             type: 'graph',
-            layout: 'force',
+            layout: positioned ? 'none' : 'force',
             data: graphData.nodes.map(node => ({
                 id: node.id,
+                x: positioned ? node.x : undefined,
+                y: positioned ? node.y : undefined,
                 name: node.label,
                 label: node.label,
-                value: node.value,
+                value: node.value !== undefined ? node.value : node.kpi_count,
+                unit: node.unit,
+                target: node.target,
+                status: node.status,
+                cluster: node.cluster,
+                kpi_count: node.kpi_count,
+                score: node.score,
                 symbolSize: node.size || 15,
                 itemStyle: {
                     color: node.color || '#2563eb'
@@ -369,6 +431,7 @@ function updateNetworkGraph(graphData) {
                 source: edge.source,
                 target: edge.target,
                 type: edge.type,
+                count: edge.count,
                 lineStyle: {
                     color: edge.color || '#2563eb',
                     width: edge.weight || 1
@@ -521,6 +584,12 @@ function zoomNetworkGraph(factor) {
 }
 
 function centerNetworkGraph() {
+    // An expanded cluster collapses back to the overview
+    if (expandedCluster) {
+        expandedCluster = null;
+        loadNetworkGraph();
+        return;
+    }
     if (networkChart) {
         networkChart.dispatchAction({
             type: 'restore'